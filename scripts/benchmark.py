@@ -0,0 +1,171 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from recommender.benchmarks.suite import (
+    BENCHMARK_SCALES,
+    compare_results,
+    median_results,
+    run_benchmarks,
+)
+from recommender.config import (
+    APPROX_NPROBE,
+    APPROX_SHORTLIST,
+    BENCHMARK_TOLERANCE,
+    DEFAULT_TOP_K,
+)
+from recommender.models.factorization import FACTORIZATION_METHODS
+from recommender.utils.logging import get_logger
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time fit, indexing, recommendation and evaluation on synthetic "
+        "data and compare against a stored baseline."
+    )
+    parser.add_argument(
+        "--scale",
+        choices=sorted(BENCHMARK_SCALES),
+        default="small",
+        help="Synthetic data size preset",
+    )
+    parser.add_argument("--n-users", type=int, help="Override the preset's users")
+    parser.add_argument("--n-items", type=int, help="Override the preset's items")
+    parser.add_argument(
+        "--density", type=float, help="Override the preset's rating density"
+    )
+    parser.add_argument(
+        "--tokens-per-item", type=int, help="Override the preset's mean tokens per item"
+    )
+    parser.add_argument("--dim", type=int, help="Override the preset's token dimension")
+    parser.add_argument(
+        "--svd-backend",
+        choices=("surprise",) + FACTORIZATION_METHODS,
+        default="surprise",
+        help="Matrix factorization trainer to benchmark",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Rounds, each timing every stage once and sweeping latency once",
+    )
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=3,
+        help="Full runs of the suite; each result is the median over runs",
+    )
+    parser.add_argument(
+        "--n-latency",
+        type=int,
+        default=1000,
+        help="Single-user recommend calls per p50/p99 latency sweep",
+    )
+    parser.add_argument(
+        "--k", type=int, default=DEFAULT_TOP_K, help="Recommendations per user"
+    )
+    parser.add_argument(
+        "--n-jobs", type=int, default=1, help="Worker processes for evaluation"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument(
+        "--approx-nprobe",
+        type=int,
+        default=APPROX_NPROBE,
+        help="Centroids probed per token by the approximate content index",
+    )
+    parser.add_argument(
+        "--approx-rescore",
+        type=int,
+        default=APPROX_SHORTLIST,
+        help="Candidates per item rescored exactly by the approximate content "
+        "index (recall is 1 for catalogs of at most this many items)",
+    )
+    parser.add_argument(
+        "--output", type=Path, default=None, help="JSON file for the results"
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=None,
+        help="Baseline results JSON to compare against (exit code 1 on regression)",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=BENCHMARK_TOLERANCE,
+        help="Relative slowdown allowed before a result counts as a regression "
+        "(benchmarks listed in BENCHMARK_TOLERANCES allow more)",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Write these results to --baseline instead of comparing",
+    )
+    args = parser.parse_args()
+
+    logger = get_logger(__name__)
+    scale = dict(BENCHMARK_SCALES[args.scale])
+    overrides = {
+        "n_users": args.n_users,
+        "n_items": args.n_items,
+        "density": args.density,
+        "tokens_per_item": args.tokens_per_item,
+        "dim": args.dim,
+    }
+    scale.update({name: v for name, v in overrides.items() if v is not None})
+
+    reports = []
+    for run in range(args.runs):
+        logger.info(f"Run {run + 1}/{args.runs}")
+        reports.append(
+            run_benchmarks(
+                scale,
+                svd_backend=args.svd_backend,
+                repeat=args.repeat,
+                n_latency=args.n_latency,
+                k=args.k,
+                n_jobs=args.n_jobs,
+                seed=args.seed,
+                approx_nprobe=args.approx_nprobe,
+                approx_rescore=args.approx_rescore,
+                log=logger.info,
+            )
+        )
+    report = median_results(reports)
+    for name, result in report["results"].items():
+        logger.info(f"{name}: {result['value']:.4f} {result['unit']}")
+
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Results saved to {args.output}")
+
+    if args.baseline is None:
+        return
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Baseline updated: {args.baseline}")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows = compare_results(report, baseline, tolerance=args.tolerance)
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else "ok"
+        logger.info(
+            f"{row['name']}: {row['baseline']:.4f} -> {row['current']:.4f} "
+            f"{row['unit']} (x{row['ratio']:.2f}, tolerance {row['tolerance']:.0%}) "
+            f"{flag}"
+        )
+    if any(row["regression"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import argparse
+from pathlib import Path
+
+from recommender.models.bundle import convert_legacy_artifacts, save_model_bundle
+from recommender.utils.logging import get_logger
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert pickle artifacts of older train.py runs into a model bundle."
+    )
+    parser.add_argument(
+        "--artifacts-dir",
+        type=Path,
+        required=True,
+        help="Directory containing trainset.pkl, testset.pkl, svd_model.pkl and "
+        "the content .npy artifacts or colbert_vecs.pkl",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        required=True,
+        help="Directory to write the model bundle",
+    )
+    args = parser.parse_args()
+
+    logger = get_logger(__name__)
+    logger.info(f"Loading legacy artifacts from {args.artifacts_dir}")
+    bundle = convert_legacy_artifacts(args.artifacts_dir)
+
+    save_model_bundle(args.output_dir, bundle)
+    logger.info(f"Model bundle saved in {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import argparse
+from pathlib import Path
+
+from recommender.data.cache import cached_interaction_matrix, cached_jokes
+from recommender.utils.logging import get_logger
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pre-convert Excel datasets into the on-disk cache used by training."
+    )
+    parser.add_argument(
+        "--interactions",
+        type=Path,
+        help="Path to interactions matrix (.xlsx)",
+    )
+    parser.add_argument(
+        "--jokes",
+        type=Path,
+        help="Path to jokes file (.xlsx)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Cache directory (default: .cache/ beside each source file)",
+    )
+    args = parser.parse_args()
+
+    logger = get_logger(__name__)
+    if args.interactions is None and args.jokes is None:
+        parser.error("nothing to convert: pass --interactions and/or --jokes")
+
+    if args.interactions is not None:
+        logger.info(f"Converting interaction matrix {args.interactions}")
+        matrix = cached_interaction_matrix(args.interactions, args.cache_dir)
+        logger.info(f"Cached {matrix.shape[0]} users x {matrix.shape[1]} items")
+
+    if args.jokes is not None:
+        logger.info(f"Converting jokes {args.jokes}")
+        jokes = cached_jokes(args.jokes, args.cache_dir)
+        logger.info(f"Cached {len(jokes)} jokes")
+
+
+if __name__ == "__main__":
+    main()
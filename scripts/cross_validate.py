@@ -0,0 +1,100 @@
+import argparse
+import json
+from pathlib import Path
+
+from recommender.config import DEFAULT_RANDOM_STATE, DEFAULT_TOP_K
+from recommender.evaluation.cross_validation import cross_validate
+from recommender.models.bundle import load_model_bundle
+from recommender.models.tuning import load_params, split_params
+from recommender.utils.logging import get_logger
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Cross-validate the hybrid recommender on all ratings of a "
+        "bundle and save per-fold metrics with their mean and std."
+    )
+    parser.add_argument(
+        "--artifacts-dir",
+        type=Path,
+        required=True,
+        help="Model bundle directory written by train.py (its content index is "
+        "reused; its train and test ratings are pooled and refolded)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        required=True,
+        help="Directory to save cv_folds.csv and cv_metrics.json",
+    )
+    parser.add_argument("--n-folds", type=int, default=5, help="Number of folds")
+    parser.add_argument(
+        "--params",
+        type=Path,
+        default=None,
+        help="JSON of SVD and hybrid parameters, e.g. best_config.json from "
+        "tune.py (default: the training defaults)",
+    )
+    parser.add_argument(
+        "--k",
+        type=int,
+        default=DEFAULT_TOP_K,
+        help="Cutoff for top-K metrics",
+    )
+    parser.add_argument(
+        "--n-jobs",
+        type=int,
+        default=-1,
+        help="Worker processes, at most one per fold (-1 uses all CPUs)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=DEFAULT_RANDOM_STATE,
+        help="Seed of the fold assignment and SVD fits",
+    )
+    args = parser.parse_args()
+
+    logger = get_logger(__name__)
+    params = {}
+    if args.params is not None:
+        try:
+            params = load_params(args.params)
+        except ValueError as e:
+            parser.error(str(e))
+    svd_params, hybrid_params = split_params(params)
+
+    logger.info("Loading model bundle...")
+    bundle = load_model_bundle(args.artifacts_dir)
+
+    per_fold, summary = cross_validate(
+        bundle.split.interactions,
+        bundle.content,
+        n_folds=args.n_folds,
+        svd_params=svd_params,
+        hybrid_params=hybrid_params,
+        k=args.k,
+        n_jobs=args.n_jobs,
+        seed=args.seed,
+        log=logger.info,
+    )
+
+    for name, stats in summary.items():
+        logger.info(f"{name}: {stats['mean']:.4f} +/- {stats['std']:.4f}")
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    folds_path = args.output_dir / "cv_folds.csv"
+    per_fold.to_csv(folds_path, index=False)
+    metrics_path = args.output_dir / "cv_metrics.json"
+    with open(metrics_path, "w") as f:
+        json.dump(
+            {"n_folds": args.n_folds, "params": params, "metrics": summary},
+            f,
+            indent=2,
+        )
+
+    logger.info(f"Per-fold metrics saved to {folds_path}, summary to {metrics_path}")
+
+
+if __name__ == "__main__":
+    main()
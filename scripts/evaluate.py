@@ -4,10 +4,9 @@ from pathlib import Path
 
 from recommender.config import DEFAULT_TOP_K
 from recommender.evaluation.evaluator import Evaluator
-from recommender.models.content import ContentBasedRecommender
-from recommender.models.hybrid import HybridRecommender
-from recommender.utils.io import load_pickle
+from recommender.models.bundle import build_hybrid, load_model_bundle
 from recommender.utils.logging import get_logger
+from recommender.utils.profiling import Profiler, stage
 
 
 def main():
@@ -18,7 +17,8 @@ def main():
         "--artifacts-dir",
         type=Path,
         required=True,
-        help="Directory containing trainset.pkl, testset.pkl, colbert_vecs.pkl, svd_model.pkl",
+        help="Model bundle directory written by train.py "
+        "(convert older pickle artifacts with convert_artifacts.py)",
     )
     parser.add_argument(
         "--output-dir",
@@ -32,22 +32,47 @@ def main():
         default=DEFAULT_TOP_K,
         help="Cutoff for top-K metrics",
     )
+    parser.add_argument(
+        "--n-jobs",
+        type=int,
+        default=1,
+        help="Worker processes for evaluation (-1 uses all CPUs)",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Check the bundle's checksums before evaluating",
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="Record each stage's peak Python memory in profile.json (slower)",
+    )
+    parser.add_argument(
+        "--cprofile-dir",
+        type=Path,
+        default=None,
+        help="Write a cProfile dump of every stage to this directory",
+    )
     args = parser.parse_args()
 
     logger = get_logger(__name__)
-    logger.info("Loading data splits and artifacts...")
-    trainset = load_pickle(args.artifacts_dir / "trainset.pkl")
-    testset = load_pickle(args.artifacts_dir / "testset.pkl")
-    colbert_vecs = load_pickle(args.artifacts_dir / "colbert_vecs.pkl")
-    svd_rec = load_pickle(args.artifacts_dir / "svd_model.pkl")
+    profiler = Profiler(
+        track_memory=args.profile_memory, cprofile_dir=args.cprofile_dir
+    )
+    with profiler:
+        logger.info("Loading model bundle...")
+        with stage("load"):
+            bundle = load_model_bundle(args.artifacts_dir, verify=args.verify)
+            trainset, testset = bundle.split.trainset, bundle.split.testset
 
-    logger.info("Instantiating recommenders...")
-    content_rec = ContentBasedRecommender(colbert_vecs)
-    hybrid_rec = HybridRecommender(content_rec, svd_rec)
+        logger.info("Instantiating recommenders...")
+        hybrid_rec = build_hybrid(bundle)
 
-    logger.info("Running evaluation...")
-    evaluator = Evaluator(hybrid_rec)
-    metrics = evaluator.evaluate(trainset, testset, k=args.k)
+        logger.info("Running evaluation...")
+        with stage("evaluate"):
+            evaluator = Evaluator(hybrid_rec, n_jobs=args.n_jobs)
+            metrics = evaluator.evaluate(trainset, testset, k=args.k)
 
     for name, val in metrics.items():
         logger.info(f"{name}: {val:.4f}")
@@ -57,7 +82,10 @@ def main():
     with open(metrics_path, "w") as f:
         json.dump(metrics, f, indent=2)
 
-    logger.info(f"All metrics saved to {metrics_path}")
+    profile_path = args.output_dir / "profile.json"
+    profiler.save(profile_path)
+
+    logger.info(f"All metrics saved to {metrics_path}, profile to {profile_path}")
 
 
 if __name__ == "__main__":
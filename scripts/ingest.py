@@ -0,0 +1,54 @@
+import argparse
+from pathlib import Path
+
+from recommender.config import INGEST_CHUNK_ROWS
+from recommender.data.stream import INGEST_LAYOUTS, LONG_COLUMNS, ingest_interactions
+from recommender.utils.logging import get_logger
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stream a CSV/Parquet ratings file into an on-disk interaction "
+        "store usable as train.py --interactions."
+    )
+    parser.add_argument(
+        "--source", type=Path, required=True, help="Ratings file (.csv or .parquet)"
+    )
+    parser.add_argument(
+        "--output-dir", type=Path, required=True, help="Interaction store directory"
+    )
+    parser.add_argument(
+        "--layout",
+        choices=INGEST_LAYOUTS,
+        default="wide",
+        help="wide: user rows x item columns (Jester matrix); long: one rating per row",
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=INGEST_CHUNK_ROWS,
+        help="Source rows read per chunk (bounds peak memory)",
+    )
+    parser.add_argument(
+        "--columns",
+        nargs=3,
+        default=list(LONG_COLUMNS),
+        metavar=("USER", "ITEM", "RATING"),
+        help="Column names of a long source",
+    )
+    args = parser.parse_args()
+
+    logger = get_logger(__name__)
+    logger.info(f"Ingesting {args.source} (layout={args.layout})")
+    interactions = ingest_interactions(
+        args.source, args.output_dir, args.layout, args.chunk_rows, args.columns
+    )
+    n_users, n_items = interactions.shape
+    logger.info(
+        f"Stored {interactions.nnz} ratings of {n_users} users x {n_items} items "
+        f"in {args.output_dir}"
+    )
+
+
+if __name__ == "__main__":
+    main()
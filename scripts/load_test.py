@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import aiohttp
+import numpy as np
+
+from recommender.config import DEFAULT_TOP_K, SERVE_PORT
+from recommender.utils.io import load_bundle
+from recommender.utils.logging import get_logger
+
+
+async def run_load(url, user_ids, n_requests, concurrency, k, seed):
+    """
+    Send n_requests recommend calls for random users from concurrency workers.
+
+    Returns:
+        per-request latencies in seconds, total wall time in seconds
+    """
+    rng = np.random.default_rng(seed)
+    users = rng.choice(user_ids, n_requests).tolist()
+    latencies = []
+
+    async with aiohttp.ClientSession() as session:
+
+        async def worker():
+            while users:
+                user_id = users.pop()
+                start = time.perf_counter()
+                params = {"user_id": str(user_id), "k": str(k)}
+                async with session.get(f"{url}/recommend", params=params) as resp:
+                    resp.raise_for_status()
+                    await resp.read()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+        async with session.get(f"{url}/stats") as resp:
+            stats = await resp.json()
+    return np.array(latencies), elapsed, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure recommendation latency of a running serve.py under load."
+    )
+    parser.add_argument(
+        "--artifacts-dir",
+        type=Path,
+        required=True,
+        help="Model bundle directory (test users are drawn from its split)",
+    )
+    parser.add_argument(
+        "--url", default=f"http://127.0.0.1:{SERVE_PORT}", help="Server base URL"
+    )
+    parser.add_argument("--requests", type=int, default=2000, help="Total requests")
+    parser.add_argument(
+        "--concurrency", type=int, default=32, help="Requests in flight at once"
+    )
+    parser.add_argument(
+        "--k", type=int, default=DEFAULT_TOP_K, help="Items per request"
+    )
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for users")
+    parser.add_argument(
+        "--active-users",
+        type=int,
+        default=None,
+        help="Draw requests from only this many users (a small, hot set)",
+    )
+    parser.add_argument(
+        "--output", type=Path, default=None, help="Optional JSON file for the results"
+    )
+    args = parser.parse_args()
+
+    logger = get_logger(__name__)
+    arrays, _ = load_bundle(args.artifacts_dir)
+    user_ids = np.asarray(arrays["split.user_ids"])
+    if args.active_users is not None:
+        user_ids = user_ids[: args.active_users]
+
+    latencies, elapsed, stats = asyncio.run(
+        run_load(args.url, user_ids, args.requests, args.concurrency, args.k, args.seed)
+    )
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) * 1000
+    results = {
+        "requests": len(latencies),
+        "concurrency": args.concurrency,
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": p50,
+        "p90_ms": p90,
+        "p99_ms": p99,
+        "server": stats,
+    }
+    logger.info(
+        f"{results['throughput_rps']:.1f} req/s, p50 {p50:.2f} ms, "
+        f"p90 {p90:.2f} ms, p99 {p99:.2f} ms, "
+        f"mean batch {stats['mean_batch_size']:.1f}"
+    )
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import argparse
+from pathlib import Path
+
+from aiohttp import web
+
+from recommender.config import (
+    RESULT_CACHE_SIZE,
+    SERVE_MAX_BATCH_SIZE,
+    SERVE_MAX_WAIT_MS,
+    SERVE_PORT,
+)
+from recommender.serving.app import create_app, load_hybrid
+from recommender.utils.logging import get_logger
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve hybrid recommendations from a model bundle over HTTP."
+    )
+    parser.add_argument(
+        "--artifacts-dir",
+        type=Path,
+        required=True,
+        help="Model bundle directory written by train.py",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind")
+    parser.add_argument("--port", type=int, default=SERVE_PORT, help="Port to bind")
+    parser.add_argument(
+        "--max-batch-size",
+        type=int,
+        default=SERVE_MAX_BATCH_SIZE,
+        help="Most requests scored in one batch",
+    )
+    parser.add_argument(
+        "--max-wait-ms",
+        type=float,
+        default=SERVE_MAX_WAIT_MS,
+        help="Longest a request waits for its batch to fill",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=RESULT_CACHE_SIZE,
+        help="Rankings kept in the per-user result cache (0 disables it)",
+    )
+    args = parser.parse_args()
+
+    logger = get_logger(__name__)
+    logger.info(f"Loading model bundle from {args.artifacts_dir}")
+    recommender = load_hybrid(args.artifacts_dir)
+
+    app = create_app(
+        recommender, args.max_batch_size, args.max_wait_ms, args.cache_size
+    )
+    logger.info(f"Serving on http://{args.host}:{args.port}")
+    web.run_app(app, host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
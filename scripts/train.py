@@ -2,12 +2,19 @@ import argparse
 import logging
 from pathlib import Path
 
+from recommender.config import EMBEDDING_CACHE_DIRNAME
+from recommender.data.cache import default_cache_dir
 from recommender.data.loader import load_interactions, load_jokes
-from recommender.data.splitter import train_test_split
+from recommender.data.splitter import SPLIT_MODES, split_indices
 from recommender.embeddings.colbert import ColbertEmbedder
+from recommender.embeddings.ragged import RAGGED_DTYPES, RaggedVectors
+from recommender.models.bundle import ModelBundle, save_model_bundle
+from recommender.models.content import ContentBasedRecommender
+from recommender.models.factorization import FACTORIZATION_METHODS
 from recommender.models.svd import SVDRecommender
-from recommender.utils.io import save_pickle
+from recommender.models.tuning import load_params, split_params
 from recommender.utils.logging import get_logger
+from recommender.utils.profiling import Profiler, stage
 
 
 def main():
@@ -18,7 +25,8 @@ def main():
         "--interactions",
         type=Path,
         required=True,
-        help="Path to interactions matrix (.xlsx)",
+        help="Path to interactions matrix (.xlsx) or an interaction store "
+        "directory written by ingest.py",
     )
     parser.add_argument(
         "--jokes",
@@ -30,7 +38,7 @@ def main():
         "--output-dir",
         type=Path,
         required=True,
-        help="Directory to save trained artifacts and splits",
+        help="Directory to save the model bundle (models, splits, vectors)",
     )
     parser.add_argument(
         "--test-size",
@@ -42,39 +50,171 @@ def main():
         "--seed",
         type=int,
         default=42,
-        help="Random seed for reproducible splitting",
+        help="Random seed for reproducible splitting and model training",
+    )
+    parser.add_argument(
+        "--split-mode",
+        choices=SPLIT_MODES,
+        default="random",
+        help="random: hold out ratings globally; user: per-user fraction; "
+        "leave_k_out: k ratings per user",
+    )
+    parser.add_argument(
+        "--leave-k",
+        type=int,
+        default=1,
+        help="Ratings held out per user with --split-mode leave_k_out",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always parse the Excel sources and encode every joke instead of "
+        "using the converted-data and embedding caches",
+    )
+    parser.add_argument(
+        "--embedding-cache",
+        type=Path,
+        default=None,
+        help="ColBERT embedding cache directory "
+        "(default: a cache folder beside the jokes file)",
+    )
+    parser.add_argument(
+        "--embedding-dtype",
+        choices=RAGGED_DTYPES,
+        default="float16",
+        help="Storage precision of the saved ColBERT token vectors "
+        "(int8 stores one scale per token)",
+    )
+    parser.add_argument(
+        "--content-mode",
+        choices=("exact", "approx", "cascade"),
+        default="exact",
+        help="exact: full MaxSim score matrix; approx: centroid-compressed "
+        "MaxSim neighbors only; cascade: dense-vector shortlist rescored with "
+        "MaxSim (both for large catalogs)",
+    )
+    parser.add_argument(
+        "--svd-backend",
+        choices=("surprise",) + FACTORIZATION_METHODS,
+        default="surprise",
+        help="Matrix factorization trainer: surprise's SVD or in-package ALS/SGD",
+    )
+    parser.add_argument(
+        "--params",
+        type=Path,
+        default=None,
+        help="JSON of SVD and hybrid parameters, e.g. best_config.json from "
+        "tune.py; its values override the defaults and --svd-backend, and its "
+        "hybrid parameters are saved in the bundle for evaluate.py and serve.py",
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="Record each stage's peak Python memory in profile.json (slower)",
+    )
+    parser.add_argument(
+        "--cprofile-dir",
+        type=Path,
+        default=None,
+        help="Write a cProfile dump of every stage to this directory",
     )
     args = parser.parse_args()
+    params = {}
+    if args.params is not None:
+        try:
+            params = load_params(args.params)
+        except ValueError as e:
+            parser.error(str(e))
+    args.svd_params, args.hybrid_params = split_params(params)
 
     logger = get_logger(__name__)
     args.output_dir.mkdir(parents=True, exist_ok=True)
 
+    profiler = Profiler(
+        track_memory=args.profile_memory, cprofile_dir=args.cprofile_dir
+    )
+    with profiler:
+        train(args, logger)
+    profiler.save(args.output_dir / "profile.json")
+
+    logger.info(f"All artifacts saved in {args.output_dir}")
+
+
+def train(args, logger):
+    """
+    Run the training pipeline, one profiler stage per step.
+    """
     logger.info("Loading interaction matrix and jokes metadata")
-    interactions = load_interactions(args.interactions)
-    jokes = load_jokes(args.jokes)
+    with stage("load"):
+        interactions = load_interactions(
+            args.interactions, use_cache=not args.no_cache, sparse=True
+        )
+        jokes = load_jokes(args.jokes, use_cache=not args.no_cache)
 
-    logger.info(f"Splitting data: test_size={args.test_size}, seed={args.seed}")
-    trainset, testset = train_test_split(
-        interactions,
-        test_size=args.test_size,
-        seed=args.seed,
+    logger.info(
+        f"Splitting data: mode={args.split_mode}, test_size={args.test_size}, "
+        f"seed={args.seed}"
     )
+    with stage("split"):
+        split = split_indices(
+            interactions,
+            mode=args.split_mode,
+            test_size=args.test_size,
+            k=args.leave_k,
+            seed=args.seed,
+        )
+        trainset = split.trainset
 
-    logger.info("Training ColBERT embedder")
-    embedder = ColbertEmbedder()
-    colbert_vecs = embedder.fit_transform(jokes.text.tolist())
-    save_pickle(colbert_vecs, args.output_dir / "colbert_vecs.pkl")
+    embedding_cache = None
+    if not args.no_cache:
+        embedding_cache = args.embedding_cache or (
+            default_cache_dir(args.jokes) / EMBEDDING_CACHE_DIRNAME
+        )
+    logger.info(f"Training ColBERT embedder (cache={embedding_cache})")
+    with stage("embed"):
+        embedder = ColbertEmbedder(
+            cache_dir=embedding_cache, return_dense=args.content_mode == "cascade"
+        )
+        colbert_vecs = embedder.fit_transform(jokes.text.tolist())
 
-    logger.info("Training SVD model")
-    svd_rec = SVDRecommender(n_factors=5, n_epochs=5, lr_all=0.02, reg_all=0.03)
-    svd_rec.fit(trainset)
-    save_pickle(svd_rec, args.output_dir / "svd_model.pkl")
+    logger.info(f"Building content neighbor index (mode={args.content_mode})")
+    with stage("content_index"):
+        if args.content_mode == "approx":
+            content_rec = ContentBasedRecommender.approximate(
+                colbert_vecs, seed=args.seed
+            )
+        elif args.content_mode == "cascade":
+            content_rec = ContentBasedRecommender.cascade(
+                colbert_vecs, embedder.dense_vecs
+            )
+        else:
+            content_rec = ContentBasedRecommender(colbert_vecs)
 
-    logger.info("Saving data splits")
-    save_pickle(trainset, args.output_dir / "trainset.pkl")
-    save_pickle(testset, args.output_dir / "testset.pkl")
+    svd_params = {
+        "n_factors": 5,
+        "n_epochs": 5,
+        "lr_all": 0.02,
+        "reg_all": 0.03,
+        "backend": args.svd_backend,
+        **args.svd_params,
+    }
+    logger.info(f"Training SVD model ({svd_params})")
+    with stage("svd_fit"):
+        svd_rec = SVDRecommender(**svd_params, seed=args.seed)
+        svd_rec.fit(trainset)
 
-    logger.info(f"All artifacts saved in {args.output_dir}")
+    logger.info("Saving model bundle")
+    with stage("save"):
+        bundle = ModelBundle(
+            svd=svd_rec,
+            content=content_rec,
+            split=split,
+            colbert_vecs=RaggedVectors.from_list(
+                colbert_vecs, dtype=args.embedding_dtype
+            ),
+            hybrid_params=args.hybrid_params,
+        )
+        save_model_bundle(args.output_dir, bundle)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,161 @@
+import argparse
+import json
+from pathlib import Path
+
+from recommender.config import (
+    DEFAULT_TOP_K,
+    TUNE_KEEP_FRACTION,
+    TUNE_SLICE_FRACTION,
+    TUNE_VALIDATION_SIZE,
+)
+from recommender.models.bundle import load_model_bundle
+from recommender.models.tuning import (
+    DEFAULT_SEARCH_SPACE,
+    HYBRID_PARAMS,
+    SVD_PARAMS,
+    grid_configs,
+    random_configs,
+    tune,
+)
+from recommender.utils.logging import get_logger
+
+
+def load_space(path: Path) -> dict:
+    """
+    Read a search space JSON: name -> list of values, or for random search
+    name -> {"low": ..., "high": ...} for a continuous range.
+    """
+    with open(path) as f:
+        space = json.load(f)
+    return {
+        name: (values["low"], values["high"]) if isinstance(values, dict) else values
+        for name, values in space.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Search SVD and hybrid hyperparameters on a validation split "
+        "of a bundle's train ratings and save a ranked results table."
+    )
+    parser.add_argument(
+        "--artifacts-dir",
+        type=Path,
+        required=True,
+        help="Model bundle directory written by train.py (its content model and "
+        "train ratings are used; test ratings are never read)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        required=True,
+        help="Directory to save tuning_results.csv and best_config.json",
+    )
+    parser.add_argument(
+        "--search",
+        choices=("grid", "random"),
+        default="grid",
+        help="Try every combination of the space, or --n-configs random ones",
+    )
+    parser.add_argument(
+        "--n-configs",
+        type=int,
+        default=100,
+        help="Configurations sampled with --search random",
+    )
+    parser.add_argument(
+        "--space",
+        type=Path,
+        default=None,
+        help="Search space JSON (default: a grid around train.py's settings); "
+        f"keys among {', '.join(SVD_PARAMS + HYBRID_PARAMS)}",
+    )
+    parser.add_argument(
+        "--metric",
+        default="ndcg@k",
+        help="Evaluator metric to rank by (mae is minimized, others maximized)",
+    )
+    parser.add_argument(
+        "--k",
+        type=int,
+        default=DEFAULT_TOP_K,
+        help="Cutoff for top-K metrics",
+    )
+    parser.add_argument(
+        "--validation-size",
+        type=float,
+        default=TUNE_VALIDATION_SIZE,
+        help="Fraction of train ratings held out for validation",
+    )
+    parser.add_argument(
+        "--slice-fraction",
+        type=float,
+        default=TUNE_SLICE_FRACTION,
+        help="Fraction of validation users every configuration is first scored on",
+    )
+    parser.add_argument(
+        "--keep-fraction",
+        type=float,
+        default=TUNE_KEEP_FRACTION,
+        help="Fraction of configurations rescored on all validation users",
+    )
+    parser.add_argument(
+        "--n-jobs",
+        type=int,
+        default=-1,
+        help="Worker processes (-1 uses all CPUs)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    logger = get_logger(__name__)
+    space = load_space(args.space) if args.space else DEFAULT_SEARCH_SPACE
+    unknown = set(space) - set(SVD_PARAMS + HYBRID_PARAMS)
+    if unknown:
+        parser.error(f"Unknown parameters in --space: {', '.join(sorted(unknown))}")
+    if args.search == "grid":
+        configs = grid_configs(space)
+    else:
+        configs = random_configs(space, args.n_configs, seed=args.seed)
+    logger.info(f"{len(configs)} configurations to try")
+
+    logger.info("Loading model bundle...")
+    bundle = load_model_bundle(args.artifacts_dir)
+
+    results = tune(
+        bundle.split,
+        bundle.content,
+        configs,
+        metric=args.metric,
+        k=args.k,
+        validation_size=args.validation_size,
+        slice_fraction=args.slice_fraction,
+        keep_fraction=args.keep_fraction,
+        n_jobs=args.n_jobs,
+        seed=args.seed,
+        log=logger.info,
+    )
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    results_path = args.output_dir / "tuning_results.csv"
+    results.to_csv(results_path, index=False)
+
+    best = results.iloc[0]
+    best_config = {
+        name: best[name].item() if hasattr(best[name], "item") else best[name]
+        for name in space
+    }
+    best_path = args.output_dir / "best_config.json"
+    with open(best_path, "w") as f:
+        json.dump(
+            {"params": best_config, "metric": args.metric, "value": best[args.metric]},
+            f,
+            indent=2,
+        )
+
+    logger.info(f"Best {args.metric}: {best[args.metric]:.4f} with {best_config}")
+    logger.info(f"Results saved to {results_path}, best configuration to {best_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 from .config import *
 
 __all__ = [
+    "benchmarks",
     "config",
     "data",
     "embeddings",
     "models",
     "evaluation",
+    "serving",
     "utils",
 ]
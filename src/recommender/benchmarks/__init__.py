@@ -0,0 +1,11 @@
+from .suite import BENCHMARK_SCALES, compare_results, median_results, run_benchmarks
+from .synthetic import synthetic_interactions, synthetic_token_vectors
+
+__all__ = [
+    "BENCHMARK_SCALES",
+    "run_benchmarks",
+    "compare_results",
+    "median_results",
+    "synthetic_interactions",
+    "synthetic_token_vectors",
+]
@@ -0,0 +1,296 @@
+"""
+Timing benchmarks of the training, indexing, serving and evaluation paths on
+synthetic data, and comparison of their results against a stored baseline.
+
+Every benchmark reports one headline value with a unit and a direction
+("lower" or "higher" is better); compare_results flags values that moved the
+wrong way by more than a relative tolerance.
+"""
+
+import os
+import platform
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from ..config import (
+    APPROX_NPROBE,
+    APPROX_SHORTLIST,
+    BENCHMARK_MIN_SECONDS,
+    BENCHMARK_TOLERANCE,
+    BENCHMARK_TOLERANCES,
+    DEFAULT_TOP_K,
+)
+from ..data.splitter import split_indices
+from ..embeddings.approx import neighbor_recall
+from ..evaluation.evaluator import Evaluator
+from ..models.content import ContentBasedRecommender
+from ..models.hybrid import HybridRecommender
+from ..models.svd import SVDRecommender
+from .synthetic import synthetic_interactions, synthetic_token_vectors
+
+# Synthetic data sizes; "jester" matches Jester-2 (59k users x 150 jokes)
+BENCHMARK_SCALES: Dict[str, Dict[str, Any]] = {
+    "small": dict(n_users=2000, n_items=100, density=0.3, tokens_per_item=32, dim=128),
+    "medium": dict(
+        n_users=20000, n_items=150, density=0.25, tokens_per_item=48, dim=256
+    ),
+    "jester": dict(
+        n_users=59132, n_items=150, density=0.2, tokens_per_item=64, dim=1024
+    ),
+}
+
+# neighbors per item compared by the approximate index recall benchmark
+RECALL_AT = 10
+
+
+def _calls(fn: Callable[[], Any], min_seconds: float) -> int:
+    """
+    Calls of fn that fill min_seconds, calibrated on one (warm-up) call.
+    """
+    start = time.perf_counter()
+    fn()
+    first = time.perf_counter() - start
+    return max(1, int(np.ceil(min_seconds / first))) if first > 0 else 1
+
+
+def _sample(fn: Callable[[], Any], calls: int) -> float:
+    """
+    Seconds per call of fn, averaged over calls back-to-back calls.
+    """
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+
+def _latency_sweep(recommend: Callable[[Any], Any], users: List[Any]) -> np.ndarray:
+    """
+    p50 and p99 in milliseconds of one recommend call per user.
+    """
+    latencies = np.empty(len(users))
+    for i, user_id in enumerate(users):
+        start = time.perf_counter()
+        recommend(user_id)
+        latencies[i] = time.perf_counter() - start
+    return np.percentile(latencies, [50, 99]) * 1000
+
+
+def _result(value: float, unit: str, better: str, **extra) -> Dict[str, Any]:
+    return {"value": float(value), "unit": unit, "better": better, **extra}
+
+
+def _seconds(samples: List[float]) -> Dict[str, Any]:
+    # the fastest run is the least disturbed by other load on the machine
+    return _result(min(samples), "s", "lower", median=float(np.median(samples)))
+
+
+def environment() -> Dict[str, Any]:
+    """
+    Machine and library versions a result was measured with.
+    """
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_benchmarks(
+    scale: Dict[str, Any],
+    svd_backend: str = "surprise",
+    repeat: int = 5,
+    n_latency: int = 1000,
+    k: int = DEFAULT_TOP_K,
+    n_jobs: int = 1,
+    seed: int = 0,
+    approx_nprobe: int = APPROX_NPROBE,
+    approx_rescore: int = APPROX_SHORTLIST,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Time each stage of the pipeline on synthetic data of the given scale.
+
+    Parameters:
+        scale: synthetic data sizes (n_users, n_items, density,
+            tokens_per_item, dim), e.g. a BENCHMARK_SCALES entry
+        svd_backend: SVDRecommender backend to fit
+        repeat: rounds; each round takes one sample of every timed stage (the
+            fastest is reported) and one latency sweep (the median of the
+            sweeps' percentiles is reported)
+        n_latency: single-user recommend calls per latency sweep
+        k: recommendations per user
+        n_jobs: Evaluator worker processes
+        seed: random state of the data, split and user sample
+        approx_nprobe, approx_rescore: nprobe and n_rescore of the approximate
+            content index, whose build time and recall@RECALL_AT against the
+            exact index are reported (the recall only drops below 1 for
+            catalogs larger than approx_rescore items)
+        log: optional callable receiving progress messages
+
+    Returns:
+        {"environment", "config", "results"} where results maps benchmark
+        name to {"value", "unit", "better", ...}
+    """
+    log = log or (lambda message: None)
+    results: Dict[str, Dict[str, Any]] = {}
+
+    log(f"Generating synthetic data: {scale}")
+    interactions = synthetic_interactions(
+        scale["n_users"], scale["n_items"], scale["density"], seed=seed
+    )
+    colbert_vecs = synthetic_token_vectors(
+        scale["n_items"], scale["tokens_per_item"], scale["dim"], seed=seed
+    )
+    split = split_indices(interactions, "random", seed=seed)
+    trainset, testset = split.trainset, split.testset
+
+    log(f"Building models (svd backend={svd_backend})")
+    svd_rec = SVDRecommender(
+        n_factors=5,
+        n_epochs=5,
+        lr_all=0.02,
+        reg_all=0.03,
+        backend=svd_backend,
+        seed=seed,
+    )
+    svd_rec.fit(trainset)
+    content_rec = ContentBasedRecommender(colbert_vecs)
+
+    def build_approx() -> ContentBasedRecommender:
+        return ContentBasedRecommender.approximate(
+            colbert_vecs, nprobe=approx_nprobe, n_rescore=approx_rescore, seed=seed
+        )
+
+    # recall of the exact top-n neighbors at the hybrid's default n_similar
+    recall = neighbor_recall(
+        build_approx().neighbor_indices, content_rec.neighbor_indices, RECALL_AT
+    )
+
+    hybrid = HybridRecommender(content_rec, svd_rec)
+    content_rec.fit(trainset)
+    hybrid.user_interactions = content_rec.user_interactions
+    users = list(hybrid.user_interactions)
+    evaluator = Evaluator(hybrid, n_jobs=n_jobs)
+    rng = np.random.default_rng(seed)
+    sample = [users[i] for i in rng.integers(len(users), size=n_latency)]
+
+    stages: Dict[str, Callable[[], Any]] = {
+        "svd_fit": lambda: svd_rec.fit(trainset),
+        "content_index": lambda: ContentBasedRecommender(colbert_vecs),
+        "content_approx_index": build_approx,
+        "recommend_many": lambda: hybrid.recommend_many(users, k),
+        "evaluate": lambda: evaluator.evaluate(trainset, testset, k=k),
+    }
+    log("Calibrating stage timings")
+    calls = {name: _calls(fn, BENCHMARK_MIN_SECONDS) for name, fn in stages.items()}
+    _latency_sweep(lambda user_id: hybrid.recommend(user_id, k), sample)  # warm-up
+
+    # rounds interleave the stages, so each stage's samples are spread over
+    # the whole run instead of sharing one (possibly slow) stretch of it
+    samples: Dict[str, List[float]] = {name: [] for name in stages}
+    sweeps = []
+    for round_ in range(repeat):
+        log(f"Round {round_ + 1}/{repeat}: {', '.join(stages)}, latency sweep")
+        for name, fn in stages.items():
+            samples[name].append(_sample(fn, calls[name]))
+        sweeps.append(
+            _latency_sweep(lambda user_id: hybrid.recommend(user_id, k), sample)
+        )
+
+    for name in ("svd_fit", "content_index", "content_approx_index"):
+        results[name] = _seconds(samples[name])
+    results[f"content_approx_recall@{RECALL_AT}"] = _result(
+        recall, "fraction", "higher"
+    )
+    # the median over rounds of each sweep's percentiles, so one disturbed
+    # sweep (or a few slow calls in one) does not move the result
+    p50, p99 = np.median(sweeps, axis=0)
+    results["recommend_p50"] = _result(p50, "ms", "lower")
+    results["recommend_p99"] = _result(p99, "ms", "lower")
+    results["recommend_many_throughput"] = _result(
+        len(users) / min(samples["recommend_many"]),
+        "users/s",
+        "higher",
+        n_users=len(users),
+    )
+    results["evaluate"] = _seconds(samples["evaluate"])
+
+    return {
+        "environment": environment(),
+        "config": {
+            "scale": dict(scale),
+            "svd_backend": svd_backend,
+            "repeat": repeat,
+            "n_latency": n_latency,
+            "k": k,
+            "n_jobs": n_jobs,
+            "seed": seed,
+            "approx_nprobe": approx_nprobe,
+            "approx_rescore": approx_rescore,
+        },
+        "results": results,
+    }
+
+
+def median_results(reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine run_benchmarks reports of the same config into one whose values
+    are the per-benchmark medians, so one run made in an unusually slow or
+    fast stretch (shared hosts, frequency scaling) does not set the result.
+    """
+    combined = dict(reports[0], results={}, runs=len(reports))
+    for name, result in reports[0]["results"].items():
+        values = [report["results"][name]["value"] for report in reports]
+        combined["results"][name] = dict(
+            result, value=float(np.median(values)), values=values
+        )
+    return combined
+
+
+def compare_results(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = BENCHMARK_TOLERANCE,
+    tolerances: Optional[Dict[str, float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Compare benchmark results with a baseline run of the same config.
+
+    Returns one row per benchmark present in both runs with the baseline and
+    current values, their ratio (current / baseline), and whether the change
+    is a regression: worse, in the benchmark's direction, by more than its
+    tolerance (a fraction of the baseline value): the larger of tolerance and
+    tolerances[name] (default: BENCHMARK_TOLERANCES).
+    """
+    tolerances = BENCHMARK_TOLERANCES if tolerances is None else tolerances
+    if current.get("config") != baseline.get("config"):
+        raise ValueError(
+            "Benchmark configs differ; rerun the baseline with the same options."
+        )
+    rows = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        before, after = baseline["results"][name]["value"], result["value"]
+        ratio = after / before if before else float("inf")
+        allowed = max(tolerance, tolerances.get(name, tolerance))
+        if result["better"] == "lower":
+            regression = ratio > 1.0 + allowed
+        else:
+            regression = ratio < 1.0 - allowed
+        rows.append(
+            {
+                "name": name,
+                "unit": result["unit"],
+                "baseline": before,
+                "current": after,
+                "ratio": ratio,
+                "tolerance": allowed,
+                "regression": bool(regression),
+            }
+        )
+    return rows
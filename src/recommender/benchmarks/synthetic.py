@@ -0,0 +1,107 @@
+"""
+Seeded synthetic data shaped like Jester: a sparse rating matrix on the
+preprocessed [RATING_MIN, RATING_MAX] scale and a catalog of per-item ColBERT
+token vectors. Used by benchmarks, where the real data is too small (or not
+available) to show how the code scales.
+"""
+
+import numpy as np
+import scipy.sparse as sp
+
+from ..config import RATING_MAX, RATING_MIN
+from ..data.interactions import SparseInteractions
+from ..embeddings.ragged import RaggedVectors
+
+
+def synthetic_interactions(
+    n_users: int,
+    n_items: int,
+    density: float,
+    n_factors: int = 5,
+    noise: float = 0.1,
+    seed: int = 0,
+    chunk_size: int = 4096,
+) -> SparseInteractions:
+    """
+    Low-rank ratings observed at a given density.
+
+    Each user rates a Poisson-distributed number of items (mean density *
+    n_items, at least one) chosen with a popularity skew, like Jester's few
+    universally rated jokes. Ratings are a user-item factor product plus
+    Gaussian noise, squashed onto the rating scale.
+
+    Parameters:
+        n_users: rows of the matrix
+        n_items: columns of the matrix
+        density: expected fraction of observed ratings
+        n_factors: rank of the underlying preference model
+        noise: standard deviation of the rating noise
+        seed: random state
+        chunk_size: users sampled at a time (bounds the dense scratch memory)
+    """
+    rng = np.random.default_rng(seed)
+    counts = np.clip(rng.poisson(density * n_items, n_users), 1, n_items)
+    popularity = rng.zipf(1.5, n_items).astype(np.float64)
+    rows = np.repeat(np.arange(n_users), counts)
+    cols = []
+    for start in range(0, n_users, chunk_size):
+        n = counts[start : start + chunk_size]
+        keys = rng.random((len(n), n_items)) ** (1.0 / popularity)
+        # each row's n largest keys: weighted sampling without replacement
+        chosen = np.argsort(-keys, axis=1)
+        mask = np.arange(n_items)[None, :] < n[:, None]
+        cols.append(np.sort(np.where(mask, chosen, n_items), axis=1)[mask])
+    cols = np.concatenate(cols)
+
+    pu = rng.normal(0.0, 1.0 / np.sqrt(n_factors), (n_users, n_factors))
+    qi = rng.normal(0.0, 1.0, (n_items, n_factors))
+    bi = rng.normal(0.0, 0.5, n_items)
+    logits = np.einsum("ij,ij->i", pu[rows], qi[cols]) + bi[cols]
+    logits += rng.normal(0.0, noise, len(rows))
+    ratings = RATING_MIN + (RATING_MAX - RATING_MIN) / (1.0 + np.exp(-logits))
+
+    matrix = sp.csr_matrix(
+        (
+            ratings.astype(np.float32),
+            cols.astype(np.int32),
+            np.r_[0, np.cumsum(counts)],
+        ),
+        shape=(n_users, n_items),
+    )
+    return SparseInteractions(matrix)
+
+
+def synthetic_token_vectors(
+    n_items: int,
+    tokens_per_item: int,
+    dim: int,
+    n_topics: int = 16,
+    dtype: str = "float32",
+    seed: int = 0,
+) -> RaggedVectors:
+    """
+    Ragged catalog of unit-norm token vectors grouped into topics.
+
+    Item i has a Poisson number of tokens (mean tokens_per_item, at least one),
+    each a noisy copy of one of its topic's directions, so MaxSim neighbors are
+    clustered the way real texts on similar subjects are.
+
+    Parameters:
+        n_items: texts in the catalog
+        tokens_per_item: mean tokens per text
+        dim: token vector dimension
+        n_topics: number of topic clusters
+        dtype: token storage dtype (see RAGGED_DTYPES)
+        seed: random state
+    """
+    rng = np.random.default_rng(seed)
+    lengths = np.maximum(rng.poisson(tokens_per_item, n_items), 1)
+    centers = rng.normal(size=(n_topics, 8, dim)).astype(np.float32)
+    topic = np.repeat(rng.integers(n_topics, size=n_items), lengths)
+    direction = rng.integers(8, size=len(topic))
+    tokens = centers[topic, direction] + rng.normal(0.0, 0.5, (len(topic), dim)).astype(
+        np.float32
+    )
+    tokens /= np.linalg.norm(tokens, axis=1, keepdims=True)
+    offsets = np.r_[0, np.cumsum(lengths)].astype(np.int64)
+    return RaggedVectors.from_list(np.split(tokens, offsets[1:-1]), dtype=dtype)
@@ -2,6 +2,9 @@
 RATING_MIN = 0.0
 RATING_MAX = 1.0
 
+# Raw Jester ratings: [-10, 10], with 99 marking a missing rating
+MISSING_RATING = 99
+
 # Data splitting
 DEFAULT_TEST_SIZE = 0.2
 DEFAULT_RANDOM_STATE = 42
@@ -11,3 +14,67 @@ DEFAULT_TOP_K = 20
 
 # Logging format
 LOG_FORMAT = "%(asctime)s %(levelname)s %(message)s"
+
+# ColBERT MaxSim scoring
+MAXSIM_BLOCK_SIZE = 32
+
+# Content neighbor index
+CONTENT_MAX_NEIGHBORS = 100
+
+# Approximate (centroid) MaxSim neighbors: centroids probed per query token,
+# candidates rescored exactly per item, and k-means fitting
+APPROX_NPROBE = 4
+APPROX_SHORTLIST = 256
+APPROX_KMEANS_ITERS = 10
+APPROX_KMEANS_SAMPLE = 1 << 16
+
+# Cascade content neighbors: dense-vector candidates rescored with MaxSim per item
+CASCADE_SHORTLIST = 256
+
+# In-package ALS: conjugate gradient steps per row solve (warm-started from
+# the previous epoch) and ratings per solve block. A side with at most
+# ALS_DENSE_RATIO (row, column) pairs per rating is solved with dense
+# matmuls, in blocks of about ALS_BLOCK_ENTRIES pairs.
+ALS_CG_STEPS = 3
+ALS_BLOCK_RATINGS = 1 << 16
+ALS_DENSE_RATIO = 16
+ALS_BLOCK_ENTRIES = 1 << 22
+
+# Batched recommendation
+RECOMMEND_BATCH_SIZE = 1024
+
+# Evaluation sharding (users per shard; shard sums are merged in order)
+EVAL_SHARD_SIZE = 256
+
+# Converted-data cache (directory created beside each source file)
+DATA_CACHE_DIRNAME = ".cache"
+
+# ColBERT embedding cache (subdirectory of the jokes file's data cache)
+EMBEDDING_CACHE_DIRNAME = "colbert"
+
+# Online serving: requests are scored in micro-batches of up to this many
+# users, waiting at most this long for a batch to fill
+SERVE_MAX_BATCH_SIZE = 64
+SERVE_MAX_WAIT_MS = 5.0
+SERVE_PORT = 8080
+
+# Serving result cache: most (user_id, k) rankings kept before LRU eviction
+RESULT_CACHE_SIZE = 100_000
+
+# Benchmarks: a result this much worse than its baseline (relative) is a
+# regression; tail latency and the small-scale SVD fit (tens of milliseconds,
+# allocation-heavy) get wider per-benchmark tolerances
+BENCHMARK_TOLERANCE = 0.2
+BENCHMARK_TOLERANCES = {"recommend_p99": 0.5, "svd_fit": 0.35}
+# each timing sample repeats its stage until it has run this long
+BENCHMARK_MIN_SECONDS = 0.2
+
+# Streaming ingestion: source rows read (and ratings converted) per chunk
+INGEST_CHUNK_ROWS = 50_000
+
+# Hyperparameter search: fraction of train ratings held out for validation,
+# fraction of validation users every configuration is first scored on, and
+# fraction of configurations promoted to the full validation set
+TUNE_VALIDATION_SIZE = 0.2
+TUNE_SLICE_FRACTION = 0.25
+TUNE_KEEP_FRACTION = 0.25
@@ -1,11 +1,29 @@
+from .interactions import SparseInteractions
 from .loader import load_interactions, load_jokes
 from .preprocess import preprocess_interactions, preprocess_jokes
-from .splitter import train_test_split
+from .splitter import (
+    RatingSplit,
+    kfold_indices,
+    split_indices,
+    split_interactions,
+    train_test_split,
+)
+from .store import InteractionStoreWriter, load_interaction_store
+from .stream import ingest_interactions, read_rating_chunks
 
 __all__ = [
+    "SparseInteractions",
     "load_interactions",
     "load_jokes",
     "train_test_split",
+    "split_interactions",
+    "split_indices",
+    "kfold_indices",
+    "RatingSplit",
     "preprocess_interactions",
     "preprocess_jokes",
+    "InteractionStoreWriter",
+    "load_interaction_store",
+    "ingest_interactions",
+    "read_rating_chunks",
 ]
@@ -0,0 +1,149 @@
+"""
+On-disk cache of converted source files (e.g. Excel -> .npy / Parquet).
+
+A cached copy is keyed by the source's content hash. A small JSON manifest
+next to it records the source's size and mtime, so an unchanged file is
+recognised without re-hashing; a touched but identical file is re-hashed once
+and then reuses the existing copy.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Callable, Optional, TypeVar
+
+import numpy as np
+import pandas as pd
+
+from ..config import DATA_CACHE_DIRNAME
+
+T = TypeVar("T")
+
+
+def content_hash(path: Path, chunk_size: int = 1 << 20) -> str:
+    """
+    Return the SHA-256 hex digest of a file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def default_cache_dir(source: Path) -> Path:
+    """
+    Cache directory used when none is given: a hidden folder beside the source.
+    """
+    return Path(source).parent / DATA_CACHE_DIRNAME
+
+
+def cached_convert(
+    source: Path,
+    suffix: str,
+    convert: Callable[[Path], T],
+    save: Callable[[T, Path], None],
+    load: Callable[[Path], T],
+    cache_dir: Optional[Path] = None,
+) -> T:
+    """
+    Return convert(source), reusing a cached copy when the source is unchanged.
+
+    Parameters:
+        source: file to convert
+        suffix: extension of the cached copy (e.g. ".npy")
+        convert: reads the source into the object to cache
+        save: writes that object to a path
+        load: reads it back from a path
+        cache_dir: where cached copies live (default: default_cache_dir)
+    """
+    source = Path(source)
+    cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir(source)
+    manifest_path = cache_dir / f"{source.name}{suffix}.json"
+    stat = source.stat()
+
+    manifest = {}
+    if manifest_path.exists():
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    cached = cache_dir / manifest.get("file", "")
+    if (
+        manifest.get("size") == stat.st_size
+        and manifest.get("mtime_ns") == stat.st_mtime_ns
+        and cached.is_file()
+    ):
+        return load(cached)
+
+    digest = content_hash(source)
+    cached = cache_dir / f"{source.stem}-{digest[:16]}{suffix}"
+    if cached.is_file():
+        obj = load(cached)
+    else:
+        obj = convert(source)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # write under a temporary name so readers never see a partial file
+        tmp = cached.with_name(f".{cached.stem}.tmp{suffix}")
+        save(obj, tmp)
+        os.replace(tmp, cached)
+
+    manifest = {
+        "source": source.name,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": digest,
+        "file": cached.name,
+    }
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return obj
+
+
+def read_excel_matrix(path: Path) -> np.ndarray:
+    """
+    Read an Excel interaction matrix, dropping the first column (row IDs).
+    """
+    df = pd.read_excel(path, header=None)
+    return df.iloc[:, 1:].to_numpy(dtype=np.float64)
+
+
+def read_excel_jokes(path: Path) -> pd.DataFrame:
+    """
+    Read an Excel file of jokes (one per row) with column 0 named 'text'.
+    """
+    df = pd.read_excel(path, header=None)
+    df = df.rename(columns={0: "text"})
+    df.columns = [str(c) for c in df.columns]
+    return df
+
+
+def cached_interaction_matrix(
+    path: Path, cache_dir: Optional[Path] = None, mmap: bool = False
+):
+    """
+    Raw interaction matrix (before preprocessing), cached as .npy.
+
+    With mmap, a cached copy is memory-mapped read-only instead of read.
+    """
+    return cached_convert(
+        path,
+        ".npy",
+        read_excel_matrix,
+        lambda arr, p: np.save(p, arr, allow_pickle=False),
+        lambda p: np.load(p, mmap_mode="r" if mmap else None, allow_pickle=False),
+        cache_dir,
+    )
+
+
+def cached_jokes(path: Path, cache_dir: Optional[Path] = None) -> pd.DataFrame:
+    """
+    Raw jokes frame (before preprocessing), cached as Parquet.
+    """
+    return cached_convert(
+        path,
+        ".parquet",
+        read_excel_jokes,
+        lambda df, p: df.to_parquet(p, index=False),
+        pd.read_parquet,
+        cache_dir,
+    )
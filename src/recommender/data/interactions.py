@@ -0,0 +1,189 @@
+"""
+Sparse user x item rating container.
+"""
+
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from ..config import MISSING_RATING
+
+
+class SparseInteractions:
+    """
+    Ratings as a float32 CSR matrix plus the raw ids of its rows and columns.
+
+    Only observed ratings are stored, so memory is proportional to the number
+    of ratings rather than users x items. A stored 0.0 is a real rating.
+
+    Parameters:
+        matrix: (n_users, n_items) ratings in CSR format
+        user_ids: raw user id of each row (default: 0..n_users-1)
+        item_ids: raw item id of each column (default: 0..n_items-1)
+    """
+
+    def __init__(
+        self,
+        matrix: sp.csr_matrix,
+        user_ids: Optional[Sequence] = None,
+        item_ids: Optional[Sequence] = None,
+    ):
+        self.matrix = sp.csr_matrix(matrix, dtype=np.float32)
+        n_users, n_items = self.matrix.shape
+        self.user_ids = np.asarray(
+            user_ids if user_ids is not None else np.arange(n_users)
+        )
+        self.item_ids = np.asarray(
+            item_ids if item_ids is not None else np.arange(n_items)
+        )
+
+    @classmethod
+    def from_dense(
+        cls,
+        values: np.ndarray,
+        missing: float = MISSING_RATING,
+        chunk_size: int = 4096,
+        user_ids: Optional[Sequence] = None,
+        item_ids: Optional[Sequence] = None,
+    ) -> "SparseInteractions":
+        """
+        Build from a dense (n_users, n_items) array, dropping NaN and `missing`.
+
+        Rows are converted chunk_size at a time, so values may be a read-only
+        memory-map and only one chunk is ever densely materialised in float32.
+        """
+        n_users, n_items = values.shape
+        indptr = np.zeros(n_users + 1, dtype=np.int64)
+        indices, data = [], []
+        for start in range(0, n_users, chunk_size):
+            chunk = np.asarray(values[start : start + chunk_size], dtype=np.float32)
+            observed = ~np.isnan(chunk) & (chunk != missing)
+            rows, cols = np.nonzero(observed)
+            indptr[start + 1 : start + 1 + len(chunk)] = np.bincount(
+                rows, minlength=len(chunk)
+            )
+            indices.append(cols.astype(np.int32))
+            data.append(chunk[rows, cols])
+        np.cumsum(indptr, out=indptr)
+        matrix = sp.csr_matrix(
+            (
+                np.concatenate(data) if data else np.empty(0, dtype=np.float32),
+                np.concatenate(indices) if indices else np.empty(0, dtype=np.int32),
+                indptr,
+            ),
+            shape=(n_users, n_items),
+        )
+        return cls(matrix, user_ids, item_ids)
+
+    @classmethod
+    def from_frame(
+        cls, df: pd.DataFrame, missing: float = MISSING_RATING
+    ) -> "SparseInteractions":
+        """
+        Build from a dense DataFrame indexed by user_id with item_id columns.
+        """
+        return cls.from_dense(
+            df.to_numpy(dtype=np.float32),
+            missing=missing,
+            user_ids=df.index.to_numpy(),
+            item_ids=df.columns.to_numpy(),
+        )
+
+    @classmethod
+    def from_long(
+        cls,
+        user_ids: np.ndarray,
+        item_ids: np.ndarray,
+        ratings: np.ndarray,
+    ) -> "SparseInteractions":
+        """
+        Build from parallel arrays of raw user ids, raw item ids and ratings.
+        """
+        users, rows = np.unique(user_ids, return_inverse=True)
+        items, cols = np.unique(item_ids, return_inverse=True)
+        matrix = sp.csr_matrix(
+            (np.asarray(ratings, dtype=np.float32), (rows, cols)),
+            shape=(len(users), len(items)),
+        )
+        return cls(matrix, users, items)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.matrix.shape
+
+    @property
+    def nnz(self) -> int:
+        return self.matrix.nnz
+
+    def select(self, mask: np.ndarray) -> "SparseInteractions":
+        """
+        Keep only the stored ratings where mask (one bool per rating, in CSR
+        order) is True; shape and id maps are unchanged.
+        """
+        matrix = self.matrix
+        rows = np.repeat(np.arange(self.shape[0]), np.diff(matrix.indptr))[mask]
+        indptr = np.zeros(self.shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=self.shape[0]), out=indptr[1:])
+        selected = sp.csr_matrix(
+            (matrix.data[mask], matrix.indices[mask], indptr), shape=self.shape
+        )
+        return SparseInteractions(selected, self.user_ids, self.item_ids)
+
+    def compact(self) -> "SparseInteractions":
+        """
+        Drop users and items without any stored rating.
+        """
+        rows = np.flatnonzero(np.diff(self.matrix.indptr))
+        cols = np.flatnonzero(np.bincount(self.matrix.indices, minlength=self.shape[1]))
+        if len(rows) == self.shape[0] and len(cols) == self.shape[1]:
+            return self
+        matrix = self.matrix[rows][:, cols]
+        return SparseInteractions(matrix, self.user_ids[rows], self.item_ids[cols])
+
+    def to_long(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Return (raw user ids, raw item ids, ratings), one entry per rating.
+        """
+        rows = np.repeat(np.arange(self.shape[0]), np.diff(self.matrix.indptr))
+        return (
+            self.user_ids[rows],
+            self.item_ids[self.matrix.indices],
+            self.matrix.data,
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Dense DataFrame (NaN where unrated), the layout load_interactions returns.
+        """
+        dense = np.full(self.shape, np.nan, dtype=np.float32)
+        rows = np.repeat(np.arange(self.shape[0]), np.diff(self.matrix.indptr))
+        dense[rows, self.matrix.indices] = self.matrix.data
+        return pd.DataFrame(dense, index=self.user_ids, columns=self.item_ids)
+
+
+def as_interactions(trainset) -> SparseInteractions:
+    """
+    Return the ratings of a surprise Trainset or SparseInteractions as a
+    SparseInteractions restricted to users and items that have ratings.
+
+    For a Trainset, rows and columns follow surprise inner ids.
+    """
+    if isinstance(trainset, SparseInteractions):
+        return trainset.compact()
+    rows, cols, ratings = [], [], []
+    for inner_uid, interactions in trainset.ur.items():
+        rows.extend([inner_uid] * len(interactions))
+        for inner_iid, rating in interactions:
+            cols.append(inner_iid)
+            ratings.append(rating)
+    matrix = sp.csr_matrix(
+        (np.asarray(ratings, dtype=np.float32), (rows, cols)),
+        shape=(trainset.n_users, trainset.n_items),
+    )
+    return SparseInteractions(
+        matrix,
+        [trainset.to_raw_uid(u) for u in range(trainset.n_users)],
+        [trainset.to_raw_iid(i) for i in range(trainset.n_items)],
+    )
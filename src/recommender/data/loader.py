@@ -1,32 +1,62 @@
 from pathlib import Path
+from typing import Optional, Union
 
 import pandas as pd
 
+from .cache import (
+    cached_interaction_matrix,
+    cached_jokes,
+    read_excel_jokes,
+    read_excel_matrix,
+)
+from .interactions import SparseInteractions
 from .preprocess import preprocess_interactions, preprocess_jokes
+from .store import is_interaction_store, load_interaction_store
 
 
-def load_interactions(path: Path) -> pd.DataFrame:
+def load_interactions(
+    path: Path,
+    use_cache: bool = True,
+    cache_dir: Optional[Path] = None,
+    sparse: bool = False,
+) -> Union[pd.DataFrame, SparseInteractions]:
     """
-    Reads an Excel interaction matrix:
+    Reads an interaction store directory (see data.stream, already
+    preprocessed and memory-mapped) or an Excel interaction matrix:
       - Drops the first column (row IDs)
       - Renames columns to 0..n_items-1
       - Applies preprocessing (NaN replacement, scaling)
 
-    Returns a DataFrame of shape (n_users, n_items) with ratings in [0,1].
+    With use_cache, the parsed sheet is cached as .npy (see data.cache) and
+    later calls on the same file skip the Excel parse.
+
+    Returns a DataFrame of shape (n_users, n_items) with ratings in [0,1], or,
+    with sparse=True, SparseInteractions holding only the observed ratings. The
+    sparse path memory-maps the cached sheet and converts it in row chunks.
     """
     path = Path(path)
-    df = pd.read_excel(path, header=None)
-    # remove the index column and reset numeric column labels
-    df = df.iloc[:, 1:]
-    df.columns = range(df.shape[1])
+    if is_interaction_store(path):
+        interactions = load_interaction_store(path)
+        return interactions if sparse else interactions.to_frame()
+    if use_cache:
+        raw = cached_interaction_matrix(path, cache_dir, mmap=sparse)
+    else:
+        raw = read_excel_matrix(path)
+    if sparse:
+        return preprocess_interactions(SparseInteractions.from_dense(raw))
+    # numeric column labels 0..n_items-1
+    df = pd.DataFrame(raw)
     return preprocess_interactions(df)
 
 
-def load_jokes(path: Path) -> pd.DataFrame:
+def load_jokes(
+    path: Path, use_cache: bool = True, cache_dir: Optional[Path] = None
+) -> pd.DataFrame:
     """
     Reads an Excel file of jokes (one per row) and renames column 0 to 'text'.
+
+    With use_cache, the parsed sheet is cached as Parquet.
     """
     path = Path(path)
-    df = pd.read_excel(path, header=None)
-    df = df.rename(columns={0: "text"})
+    df = cached_jokes(path, cache_dir) if use_cache else read_excel_jokes(path)
     return preprocess_jokes(df)
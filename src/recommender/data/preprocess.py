@@ -1,24 +1,59 @@
+from typing import Tuple, Union
+
 import numpy as np
 import pandas as pd
 
-from ..config import RATING_MAX, RATING_MIN
+from ..config import MISSING_RATING, RATING_MAX, RATING_MIN
+from .interactions import SparseInteractions
 
 
-def preprocess_interactions(df: pd.DataFrame) -> pd.DataFrame:
+def preprocess_interactions(
+    df: Union[pd.DataFrame, SparseInteractions],
+) -> Union[pd.DataFrame, SparseInteractions]:
     """
     Replace missing sentinel (99) with NaN and scale ratings to [0,1].
 
     If original ratings are in [-10,10] with 99 as missing,
     scaled = (raw + 10) / 20.
+
+    SparseInteractions are scaled in place (float32) and returned; if any
+    sentinel entries were stored, a copy without them is scaled instead.
     """
+    if isinstance(df, SparseInteractions):
+        return _preprocess_sparse(df)
     # replace sentinel values with NaN
-    df = df.replace(99, np.nan)
+    df = df.replace(MISSING_RATING, np.nan)
     # scale to [0,1]
     df = (df + 10) / 20
     # clip just in case
     return df.clip(lower=RATING_MIN, upper=RATING_MAX)
 
 
+def _preprocess_sparse(interactions: SparseInteractions) -> SparseInteractions:
+    missing = interactions.matrix.data == MISSING_RATING
+    if missing.any():
+        interactions = interactions.select(~missing)
+    data = interactions.matrix.data
+    data += 10
+    data /= 20
+    np.clip(data, RATING_MIN, RATING_MAX, out=data)
+    return interactions
+
+
+def preprocess_ratings(
+    user_ids: np.ndarray, item_ids: np.ndarray, ratings: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    preprocess_interactions for one chunk of (user, item, rating) triples:
+    drop NaN and sentinel (99) ratings and scale the rest to [0,1] as float32.
+    """
+    ratings = np.asarray(ratings, dtype=np.float32)
+    keep = ~np.isnan(ratings) & (ratings != MISSING_RATING)
+    scaled = (ratings[keep] + 10) / 20
+    np.clip(scaled, RATING_MIN, RATING_MAX, out=scaled)
+    return np.asarray(user_ids)[keep], np.asarray(item_ids)[keep], scaled
+
+
 def preprocess_jokes(df: pd.DataFrame) -> pd.DataFrame:
     """
     Ensure jokes DataFrame has a 'text' column of type string.
@@ -1,14 +1,18 @@
-from typing import Tuple
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
-from surprise import Dataset, Reader
+import scipy.sparse as sp
+from surprise import Dataset, Reader, Trainset
 from surprise.model_selection import train_test_split as surprise_split
 
 from ..config import DEFAULT_RANDOM_STATE, DEFAULT_TEST_SIZE, RATING_MAX, RATING_MIN
+from .interactions import SparseInteractions
 
 
 def train_test_split(
-    interactions: pd.DataFrame,
+    interactions: Union[pd.DataFrame, SparseInteractions],
     test_size: float = DEFAULT_TEST_SIZE,
     seed: int = DEFAULT_RANDOM_STATE,
 ):  # trainset and surprise-style testlist
@@ -16,7 +20,8 @@ def train_test_split(
     Splits interactions into Surprise Trainset and test list.
 
     Parameters:
-    - interactions: DataFrame indexed by user_id, columns=item_id, values=rating
+    - interactions: DataFrame indexed by user_id, columns=item_id, values=rating,
+      or SparseInteractions
     - test_size: fraction for test hold-out
     - seed: random state for reproducibility
 
@@ -24,11 +29,292 @@ def train_test_split(
     - trainset: Surprise Trainset for fitting algorithms
     - testset: list of (user_id, item_id, true_rating)
     """
-    # stack to long format
-    df = interactions.stack().reset_index()
-    df.columns = ["user_id", "item_id", "rating"]
+    if isinstance(interactions, SparseInteractions):
+        # already one entry per rating; no dense stack needed
+        user_ids, item_ids, ratings = interactions.to_long()
+        df = pd.DataFrame(
+            {
+                "user_id": user_ids,
+                "item_id": item_ids,
+                "rating": ratings.astype(np.float64),
+            }
+        )
+    else:
+        # stack to long format
+        df = interactions.stack().reset_index()
+        df.columns = ["user_id", "item_id", "rating"]
 
     reader = Reader(rating_scale=(RATING_MIN, RATING_MAX))
     dataset = Dataset.load_from_df(df, reader)
     trainset, testset = surprise_split(dataset, test_size=test_size, random_state=seed)
     return trainset, testset
+
+
+SPLIT_MODES = ("random", "user", "leave_k_out")
+
+
+class RatingSplit:
+    """
+    Train/test split of SparseInteractions held as compact index arrays.
+
+    Ratings are stored as parallel (row, col, rating) arrays into the source's
+    id maps. Sparse containers, the surprise Trainset and the surprise-style
+    test list are only built, once each, when first accessed.
+    """
+
+    def __init__(
+        self,
+        interactions: SparseInteractions,
+        is_test: np.ndarray,
+    ):
+        matrix = interactions.matrix
+        rows = np.repeat(
+            np.arange(matrix.shape[0], dtype=np.int32), np.diff(matrix.indptr)
+        )
+        self.shape = interactions.shape
+        self.user_ids = interactions.user_ids
+        self.item_ids = interactions.item_ids
+        self.train_rows = rows[~is_test]
+        self.train_cols = matrix.indices[~is_test].astype(np.int32)
+        self.train_ratings = matrix.data[~is_test]
+        self.test_rows = rows[is_test]
+        self.test_cols = matrix.indices[is_test].astype(np.int32)
+        self.test_ratings = matrix.data[is_test]
+        self._trainset: Optional[Trainset] = None
+        self._testset: Optional[List[Tuple]] = None
+
+    _ARRAYS = (
+        "user_ids",
+        "item_ids",
+        "train_rows",
+        "train_cols",
+        "train_ratings",
+        "test_rows",
+        "test_cols",
+        "test_ratings",
+    )
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """
+        Index arrays and id maps plus metadata, for save_bundle.
+        """
+        arrays = {name: getattr(self, name) for name in self._ARRAYS}
+        return arrays, {"shape": list(self.shape)}
+
+    @classmethod
+    def from_arrays(
+        cls, arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]
+    ) -> "RatingSplit":
+        """
+        Rebuild a split from to_arrays output.
+        """
+        split = cls.__new__(cls)
+        for name in cls._ARRAYS:
+            setattr(split, name, arrays[name])
+        split.shape = tuple(metadata["shape"])
+        split._trainset = None
+        split._testset = None
+        return split
+
+    def holdout(self, is_test: np.ndarray) -> "RatingSplit":
+        """
+        Split of this split's train ratings that holds out those where
+        is_test, a mask parallel to train_rows; the test ratings are dropped.
+        """
+        arrays, metadata = self.to_arrays()
+        arrays.update(
+            train_rows=self.train_rows[~is_test],
+            train_cols=self.train_cols[~is_test],
+            train_ratings=self.train_ratings[~is_test],
+            test_rows=self.train_rows[is_test],
+            test_cols=self.train_cols[is_test],
+            test_ratings=self.train_ratings[is_test],
+        )
+        return RatingSplit.from_arrays(arrays, metadata)
+
+    @classmethod
+    def from_sets(cls, trainset: Trainset, testset: List[Tuple]) -> "RatingSplit":
+        """
+        Build a split from a surprise Trainset and a (user, item, rating) list,
+        e.g. legacy pickled splits. Train users and items keep their inner ids
+        as row and column numbers; test-only ones are appended.
+        """
+        user_ids = [trainset.to_raw_uid(u) for u in range(trainset.n_users)]
+        item_ids = [trainset.to_raw_iid(i) for i in range(trainset.n_items)]
+        user_row = {raw: row for row, raw in enumerate(user_ids)}
+        item_col = {raw: col for col, raw in enumerate(item_ids)}
+
+        train = [(u, i, r) for u, ratings in trainset.ur.items() for i, r in ratings]
+        test = []
+        for uid, iid, rating in testset:
+            row = user_row.setdefault(uid, len(user_row))
+            col = item_col.setdefault(iid, len(item_col))
+            test.append((row, col, rating))
+
+        split = cls.__new__(cls)
+        split.user_ids = np.asarray(list(user_row))
+        split.item_ids = np.asarray(list(item_col))
+        split.shape = (len(user_row), len(item_col))
+        for prefix, triples in (("train", train), ("test", test)):
+            table = np.array(triples, dtype=np.float64).reshape(-1, 3)
+            setattr(split, f"{prefix}_rows", table[:, 0].astype(np.int32))
+            setattr(split, f"{prefix}_cols", table[:, 1].astype(np.int32))
+            setattr(split, f"{prefix}_ratings", table[:, 2].astype(np.float32))
+        split._trainset = None
+        split._testset = None
+        return split
+
+    def _to_sparse(self, rows, cols, ratings) -> SparseInteractions:
+        matrix = sp.csr_matrix((ratings, (rows, cols)), shape=self.shape)
+        return SparseInteractions(matrix, self.user_ids, self.item_ids)
+
+    @property
+    def train(self) -> SparseInteractions:
+        return self._to_sparse(self.train_rows, self.train_cols, self.train_ratings)
+
+    @property
+    def test(self) -> SparseInteractions:
+        return self._to_sparse(self.test_rows, self.test_cols, self.test_ratings)
+
+    @property
+    def interactions(self) -> SparseInteractions:
+        """
+        Train and test ratings together.
+        """
+        return self._to_sparse(
+            np.concatenate([self.train_rows, self.test_rows]),
+            np.concatenate([self.train_cols, self.test_cols]),
+            np.concatenate([self.train_ratings, self.test_ratings]),
+        )
+
+    @property
+    def trainset(self) -> Trainset:
+        """
+        Surprise Trainset of the train ratings, for models that still need one.
+        """
+        if self._trainset is None:
+            self._trainset = self._build_trainset()
+        return self._trainset
+
+    @property
+    def testset(self) -> List[Tuple]:
+        """
+        Test ratings as a list of (user_id, item_id, true_rating).
+        """
+        if self._testset is None:
+            self._testset = list(
+                zip(
+                    self.user_ids[self.test_rows].tolist(),
+                    self.item_ids[self.test_cols].tolist(),
+                    self.test_ratings.astype(np.float64).tolist(),
+                )
+            )
+        return self._testset
+
+    def _build_trainset(self) -> Trainset:
+        # inner ids number the users/items present in train, in index order
+        users, inner_u = np.unique(self.train_rows, return_inverse=True)
+        items, inner_i = np.unique(self.train_cols, return_inverse=True)
+        ratings = self.train_ratings.astype(np.float64).tolist()
+
+        ur = defaultdict(list)
+        ir = defaultdict(list)
+        for u, i, r in zip(inner_u.tolist(), inner_i.tolist(), ratings):
+            ur[u].append((i, r))
+            ir[i].append((u, r))
+
+        return Trainset(
+            ur,
+            ir,
+            len(users),
+            len(items),
+            len(ratings),
+            (RATING_MIN, RATING_MAX),
+            {raw: inner for inner, raw in enumerate(self.user_ids[users].tolist())},
+            {raw: inner for inner, raw in enumerate(self.item_ids[items].tolist())},
+        )
+
+
+def split_indices(
+    interactions: SparseInteractions,
+    mode: str = "random",
+    test_size: float = DEFAULT_TEST_SIZE,
+    k: int = 1,
+    seed: int = DEFAULT_RANDOM_STATE,
+) -> RatingSplit:
+    """
+    Split ratings with vectorized index arithmetic, no surprise Dataset needed.
+
+    Parameters:
+    - interactions: SparseInteractions to split
+    - mode: "random" holds out test_size of all ratings; "user" holds out
+      floor(test_size * n) of each user's n ratings; "leave_k_out" holds out
+      k ratings of every user with more than k
+    - test_size: fraction for test hold-out ("random" and "user")
+    - k: ratings per user to hold out ("leave_k_out")
+    - seed: random state for reproducibility
+
+    Returns:
+    - RatingSplit
+    """
+    if mode not in SPLIT_MODES:
+        raise ValueError(f"Unknown split mode {mode!r}; expected one of {SPLIT_MODES}")
+    nnz = interactions.nnz
+    rng = np.random.default_rng(seed)
+    is_test = np.zeros(nnz, dtype=bool)
+
+    if mode == "random":
+        n_test = int(np.ceil(nnz * test_size))
+        is_test[rng.permutation(nnz)[:n_test]] = True
+        return RatingSplit(interactions, is_test)
+
+    # shuffle ratings within each user, then take each user's first few
+    indptr = interactions.matrix.indptr
+    counts = np.diff(indptr)
+    rows = np.repeat(np.arange(len(counts)), counts)
+    order = np.lexsort((rng.random(nnz), rows))
+    position = np.empty(nnz, dtype=np.int64)
+    position[order] = np.arange(nnz) - indptr[rows[order]]
+
+    if mode == "user":
+        n_test = np.floor(counts * test_size).astype(np.int64)
+    else:
+        n_test = np.where(counts > k, k, 0)
+    is_test = position < n_test[rows]
+    return RatingSplit(interactions, is_test)
+
+
+def kfold_indices(
+    interactions: SparseInteractions,
+    n_folds: int = 5,
+    seed: int = DEFAULT_RANDOM_STATE,
+) -> np.ndarray:
+    """
+    Assign every rating to one of n_folds folds of (nearly) equal size.
+
+    Returns:
+    - int array of fold numbers, parallel to interactions.matrix.data; fold
+      f's split is RatingSplit(interactions, folds == f), or, with every rating
+      in train, RatingSplit(interactions, no_test).holdout(folds == f)
+    """
+    if n_folds < 2:
+        raise ValueError(f"n_folds must be at least 2, got {n_folds}")
+    nnz = interactions.nnz
+    folds = np.empty(nnz, dtype=np.int32)
+    folds[np.random.default_rng(seed).permutation(nnz)] = np.arange(nnz) % n_folds
+    return folds
+
+
+def split_interactions(
+    interactions: SparseInteractions,
+    test_size: float = DEFAULT_TEST_SIZE,
+    seed: int = DEFAULT_RANDOM_STATE,
+) -> Tuple[SparseInteractions, SparseInteractions]:
+    """
+    Randomly hold out a fraction of the ratings, staying in sparse form.
+
+    Returns:
+    - (train, test): SparseInteractions with the same shape and id maps
+    """
+    split = split_indices(interactions, "random", test_size=test_size, seed=seed)
+    return split.train, split.test
@@ -0,0 +1,268 @@
+"""
+On-disk sparse interaction store built by appending rating chunks.
+
+Chunks of (user, item, rating) triples are appended to a flat binary COO
+file, so a writer holds only the current chunk and the raw-id maps in memory.
+On close, the COO records are sorted into CSR order by an external bucket
+sort, chunk_size records at a time: count ratings per user, distribute each
+chunk to its row-range buckets (each about chunk_size ratings) in a scratch
+file, sort each bucket by (row, col) in place, dropping repeated pairs, and
+copy the result to the CSR .npy files, which load_interaction_store
+memory-maps back as SparseInteractions.
+
+Layout of a store directory:
+    store.json                      shape, nnz and format version
+    indptr.npy, indices.npy, data.npy   CSR arrays (int32 indices and indptr
+                                    unless nnz needs int64; float32 data)
+    user_ids.npy, item_ids.npy      raw id of each row and column
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+import numpy as np
+import scipy.sparse as sp
+
+from ..config import INGEST_CHUNK_ROWS
+from .interactions import SparseInteractions
+
+STORE_MANIFEST_FILE = "store.json"
+STORE_FORMAT_VERSION = 1
+
+# record of the temporary COO and bucket files
+_COO_RECORD = np.dtype([("row", np.int64), ("col", np.int32), ("data", np.float32)])
+
+
+class _IdMap:
+    """
+    Raw id -> dense index, assigned in order of first appearance (sorted
+    within a chunk).
+    """
+
+    def __init__(self):
+        self.index: Dict[Any, int] = {}
+        self.ids = []
+
+    def encode(self, raw: np.ndarray) -> np.ndarray:
+        uniques, inverse = np.unique(raw, return_inverse=True)
+        codes = np.empty(len(uniques), dtype=np.int64)
+        for pos, value in enumerate(uniques.tolist()):
+            code = self.index.get(value)
+            if code is None:
+                code = self.index[value] = len(self.ids)
+                self.ids.append(value)
+            codes[pos] = code
+        return codes[inverse]
+
+
+class _NpyWriter:
+    """
+    A 1-D .npy file of known length, written sequentially.
+    """
+
+    def __init__(self, path: Path, dtype, length: int):
+        self.dtype = np.dtype(dtype)
+        self._file = open(path, "wb")
+        header = {
+            "descr": np.lib.format.dtype_to_descr(self.dtype),
+            "fortran_order": False,
+            "shape": (length,),
+        }
+        np.lib.format.write_array_header_1_0(self._file, header)
+
+    def __enter__(self) -> "_NpyWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._file.close()
+
+    def write(self, values: np.ndarray) -> None:
+        values.astype(self.dtype, copy=False).tofile(self._file)
+
+
+class InteractionStoreWriter:
+    """
+    Append rating chunks to a new interaction store; close() writes the CSR.
+
+    A (user, item) pair appended more than once keeps its last rating.
+
+    Parameters:
+        directory: store directory (created; an existing store is replaced)
+        chunk_size: ratings per pass when converting COO to CSR on close
+    """
+
+    def __init__(self, directory: Path, chunk_size: int = INGEST_CHUNK_ROWS):
+        self.directory = Path(directory)
+        self.chunk_size = chunk_size
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / STORE_MANIFEST_FILE).unlink(missing_ok=True)
+        self.users = _IdMap()
+        self.items = _IdMap()
+        self.nnz = 0
+        self._file = open(self._scratch_path("coo"), "wb")
+
+    def _scratch_path(self, name: str) -> Path:
+        return self.directory / f".{name}.tmp"
+
+    def __enter__(self) -> "InteractionStoreWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._discard()
+
+    def append(
+        self, user_ids: np.ndarray, item_ids: np.ndarray, ratings: np.ndarray
+    ) -> None:
+        """
+        Append parallel arrays of raw user ids, raw item ids and ratings.
+        """
+        records = np.empty(len(ratings), dtype=_COO_RECORD)
+        records["row"] = self.users.encode(np.asarray(user_ids))
+        records["col"] = self.items.encode(np.asarray(item_ids))
+        records["data"] = ratings
+        records.tofile(self._file)
+        self.nnz += len(records)
+
+    def close(self) -> None:
+        """
+        Sort the appended records into CSR arrays and write the manifest.
+        """
+        self._file.close()
+        n_users, n_items = len(self.users.ids), len(self.items.ids)
+        # int32 CSR indices unless nnz needs more, so scipy keeps the arrays
+        # memory-mapped instead of upcasting them to a common index dtype
+        index_dtype = np.int32 if self.nnz < 2**31 else np.int64
+        coo_path, bucket_path = self._scratch_path("coo"), self._scratch_path("buckets")
+
+        # pass 1: ratings per user -> indptr
+        counts = np.zeros(n_users, dtype=np.int64)
+        for records in self._read_chunks(coo_path):
+            users, n = np.unique(records["row"], return_counts=True)
+            counts[users] += n
+        indptr = np.zeros(n_users + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+
+        # buckets: consecutive row ranges of about chunk_size ratings each (a
+        # single user with more ratings gets a bucket of its own)
+        starts = np.searchsorted(
+            indptr, np.arange(0, self.nnz, self.chunk_size), "right"
+        )
+        bucket_rows = np.unique(np.r_[0, starts - 1, n_users])
+
+        # pass 2: write each chunk's records behind its buckets' cursors
+        cursor = indptr[bucket_rows[:-1]].copy()
+        with open(bucket_path, "wb") as out:
+            out.truncate(self.nnz * _COO_RECORD.itemsize)
+            for records in self._read_chunks(coo_path):
+                bucket = np.searchsorted(bucket_rows, records["row"], "right") - 1
+                order = np.argsort(bucket, kind="stable")
+                records, bucket = records[order], bucket[order]
+                ids, first, n = np.unique(bucket, return_index=True, return_counts=True)
+                for b, lo, size in zip(ids.tolist(), first.tolist(), n.tolist()):
+                    out.seek(int(cursor[b]) * _COO_RECORD.itemsize)
+                    records[lo : lo + size].tofile(out)
+                    cursor[b] += size
+        coo_path.unlink()
+
+        # pass 3: sort each bucket by (row, col), drop repeated pairs (the
+        # last appended rating wins) and write it back compacted
+        counts = np.zeros(n_users, dtype=np.int64)
+        with open(bucket_path, "r+b") as f:
+            read_at = write_at = 0
+            for lo, hi in zip(bucket_rows[:-1], bucket_rows[1:]):
+                size = int(indptr[hi] - indptr[lo])
+                f.seek(read_at)
+                records = np.fromfile(f, dtype=_COO_RECORD, count=size)
+                read_at += records.nbytes
+                # stable: equal pairs stay in append order
+                records = records[np.lexsort((records["col"], records["row"]))]
+                last = np.ones(len(records), dtype=bool)
+                last[:-1] = (records["row"][1:] != records["row"][:-1]) | (
+                    records["col"][1:] != records["col"][:-1]
+                )
+                records = records[last]
+                counts[lo:hi] = np.bincount(records["row"] - lo, minlength=hi - lo)
+                f.seek(write_at)
+                records.tofile(f)
+                write_at += records.nbytes
+        np.cumsum(counts, out=indptr[1:])
+        self.nnz = int(indptr[-1])
+
+        # pass 4: copy the sorted records to the CSR arrays
+        with _NpyWriter(
+            self.directory / "indices.npy", index_dtype, self.nnz
+        ) as indices, _NpyWriter(
+            self.directory / "data.npy", np.float32, self.nnz
+        ) as data:
+            for records in self._read_chunks(bucket_path):
+                indices.write(records["col"])
+                data.write(records["data"])
+        bucket_path.unlink()
+
+        np.save(
+            self.directory / "indptr.npy",
+            indptr.astype(index_dtype),
+            allow_pickle=False,
+        )
+        np.save(
+            self.directory / "user_ids.npy",
+            np.asarray(self.users.ids),
+            allow_pickle=False,
+        )
+        np.save(
+            self.directory / "item_ids.npy",
+            np.asarray(self.items.ids),
+            allow_pickle=False,
+        )
+        manifest = {
+            "format_version": STORE_FORMAT_VERSION,
+            "shape": [n_users, n_items],
+            "nnz": self.nnz,
+        }
+        with open(self.directory / STORE_MANIFEST_FILE, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    def _read_chunks(self, path: Path) -> Iterator[np.ndarray]:
+        """
+        Yield the records of a scratch file chunk_size at a time.
+        """
+        with open(path, "rb") as f:
+            for _ in range(0, self.nnz, self.chunk_size):
+                yield np.fromfile(f, dtype=_COO_RECORD, count=self.chunk_size)
+
+    def _discard(self) -> None:
+        self._file.close()
+        for name in ("coo", "buckets"):
+            self._scratch_path(name).unlink(missing_ok=True)
+
+
+def is_interaction_store(path: Path) -> bool:
+    return (Path(path) / STORE_MANIFEST_FILE).is_file()
+
+
+def load_interaction_store(directory: Path, mmap: bool = True) -> SparseInteractions:
+    """
+    Open a store written by InteractionStoreWriter as SparseInteractions.
+
+    With mmap, the CSR arrays are memory-mapped read-only instead of read.
+    """
+    directory = Path(directory)
+    with open(directory / STORE_MANIFEST_FILE) as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != STORE_FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported interaction store version {manifest.get('format_version')}"
+        )
+    mode: Optional[str] = "r" if mmap else None
+
+    def load(name: str) -> np.ndarray:
+        return np.load(directory / f"{name}.npy", mmap_mode=mode, allow_pickle=False)
+
+    matrix = sp.csr_matrix(
+        (load("data"), load("indices"), load("indptr")), shape=tuple(manifest["shape"])
+    )
+    return SparseInteractions(matrix, load("user_ids"), load("item_ids"))
@@ -0,0 +1,122 @@
+"""
+Streaming ingestion of interaction files larger than memory.
+
+A generator pipeline reads a CSV or Parquet source in bounded chunks of rows,
+turns each chunk into (user, item, rating) triples, preprocesses it (sentinel
+removal and [-10,10] -> [0,1] scaling) and appends it to an on-disk
+interaction store. Peak memory is set by the chunk size and the raw-id maps,
+not by the size of the file.
+
+Source layouts:
+    wide: one row per user and one column per item, like the Jester Excel
+        matrix (no header; the first column holds a per-row count and is
+        skipped; users and items are numbered by position)
+    long: one rating per row, with user, item and rating columns
+"""
+
+from pathlib import Path
+from typing import Iterator, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from ..config import INGEST_CHUNK_ROWS
+from .interactions import SparseInteractions
+from .preprocess import preprocess_ratings
+from .store import InteractionStoreWriter, load_interaction_store
+
+INGEST_LAYOUTS = ("wide", "long")
+LONG_COLUMNS = ("user_id", "item_id", "rating")
+
+Triples = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def read_frame_chunks(
+    path: Path, chunk_rows: int, header: bool = True
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield a CSV or Parquet file as DataFrames of at most chunk_rows rows.
+
+    header only applies to CSV; Parquet always names its columns.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".parquet":
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    elif suffix in (".csv", ".gz", ".txt"):
+        yield from pd.read_csv(path, header=0 if header else None, chunksize=chunk_rows)
+    else:
+        raise ValueError(
+            f"Unsupported interaction source {path.name}; expected .csv or .parquet"
+        )
+
+
+def wide_triples(chunks: Iterator[pd.DataFrame]) -> Iterator[Triples]:
+    """
+    Turn wide chunks (rows = users, first column skipped) into triples of the
+    non-empty cells, numbering users by their row in the whole file.
+    """
+    offset = 0
+    for chunk in chunks:
+        values = chunk.iloc[:, 1:].to_numpy(dtype=np.float32)
+        rows, cols = np.nonzero(~np.isnan(values))
+        yield rows + offset, cols, values[rows, cols]
+        offset += len(values)
+
+
+def long_triples(
+    chunks: Iterator[pd.DataFrame], columns: Sequence[str] = LONG_COLUMNS
+) -> Iterator[Triples]:
+    """
+    Select the (user, item, rating) columns of long chunks.
+    """
+    user_col, item_col, rating_col = columns
+    for chunk in chunks:
+        yield (
+            chunk[user_col].to_numpy(),
+            chunk[item_col].to_numpy(),
+            chunk[rating_col].to_numpy(dtype=np.float32),
+        )
+
+
+def read_rating_chunks(
+    path: Path,
+    layout: str = "wide",
+    chunk_rows: int = INGEST_CHUNK_ROWS,
+    columns: Sequence[str] = LONG_COLUMNS,
+) -> Iterator[Triples]:
+    """
+    Yield raw (user, item, rating) triples of a source, chunk_rows rows at a
+    time (see the module docstring for the layouts).
+    """
+    if layout == "wide":
+        return wide_triples(read_frame_chunks(path, chunk_rows, header=False))
+    if layout == "long":
+        return long_triples(read_frame_chunks(path, chunk_rows), columns)
+    raise ValueError(f"Unknown layout {layout!r}; expected one of {INGEST_LAYOUTS}")
+
+
+def ingest_interactions(
+    source: Path,
+    directory: Path,
+    layout: str = "wide",
+    chunk_rows: int = INGEST_CHUNK_ROWS,
+    columns: Sequence[str] = LONG_COLUMNS,
+) -> SparseInteractions:
+    """
+    Stream a ratings file into an interaction store and return it, mmapped.
+
+    Parameters:
+        source: .csv or .parquet file
+        directory: store directory to write (replaced if it exists)
+        layout: "wide" or "long" (see the module docstring)
+        chunk_rows: source rows per chunk
+        columns: user, item and rating column names of a long source
+    """
+    chunks = read_rating_chunks(source, layout, chunk_rows, columns)
+    with InteractionStoreWriter(directory, chunk_size=chunk_rows) as writer:
+        for triples in chunks:
+            writer.append(*preprocess_ratings(*triples))
+    return load_interaction_store(directory)
@@ -1,5 +1,17 @@
+from .approx import CentroidIndex, approximate_neighbor_index, neighbor_recall
+from .cache import EmbeddingCache
+from .cascade import cascade_neighbor_index
 from .colbert import ColbertEmbedder
+from .maxsim import maxsim_score_matrix
+from .ragged import RaggedVectors
 
 __all__ = [
+    "CentroidIndex",
+    "approximate_neighbor_index",
+    "neighbor_recall",
+    "cascade_neighbor_index",
     "ColbertEmbedder",
+    "EmbeddingCache",
+    "maxsim_score_matrix",
+    "RaggedVectors",
 ]
@@ -0,0 +1,281 @@
+"""
+Approximate ColBERT MaxSim neighbors via token centroids.
+
+All token vectors are clustered with k-means, and each text is stored as the
+centroid id of every token plus that token's residual (token - centroid).
+Neighbors are found in two stages:
+
+1. Candidate generation. Each query token is compared to the centroids only,
+   and keeps its nprobe best. A document's approximate score is the sum, over
+   query tokens, of the best probed centroid score among the document's
+   centroids (PLAID-style centroid interaction, negative scores counted as
+   zero). This needs no document token vectors at all.
+2. Rescoring. The n_rescore best candidates of each text are scored with exact
+   MaxSim on the reconstructed (centroid + residual) tokens, and the best
+   max_n are kept.
+
+nprobe and n_rescore are the speed/accuracy knobs; neighbor_recall measures the
+result against the exact neighbor index.
+"""
+
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from ..config import (
+    APPROX_KMEANS_ITERS,
+    APPROX_KMEANS_SAMPLE,
+    APPROX_NPROBE,
+    APPROX_SHORTLIST,
+    MAXSIM_BLOCK_SIZE,
+)
+from ..utils.io import load_array, save_array
+from .maxsim import rescore_neighbors
+from .ragged import RaggedVectors
+
+
+def kmeans(
+    points: np.ndarray,
+    n_centroids: int,
+    n_iter: int = APPROX_KMEANS_ITERS,
+    seed: Optional[int] = None,
+    chunk_size: int = 8192,
+) -> np.ndarray:
+    """
+    Spherical k-means: unit-norm centroids, points assigned by dot product.
+
+    Empty clusters are re-seeded with random points.
+
+    Returns:
+        (n_centroids, dim) float32 centroids
+    """
+    rng = np.random.default_rng(seed)
+    points = np.asarray(points, dtype=np.float32)
+    n_centroids = min(n_centroids, len(points))
+    centroids = points[rng.choice(len(points), n_centroids, replace=False)].copy()
+    for _ in range(n_iter):
+        codes = assign(points, centroids, chunk_size)
+        members = sp.csr_matrix(
+            (np.ones(len(points), dtype=np.float32), (codes, np.arange(len(points)))),
+            shape=(n_centroids, len(points)),
+        )
+        counts = np.bincount(codes, minlength=n_centroids)
+        sums = np.asarray(members @ points)
+        empty = counts == 0
+        sums[empty] = points[rng.choice(len(points), int(empty.sum()))]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.where(norms > 0, norms, 1.0)
+    return centroids
+
+
+def assign(
+    points: np.ndarray, centroids: np.ndarray, chunk_size: int = 8192
+) -> np.ndarray:
+    """
+    Return the int32 id of the highest-scoring centroid of every point.
+    """
+    codes = np.empty(len(points), dtype=np.int32)
+    for start in range(0, len(points), chunk_size):
+        chunk = np.asarray(points[start : start + chunk_size], dtype=np.float32)
+        codes[start : start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return codes
+
+
+class CentroidIndex:
+    """
+    Texts' token vectors compressed to centroid ids plus residuals.
+
+    Parameters:
+        centroids: (n_centroids, dim) float32 centroids
+        codes: (n_tokens,) int32 centroid id of every token
+        residuals: RaggedVectors of token - centroid; its offsets delimit texts
+    """
+
+    def __init__(
+        self, centroids: np.ndarray, codes: np.ndarray, residuals: RaggedVectors
+    ):
+        self.centroids = centroids
+        self.codes = codes
+        self.residuals = residuals
+
+    @classmethod
+    def build(
+        cls,
+        vecs: Sequence[np.ndarray],
+        n_centroids: Optional[int] = None,
+        n_iter: int = APPROX_KMEANS_ITERS,
+        sample_size: int = APPROX_KMEANS_SAMPLE,
+        residual_dtype: str = "float16",
+        seed: Optional[int] = None,
+    ) -> "CentroidIndex":
+        """
+        Cluster the token vectors of vecs and encode every token.
+
+        Parameters:
+            vecs: list of (n_tokens, dim) arrays or RaggedVectors
+            n_centroids: number of clusters (default: a power of two near
+                16 * sqrt(total tokens), as in ColBERTv2)
+            n_iter: k-means iterations
+            sample_size: tokens sampled to fit the centroids
+            residual_dtype: RaggedVectors storage dtype of the residuals
+            seed: random state for sampling and initialisation
+        """
+        if not isinstance(vecs, RaggedVectors):
+            vecs = RaggedVectors.from_list(vecs)
+        tokens = vecs.gather(np.arange(vecs.offsets[-1]))
+        if n_centroids is None:
+            n_centroids = 2 ** int(np.floor(np.log2(16 * np.sqrt(len(tokens)))))
+
+        rng = np.random.default_rng(seed)
+        sample = tokens
+        if len(tokens) > sample_size:
+            sample = tokens[np.sort(rng.choice(len(tokens), sample_size, False))]
+        centroids = kmeans(sample, n_centroids, n_iter, seed=seed)
+        codes = assign(tokens, centroids)
+
+        residuals = RaggedVectors.from_list(
+            np.split(tokens - centroids[codes], vecs.offsets[1:-1]),
+            dtype=residual_dtype,
+        )
+        return cls(centroids, codes, residuals)
+
+    @classmethod
+    def load(
+        cls, directory: Path, name: str = "colbert_centroids", mmap: bool = True
+    ) -> "CentroidIndex":
+        """
+        Load files written by save(), memory-mapped read-only by default.
+        """
+        directory = Path(directory)
+        return cls(
+            load_array(directory / f"{name}.centroids.npy", mmap=False),
+            load_array(directory / f"{name}.codes.npy", mmap=mmap),
+            RaggedVectors.load(directory, f"{name}.residuals", mmap=mmap),
+        )
+
+    def save(self, directory: Path, name: str = "colbert_centroids") -> None:
+        """
+        Write <name>.centroids.npy, <name>.codes.npy and the residual files.
+        """
+        directory = Path(directory)
+        save_array(self.centroids, directory / f"{name}.centroids.npy")
+        save_array(self.codes, directory / f"{name}.codes.npy")
+        self.residuals.save(directory, f"{name}.residuals")
+
+    def __len__(self) -> int:
+        return len(self.residuals)
+
+    @property
+    def offsets(self) -> np.ndarray:
+        return self.residuals.offsets
+
+    def padded(self, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Reconstructed tokens of texts, padded as RaggedVectors.padded does.
+
+        Returns:
+            (tokens, lengths)
+        """
+        lengths = self.residuals.lengths[indices]
+        steps = np.arange(int(lengths.max()))
+        steps = np.where(steps < lengths[:, None], steps, 0)
+        rows = self.offsets[indices][:, None] + steps
+        return self.centroids[self.codes[rows]] + self.residuals.gather(rows), lengths
+
+    def doc_centroids(self) -> sp.csr_matrix:
+        """
+        (n_centroids, n_texts) 0/1 matrix of which centroids each text uses.
+        """
+        docs = np.repeat(np.arange(len(self)), self.residuals.lengths)
+        incidence = sp.csr_matrix(
+            (np.ones(len(docs), dtype=np.float32), (self.codes, docs)),
+            shape=(len(self.centroids), len(self)),
+        )
+        incidence.data[:] = 1.0
+        return incidence
+
+    def candidate_scores(
+        self, indices: np.ndarray, nprobe: int, doc_centroids: sp.csr_matrix
+    ) -> np.ndarray:
+        """
+        Centroid-interaction scores of texts indices against every text.
+
+        Returns:
+            (len(indices), n_texts) array; higher is more similar
+        """
+        tokens, lengths = self.padded(indices)
+        mask = np.arange(tokens.shape[1]) < lengths[:, None]
+        query = tokens[mask]  # real tokens only, grouped by text
+        owner = np.repeat(np.arange(len(indices)), lengths)
+        nprobe = min(nprobe, len(self.centroids))
+
+        sim = query @ self.centroids.T
+        probes = np.argpartition(-sim, nprobe - 1, axis=1)[:, :nprobe]
+        best = None
+        for rank in range(nprobe):
+            cols = probes[:, rank]
+            values = np.maximum(sim[np.arange(len(query)), cols], 0.0)
+            probed = sp.csr_matrix(
+                (values, (np.arange(len(query)), cols)),
+                shape=(len(query), len(self.centroids)),
+            )
+            # (query tokens, texts): the probed centroid's score where the text
+            # contains it; the max over ranks is the best probed centroid
+            hits = probed @ doc_centroids
+            best = hits if best is None else best.maximum(hits)
+        per_text = sp.csr_matrix(
+            (np.ones(len(query), dtype=np.float32), (owner, np.arange(len(query)))),
+            shape=(len(indices), len(query)),
+        )
+        return (per_text @ best).toarray()
+
+
+def approximate_neighbor_index(
+    index: CentroidIndex,
+    max_n: int,
+    nprobe: int = APPROX_NPROBE,
+    n_rescore: int = APPROX_SHORTLIST,
+    block_size: int = MAXSIM_BLOCK_SIZE,
+    n_threads: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Approximate top-max_n MaxSim neighbors of every text (self excluded).
+
+    Parameters:
+        index: CentroidIndex of the texts
+        max_n: neighbors kept per text
+        nprobe: centroids probed per query token in candidate generation
+        n_rescore: candidates per text rescored with exact MaxSim (at least max_n)
+        block_size: texts per candidate-generation block
+        n_threads: worker threads over blocks (default: CPU count)
+
+    Returns:
+        (indices, scores): int32 and float32 arrays of shape (n_texts, max_n),
+        ordered by descending rescored MaxSim, as build_neighbor_index returns
+    """
+    doc_centroids = index.doc_centroids()
+    return rescore_neighbors(
+        index,
+        lambda block: index.candidate_scores(block, nprobe, doc_centroids),
+        max_n,
+        n_rescore=n_rescore,
+        block_size=block_size,
+        n_threads=n_threads,
+    )
+
+
+def neighbor_recall(
+    approx_indices: np.ndarray, exact_indices: np.ndarray, n: int
+) -> float:
+    """
+    Mean fraction of each item's exact top-n neighbors found in its approximate
+    top-n (recall@n of the approximate index).
+    """
+    approx_indices, exact_indices = approx_indices[:, :n], exact_indices[:, :n]
+    found = [
+        np.intersect1d(a, e).size / max(len(e), 1)
+        for a, e in zip(approx_indices, exact_indices)
+    ]
+    return float(np.mean(found)) if found else float("nan")
@@ -0,0 +1,72 @@
+"""
+Content-addressed on-disk cache of per-text ColBERT token embeddings.
+
+Each text's (n_tokens, dim) array is stored as its own .npy file, named by
+the SHA-256 of (model_name, use_fp16, text), so a changed text, model or
+precision is simply a different key and stale entries are never read. Other
+outputs of the same encoding (e.g. the dense vector) are stored beside it
+under a kind suffix.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    Per-text embedding store for one model configuration.
+
+    Parameters:
+        directory: where the .npy files live (created on first write)
+        model_name: identifier of the encoding model
+        use_fp16: whether the model encodes in half precision
+    """
+
+    def __init__(self, directory: Path, model_name: str, use_fp16: bool):
+        self.directory = Path(directory)
+        self.model_name = model_name
+        self.use_fp16 = use_fp16
+
+    def key(self, text: str) -> str:
+        """
+        Return the hex cache key of a text under this model configuration.
+        """
+        payload = json.dumps([self.model_name, self.use_fp16, text])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, text: str, kind: str) -> Path:
+        suffix = "" if kind == "colbert" else f".{kind}"
+        return self.directory / f"{self.key(text)}{suffix}.npy"
+
+    def get_many(
+        self, texts: Sequence[str], kind: str = "colbert"
+    ) -> List[Optional[np.ndarray]]:
+        """
+        Return the cached array of each text, or None where it is missing.
+
+        kind names the stored output: "colbert" token vectors or "dense".
+        """
+        vecs = []
+        for text in texts:
+            path = self._path(text, kind)
+            vecs.append(np.load(path, allow_pickle=False) if path.is_file() else None)
+        return vecs
+
+    def put_many(
+        self, texts: Sequence[str], vecs: Sequence[np.ndarray], kind: str = "colbert"
+    ) -> None:
+        """
+        Store one array of the given kind per text.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for text, vec in zip(texts, vecs):
+            path = self._path(text, kind)
+            # write under a temporary name so readers never see a partial file
+            tmp = path.with_name(f".{path.stem}.tmp.npy")
+            np.save(tmp, np.asarray(vec), allow_pickle=False)
+            os.replace(tmp, path)
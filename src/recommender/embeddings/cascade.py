@@ -0,0 +1,58 @@
+"""
+Two-stage content neighbors: dense-vector shortlist, then ColBERT MaxSim.
+
+BGE-M3 produces one dense embedding per text alongside its token vectors.
+Cosine similarity of the dense embeddings (one normalized matrix product per
+block of texts) picks each text's top-M candidates, and only those pairs are
+scored with multi-vector MaxSim, so MaxSim work grows linearly with the
+number of texts.
+"""
+
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..config import CASCADE_SHORTLIST, MAXSIM_BLOCK_SIZE
+from .maxsim import rescore_neighbors
+from .ragged import RaggedVectors
+
+
+def cascade_neighbor_index(
+    colbert_vecs: Sequence[np.ndarray],
+    dense_vecs: np.ndarray,
+    max_n: int,
+    shortlist: int = CASCADE_SHORTLIST,
+    block_size: int = MAXSIM_BLOCK_SIZE,
+    n_threads: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-max_n MaxSim neighbors of every text among its dense top-shortlist.
+
+    Parameters:
+        colbert_vecs: list of (n_tokens, dim) arrays or RaggedVectors
+        dense_vecs: (n_texts, dense_dim) dense embeddings, in the same order
+        max_n: neighbors kept per text
+        shortlist: dense candidates per text rescored with MaxSim (M)
+        block_size: texts per block
+        n_threads: worker threads over blocks (default: CPU count)
+
+    Returns:
+        (indices, scores): int32 and float32 arrays of shape (n_texts, max_n),
+        ordered by descending MaxSim, as build_neighbor_index returns
+    """
+    if not isinstance(colbert_vecs, RaggedVectors):
+        colbert_vecs = RaggedVectors.from_list(colbert_vecs)
+    dense = np.asarray(dense_vecs, dtype=np.float32)
+    if len(dense) != len(colbert_vecs):
+        raise ValueError("colbert_vecs and dense_vecs must describe the same texts.")
+    norms = np.linalg.norm(dense, axis=1, keepdims=True)
+    dense = dense / np.where(norms > 0, norms, 1.0)
+
+    return rescore_neighbors(
+        colbert_vecs,
+        lambda block: dense[block] @ dense.T,
+        max_n,
+        n_rescore=shortlist,
+        block_size=block_size,
+        n_threads=n_threads,
+    )
@@ -1,7 +1,14 @@
-from typing import Any, List
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple
 
 import numpy as np
-from FlagEmbedding import BGEM3FlagModel
+
+from ..config import MAXSIM_BLOCK_SIZE
+from .cache import EmbeddingCache
+from .maxsim import maxsim_score_matrix
+
+if TYPE_CHECKING:
+    from FlagEmbedding import BGEM3FlagModel
 
 
 class ColbertEmbedder:
@@ -11,43 +18,105 @@ class ColbertEmbedder:
     Parameters:
         model_name: HuggingFace model identifier for BGEM3FlagModel
         use_fp16: whether to use half-precision
+        cache_dir: directory of an EmbeddingCache; only texts missing from it
+            are encoded (default: no cache)
+        return_dense: also keep the model's single dense vector per text
+            (dense_vecs after fit), used for cascade neighbor search
     """
 
     def __init__(
         self,
         model_name: str = "TatonkaHF/bge-m3_en_ru",
         use_fp16: bool = False,
+        cache_dir: Optional[Path] = None,
+        return_dense: bool = False,
     ):
         self.model_name = model_name
         self.use_fp16 = use_fp16
-        self.model = BGEM3FlagModel(model_name, use_fp16=use_fp16)
+        self.return_dense = return_dense
+        self.cache = (
+            EmbeddingCache(cache_dir, model_name, use_fp16)
+            if cache_dir is not None
+            else None
+        )
+        self._model = None
         self.colbert_vecs: List[Any] = []
+        self.dense_vecs: Optional[np.ndarray] = None
+
+    @property
+    def model(self) -> "BGEM3FlagModel":
+        """
+        The encoding model, loaded on first use so fully cached runs skip it.
+        """
+        if self._model is None:
+            # imported here: FlagEmbedding pulls in torch, which processes
+            # that only read saved vectors (evaluation, serving) never need
+            from FlagEmbedding import BGEM3FlagModel
+
+            self._model = BGEM3FlagModel(self.model_name, use_fp16=self.use_fp16)
+        return self._model
 
     def fit(self, texts: List[str]) -> "ColbertEmbedder":  # noqa: F821
         """
-        Encode a list of texts and store their ColBERT vectors.
+        Encode a list of texts and store their ColBERT (and dense) vectors.
 
         Returns:
             self
         """
-        self.colbert_vecs = self.model.encode(
-            texts,
-            return_dense=False,
-            return_sparse=False,
-            return_colbert_vecs=True,
-        )["colbert_vecs"]
+        self.colbert_vecs, dense = self._lookup(texts)
+        if self.return_dense:
+            self.dense_vecs = np.stack(dense)
         return self
 
     def transform(self, texts: List[str]) -> List[Any]:
         """
-        Encode new texts and return their ColBERT vectors.
+        Encode new texts and return their ColBERT vectors, in input order.
+
+        With a cache, only texts missing from it are encoded (and then
+        stored), shortest first so each model batch needs little padding.
+        """
+        return self._lookup(texts)[0]
+
+    def transform_dense(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode new texts and return their (n_texts, dim) dense vectors.
+        """
+        if not self.return_dense:
+            raise ValueError("Dense vectors need an embedder with return_dense=True.")
+        return np.stack(self._lookup(texts)[1])
+
+    def _lookup(self, texts: List[str]) -> Tuple[List[Any], Optional[List[Any]]]:
+        """
+        ColBERT vectors and (with return_dense) dense vectors of texts, read
+        from the cache where possible.
         """
-        return self.model.encode(
+        if self.cache is None:
+            return self._encode(texts)
+
+        kinds = ["colbert", "dense"] if self.return_dense else ["colbert"]
+        cached = [self.cache.get_many(texts, kind) for kind in kinds]
+        missing = [any(v[i] is None for v in cached) for i in range(len(texts))]
+        misses = list(dict.fromkeys(t for t, m in zip(texts, missing) if m))
+        if misses:
+            lengths = [len(ids) for ids in self.model.tokenizer(misses)["input_ids"]]
+            misses = [misses[i] for i in np.argsort(lengths, kind="stable")]
+            for kind, vecs, encoded in zip(kinds, cached, self._encode(misses)):
+                self.cache.put_many(misses, encoded, kind)
+                by_text = dict(zip(misses, encoded))
+                vecs[:] = [
+                    by_text[t] if m else v for t, m, v in zip(texts, missing, vecs)
+                ]
+        return cached[0], cached[1] if self.return_dense else None
+
+    def _encode(self, texts: List[str]) -> Tuple[List[Any], Optional[List[Any]]]:
+        output = self.model.encode(
             texts,
-            return_dense=False,
+            return_dense=self.return_dense,
             return_sparse=False,
             return_colbert_vecs=True,
-        )["colbert_vecs"]
+        )
+        dense = list(output["dense_vecs"]) if self.return_dense else None
+        return output["colbert_vecs"], dense
 
     def fit_transform(self, texts: List[str]) -> List[Any]:
         """
@@ -56,24 +125,18 @@ class ColbertEmbedder:
         self.fit(texts)
         return self.colbert_vecs
 
-    def get_index(self) -> np.ndarray:
+    def get_index(
+        self, block_size: int = MAXSIM_BLOCK_SIZE, n_threads: Optional[int] = None
+    ) -> np.ndarray:
         """
         Return the matrix of pairwise colbert scores for all fitted texts.
 
-        Note: computing this is O(n^2) in number of texts.
+        Note: computing this is O(n^2) in number of texts; see maxsim_score_matrix
+        for the meaning of block_size and n_threads.
         """
         if not self.colbert_vecs:
             raise ValueError("Must fit embedder before computing score matrix.")
 
-        n = len(self.colbert_vecs)
-        score_matrix = np.full((n, n), -np.inf, dtype=float)
-
-        for i, query_vec in enumerate(self.colbert_vecs):
-            for j, doc_vec in enumerate(self.colbert_vecs):
-                if i == j:
-                    continue
-                # dot per-token and sum of max similarities
-                sim = np.dot(query_vec, doc_vec.T)
-                score_matrix[i, j] = np.sum(np.max(sim, axis=1))
-
-        return score_matrix
+        return maxsim_score_matrix(
+            self.colbert_vecs, block_size=block_size, n_threads=n_threads
+        )
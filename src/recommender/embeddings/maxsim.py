@@ -0,0 +1,200 @@
+"""
+Blocked, vectorized ColBERT MaxSim scoring.
+
+The score of a query against a document is the sum, over query tokens, of the
+best dot product with any document token. Token vectors are ragged (one
+(n_tokens, dim) array per text), so they are packed into padded blocks with
+per-text lengths and scored block against block.
+
+Texts are bucketed by token count before packing so each block pads little
+and holds runs of equal-length texts. Padding rows repeat the text's first
+token; score_blocks only multiplies each text's first `length` rows.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..config import MAXSIM_BLOCK_SIZE
+from .ragged import RaggedVectors
+
+# (text indices (b,), padded tokens (b, max_len, dim), lengths (b,))
+Block = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def pack_blocks(vecs: Sequence[np.ndarray], block_size: int) -> List[Block]:
+    """
+    Pack ragged token matrices into padded blocks of at most block_size texts.
+
+    Texts are grouped by token count, so a block's indices are not contiguous.
+
+    Parameters:
+        vecs: sequence of (n_tokens, dim) arrays, or RaggedVectors (gathered
+            straight from its token matrix as float32)
+        block_size: number of texts per block
+
+    Returns:
+        list of (indices, tokens, lengths) tuples
+    """
+    if block_size <= 0:
+        raise ValueError("block_size must be positive.")
+    if isinstance(vecs, RaggedVectors):
+        order = np.argsort(vecs.lengths, kind="stable")
+        blocks = []
+        for start in range(0, len(vecs), block_size):
+            indices = order[start : start + block_size]
+            blocks.append((indices, *vecs.padded(indices)))
+        return blocks
+
+    dim = vecs[0].shape[1]
+    dtype = np.result_type(*[v.dtype for v in vecs])
+    all_lengths = np.array([v.shape[0] for v in vecs], dtype=np.int64)
+    order = np.argsort(all_lengths, kind="stable")
+    blocks = []
+    for start in range(0, len(vecs), block_size):
+        indices = order[start : start + block_size]
+        lengths = all_lengths[indices]
+        tokens = np.empty((len(indices), int(lengths.max()), dim), dtype=dtype)
+        for b, idx in enumerate(indices):
+            v = vecs[idx]
+            tokens[b, : v.shape[0]] = v
+            tokens[b, v.shape[0] :] = v[0]
+        blocks.append((indices, tokens, lengths))
+    return blocks
+
+
+def score_blocks(query: Block, doc: Block) -> np.ndarray:
+    """
+    Compute MaxSim scores for every (query, doc) pair of two packed blocks.
+
+    Each pair's token similarities are the same BLAS product over the real
+    tokens as np.dot(q, d.T), so scores equal the per-pair loop's bit for bit
+    (a single block-by-block matmul changes the GEMM shape, and with it the
+    rounding). Documents of equal length share one stacked matmul.
+
+    Returns:
+        array of shape (n_queries, n_docs)
+    """
+    _, q_tokens, q_lengths = query
+    _, d_tokens, d_lengths = doc
+    doc_lengths, inverse = np.unique(d_lengths, return_inverse=True)
+    groups = []
+    for g, length in enumerate(doc_lengths.tolist()):
+        cols = np.flatnonzero(inverse == g)
+        groups.append((cols, d_tokens[cols, :length].transpose(0, 2, 1)))
+
+    scores = np.empty((len(q_lengths), len(d_lengths)), dtype=q_tokens.dtype)
+    for b, length in enumerate(q_lengths.tolist()):
+        q = q_tokens[b, :length]
+        best = np.empty((len(d_lengths), length), dtype=q_tokens.dtype)
+        for cols, docs in groups:
+            best[cols] = np.matmul(q, docs).max(axis=2)
+        scores[b] = best.sum(axis=1)
+    return scores
+
+
+def maxsim_score_matrix(
+    vecs: Sequence[np.ndarray],
+    block_size: int = MAXSIM_BLOCK_SIZE,
+    n_threads: Optional[int] = None,
+    exclude_self: bool = True,
+) -> np.ndarray:
+    """
+    Return the (n, n) matrix of pairwise MaxSim scores.
+
+    Parameters:
+        vecs: sequence of (n_tokens, dim) ColBERT token matrices, or RaggedVectors
+        block_size: number of texts packed into a single matmul block
+        n_threads: worker threads over query blocks (default: CPU count)
+        exclude_self: set the diagonal to -inf, as in the original item-item index
+    """
+    n = len(vecs)
+    mat = np.full((n, n), -np.inf, dtype=float)
+    if n == 0:
+        return mat
+
+    blocks = pack_blocks(vecs, block_size)
+    n_threads = n_threads or os.cpu_count() or 1
+
+    def fill_rows(query: Block) -> None:
+        for doc in blocks:
+            mat[np.ix_(query[0], doc[0])] = score_blocks(query, doc)
+
+    if n_threads == 1 or len(blocks) == 1:
+        for query in blocks:
+            fill_rows(query)
+    else:
+        with ThreadPoolExecutor(max_workers=n_threads) as pool:
+            list(pool.map(fill_rows, blocks))
+
+    if exclude_self:
+        np.fill_diagonal(mat, -np.inf)
+    return mat
+
+
+def rescore_neighbors(
+    source,
+    candidate_scores: Callable[[np.ndarray], np.ndarray],
+    max_n: int,
+    n_rescore: int,
+    block_size: int = MAXSIM_BLOCK_SIZE,
+    n_threads: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-max_n MaxSim neighbors of every text, exactly rescoring a shortlist.
+
+    For each block of texts, candidate_scores gives cheap (len(block), n)
+    scores against all texts; the n_rescore best (self excluded) are scored
+    with exact MaxSim and the max_n best kept.
+
+    Parameters:
+        source: RaggedVectors (or anything with len() and a matching padded())
+        candidate_scores: maps an array of text indices to approximate scores
+        max_n: neighbors kept per text
+        n_rescore: candidates per text rescored exactly (at least max_n)
+        block_size: texts per candidate block
+        n_threads: worker threads over blocks (default: CPU count)
+
+    Returns:
+        (indices, scores): int32 and float32 arrays of shape (n_texts, max_n),
+        by descending MaxSim, ties broken by descending index
+    """
+    n = len(source)
+    max_n = max(min(max_n, n - 1), 0)
+    n_rescore = min(max(n_rescore, max_n), n - 1)
+    indices = np.empty((n, max_n), dtype=np.int32)
+    scores = np.empty((n, max_n), dtype=np.float32)
+    if max_n == 0:
+        # a catalog of at most one text has no neighbors besides itself
+        return indices, scores
+
+    def fill_block(start: int) -> None:
+        block = np.arange(start, min(start + block_size, n))
+        approx = np.array(candidate_scores(block), dtype=np.float32)
+        approx[np.arange(len(block)), block] = -np.inf
+        shortlist = np.argpartition(-approx, n_rescore - 1, axis=1)[:, :n_rescore]
+
+        # gather each query and each shortlisted document once per block
+        q_tokens, q_lengths = source.padded(block)
+        union, inverse = np.unique(shortlist, return_inverse=True)
+        d_tokens, d_lengths = source.padded(union)
+        inverse = inverse.reshape(shortlist.shape)
+        for b, item in enumerate(block):
+            query = (block[b : b + 1], q_tokens[b : b + 1], q_lengths[b : b + 1])
+            docs = (shortlist[b], d_tokens[inverse[b]], d_lengths[inverse[b]])
+            exact = score_blocks(query, docs)[0]
+            order = np.lexsort((-shortlist[b], -exact))[:max_n]
+            indices[item] = shortlist[b][order]
+            scores[item] = exact[order]
+
+    n_threads = n_threads or os.cpu_count() or 1
+    starts = range(0, n, block_size)
+    if n_threads == 1 or n <= block_size:
+        for start in starts:
+            fill_block(start)
+    else:
+        with ThreadPoolExecutor(max_workers=n_threads) as pool:
+            list(pool.map(fill_block, starts))
+    return indices, scores
@@ -0,0 +1,160 @@
+"""
+Ragged storage for per-text ColBERT token vectors.
+
+All texts' token vectors are stacked into one contiguous (n_tokens, dim)
+matrix, and offsets[i]:offsets[i + 1] is the row range of text i. The matrix
+may be stored as float32, float16, or int8 with one float32 scale per token
+(symmetric quantization: token = int8 row * scale).
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..utils.io import load_array, save_array
+
+RAGGED_DTYPES = ("float32", "float16", "int8")
+
+
+class RaggedVectors:
+    """
+    Sequence of (n_tokens_i, dim) float32 arrays backed by one token matrix.
+
+    Indexing returns the dequantized float32 array of one text, so an instance
+    can be passed wherever a list of token matrices is expected.
+
+    Parameters:
+        tokens: (n_tokens, dim) float32, float16 or int8 token matrix
+        offsets: (n_texts + 1,) int64 row offsets into tokens
+        scales: (n_tokens,) float32 per-token scales, required for int8 tokens
+    """
+
+    def __init__(
+        self,
+        tokens: np.ndarray,
+        offsets: np.ndarray,
+        scales: Optional[np.ndarray] = None,
+    ):
+        if tokens.dtype.name not in RAGGED_DTYPES:
+            raise ValueError(
+                f"Unsupported token dtype {tokens.dtype}; expected one of "
+                f"{RAGGED_DTYPES}"
+            )
+        if (tokens.dtype == np.int8) != (scales is not None):
+            raise ValueError("scales must be given exactly when tokens are int8.")
+        self.tokens = tokens
+        self.offsets = offsets
+        self.scales = scales
+
+    @classmethod
+    def from_list(
+        cls, vecs: Sequence[np.ndarray], dtype: str = "float32"
+    ) -> "RaggedVectors":
+        """
+        Stack a list of (n_tokens_i, dim) arrays, converting to dtype.
+
+        Every text must have at least one token.
+        """
+        if dtype not in RAGGED_DTYPES:
+            raise ValueError(
+                f"Unknown dtype {dtype!r}; expected one of {RAGGED_DTYPES}"
+            )
+        lengths = np.array([len(v) for v in vecs], dtype=np.int64)
+        if (lengths == 0).any():
+            raise ValueError("Every text needs at least one token vector.")
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        tokens = np.concatenate([np.asarray(v, dtype=np.float32) for v in vecs])
+
+        if dtype != "int8":
+            return cls(tokens.astype(dtype), offsets)
+        scales = np.abs(tokens).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        quantized = np.rint(tokens / scales[:, None]).astype(np.int8)
+        return cls(quantized, offsets, scales.astype(np.float32))
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Token matrix, offsets and (for int8) scales, for save_bundle.
+        """
+        arrays = {"tokens": self.tokens, "offsets": self.offsets}
+        if self.scales is not None:
+            arrays["scales"] = self.scales
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "RaggedVectors":
+        return cls(arrays["tokens"], arrays["offsets"], arrays.get("scales"))
+
+    @classmethod
+    def load(
+        cls, directory: Path, name: str = "colbert_vecs", mmap: bool = True
+    ) -> "RaggedVectors":
+        """
+        Load files written by save(), memory-mapped read-only by default.
+        """
+        directory = Path(directory)
+        scales_path = directory / f"{name}.scales.npy"
+        return cls(
+            load_array(directory / f"{name}.tokens.npy", mmap=mmap),
+            load_array(directory / f"{name}.offsets.npy", mmap=False),
+            load_array(scales_path, mmap=mmap) if scales_path.exists() else None,
+        )
+
+    def save(self, directory: Path, name: str = "colbert_vecs") -> None:
+        """
+        Write <name>.tokens.npy, <name>.offsets.npy and, for int8, <name>.scales.npy.
+        """
+        directory = Path(directory)
+        save_array(self.tokens, directory / f"{name}.tokens.npy")
+        save_array(self.offsets, directory / f"{name}.offsets.npy")
+        scales_path = directory / f"{name}.scales.npy"
+        if self.scales is not None:
+            save_array(self.scales, scales_path)
+        elif scales_path.exists():
+            scales_path.unlink()
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    @property
+    def dim(self) -> int:
+        return self.tokens.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        scales = self.scales.nbytes if self.scales is not None else 0
+        return self.tokens.nbytes + self.offsets.nbytes + scales
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> np.ndarray:
+        return self.gather(np.arange(self.offsets[i], self.offsets[i + 1]))
+
+    def to_list(self) -> List[np.ndarray]:
+        return [self[i] for i in range(len(self))]
+
+    def padded(self, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Gather texts into a (len(indices), max_len, dim) float32 array.
+
+        Rows past a text's length repeat its first token, as pack_blocks pads.
+
+        Returns:
+            (tokens, lengths)
+        """
+        lengths = self.lengths[indices]
+        steps = np.arange(int(lengths.max()))
+        steps = np.where(steps < lengths[:, None], steps, 0)
+        return self.gather(self.offsets[indices][:, None] + steps), lengths
+
+    def gather(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Dequantized float32 token rows at the given (any-shaped) positions.
+        """
+        tokens = np.asarray(self.tokens[rows], dtype=np.float32)
+        if self.scales is not None:
+            tokens *= self.scales[rows][..., None]
+        return tokens
@@ -1,12 +1,15 @@
 from .evaluator import Evaluator
 from .metrics import (
     diversity,
+    hit_matrix,
     mae,
     mapk,
     ndcg_at_k,
     novelty,
     precision_at_k,
+    ranking_metrics,
     recall_at_k,
+    serendipity_at_k,
 )
 
 __all__ = [
@@ -18,5 +21,7 @@ __all__ = [
     "diversity",
     "novelty",
     "serendipity_at_k",
+    "hit_matrix",
+    "ranking_metrics",
     "Evaluator",
 ]
@@ -0,0 +1,131 @@
+"""
+Parallel k-fold cross-validation of the hybrid recommender.
+
+Ratings are assigned to folds once (see data.splitter.kfold_indices). The
+ratings (as a RatingSplit with every rating in train), the fold assignment
+and the content neighbor index, which does not depend on the fold, are
+written once as a bundle that every worker memory-maps read-only (see
+utils.pool). Each task then fits SVD on one fold's train ratings and runs
+Evaluator on its held-out ratings.
+"""
+
+import copy
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..config import DEFAULT_RANDOM_STATE, DEFAULT_TOP_K
+from ..data.interactions import SparseInteractions
+from ..data.splitter import RatingSplit, kfold_indices
+from ..models.bundle import section
+from ..models.content import ContentBasedRecommender
+from ..models.hybrid import HybridRecommender
+from ..models.svd import SVDRecommender
+from ..utils.io import save_bundle
+from ..utils.pool import bundle_pool, resolve_n_jobs, worker_state
+from .evaluator import Evaluator
+
+
+def _load_worker(
+    arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]
+) -> Dict[str, Any]:
+    return {
+        "ratings": RatingSplit.from_arrays(
+            section(arrays, "ratings"), metadata["ratings"]
+        ),
+        "folds": arrays["cv.folds"],
+        "content": ContentBasedRecommender.from_arrays(
+            section(arrays, "content"), metadata["content"]
+        ),
+        **metadata["cv"],
+    }
+
+
+def _evaluate_fold(fold: int) -> Dict[str, Any]:
+    """
+    Fit on every fold but one and evaluate on the held-out fold.
+    """
+    state = worker_state()
+    split = state["ratings"].holdout(state["folds"] == fold)
+    trainset, testset = split.trainset, split.testset
+    # a worker evaluates several folds: start each from the shared index with
+    # no interactions left over from the previous fold
+    content = copy.copy(state["content"])
+    content.user_interactions = {}
+    svd_rec = SVDRecommender(**state["svd_params"], n_threads=1, seed=state["seed"])
+    hybrid = HybridRecommender(content, svd_rec, **state["hybrid_params"])
+    hybrid.fit(trainset)
+    metrics = Evaluator(hybrid).evaluate(trainset, testset, k=state["k"])
+    return {"fold": fold, **metrics}
+
+
+def cross_validate(
+    interactions: SparseInteractions,
+    content: ContentBasedRecommender,
+    n_folds: int = 5,
+    svd_params: Optional[Dict[str, Any]] = None,
+    hybrid_params: Optional[Dict[str, Any]] = None,
+    k: int = DEFAULT_TOP_K,
+    n_jobs: int = -1,
+    seed: int = DEFAULT_RANDOM_STATE,
+    log: Optional[Callable[[str], None]] = None,
+) -> Tuple[pd.DataFrame, Dict[str, Dict[str, float]]]:
+    """
+    Evaluate the hybrid recommender on n_folds folds, in parallel.
+
+    Parameters:
+        interactions: all ratings to fold
+        content: fitted content model, shared by every fold
+        n_folds: number of folds
+        svd_params: SVDRecommender keyword arguments (e.g. from tune.py)
+        hybrid_params: HybridRecommender threshold and n_similar
+        k: cutoff of the ranking metrics
+        n_jobs: worker processes (-1: all CPUs; at most n_folds are used)
+        seed: random state of the fold assignment and of the SVD fits
+        log: optional callable receiving progress messages
+
+    Returns:
+        (per-fold metrics, one row per fold; metric -> {"mean", "std"} over
+        the folds, std with one degree of freedom)
+    """
+    log = log or (lambda message: None)
+    n_jobs = min(resolve_n_jobs(n_jobs), n_folds)
+    folds = kfold_indices(interactions, n_folds, seed=seed)
+
+    # every rating in train, in matrix order, so folds line up with train_rows
+    ratings = RatingSplit(interactions, np.zeros(interactions.nnz, dtype=bool))
+    ratings_arrays, ratings_meta = ratings.to_arrays()
+    content_arrays, content_meta = content.to_arrays()
+    arrays = {f"ratings.{name}": v for name, v in ratings_arrays.items()}
+    arrays.update({f"content.{name}": v for name, v in content_arrays.items()})
+    arrays["cv.folds"] = folds
+    metadata = {
+        "ratings": ratings_meta,
+        "content": content_meta,
+        "cv": {
+            "svd_params": svd_params or {},
+            "hybrid_params": hybrid_params or {},
+            "k": k,
+            "seed": seed,
+        },
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        save_bundle(Path(directory), arrays, metadata)
+        log(f"Evaluating {n_folds} folds on {n_jobs} workers")
+        with bundle_pool(Path(directory), n_jobs, _load_worker) as pool:
+            rows = []
+            for row in pool.imap_unordered(_evaluate_fold, range(n_folds)):
+                log(f"Fold {row['fold']} done")
+                rows.append(row)
+
+    per_fold = pd.DataFrame(rows).sort_values("fold").reset_index(drop=True)
+    metrics = per_fold.drop(columns="fold")
+    summary = {
+        name: {"mean": float(metrics[name].mean()), "std": float(metrics[name].std())}
+        for name in metrics.columns
+    }
+    return per_fold, summary
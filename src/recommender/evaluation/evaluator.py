@@ -1,95 +1,208 @@
+import multiprocessing
+import time
 from typing import Any, Dict, List, Tuple
 
 import numpy as np
+import scipy.sparse as sp
 
-from ..config import DEFAULT_TOP_K
-from .metrics import (
-    diversity,
-    mae,
-    mapk,
-    ndcg_at_k,
-    novelty,
-    precision_at_k,
-    recall_at_k,
-    serendipity_at_k,
-)
+from ..config import DEFAULT_TOP_K, EVAL_SHARD_SIZE
+from ..utils.pool import resolve_n_jobs
+from ..utils.profiling import active_profiler, count, stage
+from .metrics import ranking_metrics
+
+# Read-only state for the users being evaluated. It is set in the parent before
+# the worker pool is forked, so workers inherit the recommender (SVD factors,
+# memory-mapped content index) through shared copy-on-write pages instead of
+# unpickling their own copies.
+_SHARED: Dict[str, Any] = {}
+
+# per-user metrics summed over a shard, in merge order
+_SUMMED = ["precision", "recall", "ap", "ndcg", "serendipity"]
+
+
+def _evaluate_shard(users: List[Any]) -> Dict[str, Any]:
+    """
+    Recommend for one shard of test users and return its partial metric sums.
+    """
+    recommender = _SHARED["recommender"]
+    test_user_ratings = _SHARED["test_user_ratings"]
+    item_col = _SHARED["item_col"]
+    popularity = _SHARED["popularity"]
+    k = _SHARED["k"]
+
+    # (n_users, k) recommended columns, padded with -1; items outside the
+    # train/test vocabulary map to the extra column with zero popularity
+    unknown_col = len(popularity) - 1
+    recs = np.full((len(users), max(k, 0)), -1, dtype=np.int64)
+    rec_items = set()
+
+    # For MAE: every test pair in the user's full recommendation list, as
+    # predict() scored it before the top-k interface
+    abs_err = 0.0
+    n_err = 0
+
+    start = time.perf_counter()
+    for row, (user, preds) in enumerate(
+        zip(users, recommender.recommend_many(users, None))
+    ):
+        true_ratings = test_user_ratings[user]
+        for pos, (iid, _) in enumerate(preds[:k]):
+            recs[row, pos] = item_col.get(iid, unknown_col)
+            rec_items.add(iid)
+        # collect MAE
+        for iid, p in preds:
+            if iid in true_ratings:
+                abs_err += abs(true_ratings[iid] - p)
+                n_err += 1
+    # per-shard times are counters, not stages, so they survive forked workers
+    count("evaluate.recommend_seconds", time.perf_counter() - start)
+    count("evaluate.users", len(users))
+
+    start = time.perf_counter()
+    rel_rows, rel_cols = [], []
+    for row, user in enumerate(users):
+        for iid in test_user_ratings[user]:
+            rel_rows.append(row)
+            rel_cols.append(item_col[iid])
+    relevance = sp.csr_matrix(
+        (np.ones(len(rel_rows), dtype=bool), (rel_rows, rel_cols)),
+        shape=(len(users), len(popularity)),
+    )
+
+    per_user = ranking_metrics(recs, relevance, popularity)
+    valid = recs[recs >= 0]
+    partial = {name: float(per_user[name].sum()) for name in _SUMMED}
+    partial.update(
+        n_users=len(users),
+        abs_err=abs_err,
+        n_err=n_err,
+        novelty=float((1.0 - popularity[valid]).sum()),
+        n_recs=int(valid.size),
+        rec_items=rec_items,
+    )
+    count("evaluate.metrics_seconds", time.perf_counter() - start)
+    return partial
+
+
+def _evaluate_shard_forked(users: List[Any]) -> Dict[str, Any]:
+    """
+    _evaluate_shard in a worker: also return the profiler counters the shard
+    added, which would otherwise stay in the worker's copy of the profiler.
+    """
+    profiler = active_profiler()
+    before = dict(profiler.counters) if profiler is not None else {}
+    partial = _evaluate_shard(users)
+    if profiler is not None:
+        partial["counters"] = {
+            name: value - before.get(name, 0)
+            for name, value in profiler.counters.items()
+        }
+    return partial
 
 
 class Evaluator:
     """
     Given a fitted recommender, run evaluation on train/test split.
+
+    Ranking metrics are computed on the top k recommendations. MAE is
+    computed over the test ratings that appear anywhere in a user's full
+    recommendation list (0.0 when none do).
+
+    Parameters:
+        recommender: fitted model implementing recommend_many
+        n_jobs: worker processes for recommendation and metrics (-1: all CPUs)
     """
 
-    def __init__(self, recommender):
+    def __init__(self, recommender, n_jobs: int = 1):
         self.recommender = recommender
+        self.n_jobs = n_jobs
 
     def evaluate(
         self, trainset, testset: List[Tuple[Any, Any, float]], k: int = DEFAULT_TOP_K
     ) -> Dict[str, float]:
-        # Build true ratings and recommendation dicts
+        # Build true ratings per user
         test_user_ratings: Dict[Any, Dict[Any, float]] = {}
         for uid, iid, true_r in testset:
             test_user_ratings.setdefault(uid, {})[iid] = true_r
+        users = list(test_user_ratings)
 
-        # User-level dicts
-        true_dict: Dict[Any, set] = {
-            u: set(i_dict.keys()) for u, i_dict in test_user_ratings.items()
+        # Item columns: every train item, then test-only items
+        item_col: Dict[Any, int] = {
+            trainset.to_raw_iid(inner_iid): inner_iid
+            for inner_iid in trainset.all_items()
         }
-        pred_dict: Dict[Any, List[Any]] = {}
-
-        # For MAE
-        all_true: List[float] = []
-        all_pred: List[float] = []
-
-        for user, true_items in true_dict.items():
-            preds = self.recommender.predict(user)
-            pred_ids = [iid for iid, _ in preds]
-            pred_dict[user] = pred_ids
-            # collect MAE
-            for iid, p in preds:
-                if iid in true_items:
-                    all_true.append(test_user_ratings[user][iid])
-                    all_pred.append(p)
-
-        # Compute metrics
-        results: Dict[str, float] = {}
-        results["mae"] = mae(all_true, all_pred)
-        results["precision@k"] = float(
-            np.mean([precision_at_k(true_dict[u], pred_dict[u], k) for u in true_dict])
-        )
-        results["recall@k"] = float(
-            np.mean([recall_at_k(true_dict[u], pred_dict[u], k) for u in true_dict])
-        )
-        results["map@k"] = mapk(true_dict, pred_dict, k)
-        results["ndcg@k"] = (
-            ndcg_at_k(true_dict, pred_dict, k)
-            if False
-            else float(
-                np.mean([ndcg_at_k(true_dict[u], pred_dict[u], k) for u in true_dict])
-            )
-        )
+        total_items = len(item_col)
+        for ratings in test_user_ratings.values():
+            for iid in ratings:
+                item_col.setdefault(iid, len(item_col))
 
-        # total items
-        total_items = len(trainset.all_items())
-        # popularity per item
-        pop_counts: Dict[Any, int] = {}
-        for inner_uid, interactions in trainset.ur.items():
+        # popularity per train item (plus one zero column for unknown items)
+        pop_counts = np.zeros(len(item_col) + 1)
+        for interactions in trainset.ur.values():
             for inner_iid, _ in interactions:
-                item = trainset.to_raw_iid(inner_iid)
-                pop_counts[item] = pop_counts.get(item, 0) + 1
-        max_pop = max(pop_counts.values()) if pop_counts else 1
-        popularity_norm = {item: cnt / max_pop for item, cnt in pop_counts.items()}
-
-        results["diversity@k"] = diversity(pred_dict, total_items, k)
-        results["novelty@k"] = novelty(pred_dict, popularity_norm, k)
-
-        results["serendipity@k"] = float(
-            np.mean(
-                [
-                    serendipity_at_k(true_dict[u], pred_dict[u], popularity_norm, k)
-                    for u in true_dict
-                ]
-            )
+                pop_counts[inner_iid] += 1
+        max_pop = pop_counts.max() if pop_counts.max() > 0 else 1
+
+        _SHARED.update(
+            recommender=self.recommender,
+            test_user_ratings=test_user_ratings,
+            item_col=item_col,
+            popularity=pop_counts / max_pop,
+            k=k,
         )
+        try:
+            with stage("evaluate.shards"):
+                partials = self._run_shards(users)
+        finally:
+            _SHARED.clear()
+
+        # Merge shard sums in shard order, so results do not depend on n_jobs
+        totals = {name: 0.0 for name in _SUMMED + ["abs_err", "novelty"]}
+        n_users = n_err = n_recs = 0
+        rec_items = set()
+        for partial in partials:
+            for name in totals:
+                totals[name] += partial[name]
+            n_users += partial["n_users"]
+            n_err += partial["n_err"]
+            n_recs += partial["n_recs"]
+            rec_items |= partial["rec_items"]
+
+        def user_mean(name: str) -> float:
+            return totals[name] / n_users if n_users else float("nan")
+
+        results: Dict[str, float] = {}
+        results["mae"] = totals["abs_err"] / n_err if n_err else 0.0
+        results["precision@k"] = user_mean("precision")
+        results["recall@k"] = user_mean("recall")
+        results["map@k"] = totals["ap"] / n_users if n_users else 0.0
+        results["ndcg@k"] = user_mean("ndcg")
+        results["diversity@k"] = (
+            len(rec_items) / float(total_items) if total_items > 0 else 0.0
+        )
+        results["novelty@k"] = totals["novelty"] / n_recs if n_recs else 0.0
+        results["serendipity@k"] = user_mean("serendipity")
 
         return results
+
+    def _run_shards(self, users: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Evaluate fixed-size shards of users, in a forked pool when n_jobs > 1.
+        """
+        shards = [
+            users[start : start + EVAL_SHARD_SIZE]
+            for start in range(0, len(users), EVAL_SHARD_SIZE)
+        ]
+        n_jobs = resolve_n_jobs(self.n_jobs)
+        n_jobs = min(n_jobs, len(shards))
+        # fork is what lets workers share the parent's model state
+        if n_jobs <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+            return [_evaluate_shard(shard) for shard in shards]
+        with multiprocessing.get_context("fork").Pool(n_jobs) as pool:
+            partials = pool.map(_evaluate_shard_forked, shards, chunksize=1)
+        profiler = active_profiler()
+        for partial in partials:
+            counters = partial.pop("counters", {})
+            if profiler is not None:
+                profiler.add_counters(counters)
+        return partials
@@ -1,6 +1,7 @@
-from typing import Any, Dict, List, Set
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import numpy as np
+import scipy.sparse as sp
 
 
 def mae(y_true: List[float], y_pred: List[float]) -> float:
@@ -9,19 +10,146 @@ def mae(y_true: List[float], y_pred: List[float]) -> float:
     return float(np.mean([abs(t - p) for t, p in zip(y_true, y_pred)]))
 
 
+# -- array kernels -----------------------------------------------------------
+#
+# recs is an (n_users, k) int array of recommended item columns, padded with -1
+# when a user has fewer than k recommendations; relevance is an
+# (n_users, n_items) sparse matrix whose nonzeros mark the relevant items.
+
+
+def discount_vector(k: int) -> np.ndarray:
+    """
+    DCG position discounts 1 / log2(rank + 1) for ranks 1..k.
+    """
+    return 1.0 / np.log2(np.arange(2, k + 2))
+
+
+def hit_matrix(recs: np.ndarray, relevance: sp.spmatrix) -> np.ndarray:
+    """
+    Boolean (n_users, k) matrix: whether each recommended item is relevant.
+    """
+    relevance = sp.csr_matrix(relevance)
+    relevance.sum_duplicates()
+    relevance.eliminate_zeros()
+    n_cols = max(relevance.shape[1], 1)
+    # sorted (row, col) keys of the relevant entries
+    rel_keys = (
+        np.repeat(np.arange(relevance.shape[0]), np.diff(relevance.indptr)) * n_cols
+        + relevance.indices
+    )
+
+    valid = recs >= 0
+    rows = np.broadcast_to(np.arange(recs.shape[0])[:, None], recs.shape)
+    query = rows[valid] * n_cols + recs[valid]
+    pos = np.minimum(np.searchsorted(rel_keys, query), max(len(rel_keys) - 1, 0))
+    hits = np.zeros(recs.shape, dtype=bool)
+    if len(rel_keys):
+        hits[valid] = rel_keys[pos] == query
+    return hits
+
+
+def ranking_metrics(
+    recs: np.ndarray,
+    relevance: sp.spmatrix,
+    popularity: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Per-user precision, recall, AP, NDCG (and serendipity) at k = recs.shape[1].
+
+    All metrics are derived from a single hit matrix; serendipity is included
+    when popularity (an n_items array in [0, 1]) is given.
+
+    Returns:
+        dict of metric name -> (n_users,) float array
+    """
+    n_users, k = recs.shape
+    if k == 0:
+        zeros = np.zeros(n_users)
+        names = ["precision", "recall", "ap", "ndcg"]
+        if popularity is not None:
+            names.append("serendipity")
+        return {name: zeros.copy() for name in names}
+
+    hits = hit_matrix(recs, relevance)
+    n_relevant = np.diff(sp.csr_matrix(relevance).indptr).astype(float)
+    has_relevant = n_relevant > 0
+    denom = np.where(has_relevant, n_relevant, 1.0)
+
+    n_hits = hits.sum(axis=1)
+    ranks = np.arange(1, k + 1)
+    precision_at_rank = np.cumsum(hits, axis=1) / ranks
+
+    discounts = discount_vector(k)
+    ideal = np.concatenate([[0.0], np.cumsum(discounts)])
+    idcg = ideal[np.minimum(n_relevant, k).astype(int)]
+
+    results = {
+        "precision": n_hits / float(k),
+        "recall": np.where(has_relevant, n_hits / denom, 0.0),
+        "ap": np.where(
+            has_relevant, (precision_at_rank * hits).sum(axis=1) / denom, 0.0
+        ),
+        "ndcg": np.where(
+            idcg > 0, (hits * discounts).sum(axis=1) / np.where(idcg > 0, idcg, 1), 0.0
+        ),
+    }
+    if popularity is not None:
+        unexpected = np.zeros(recs.shape)
+        unexpected[hits] = 1.0 - popularity[recs[hits]]
+        results["serendipity"] = unexpected.sum(axis=1) / float(k)
+    return results
+
+
+def _encode_user(
+    true_items: Set[Any], predicted_items: List[Any], k: int
+) -> Tuple[np.ndarray, sp.csr_matrix, List[Any]]:
+    """
+    Encode one user's lists as a 1-row recs array and relevance matrix.
+
+    Returns the column vocabulary as well, so item-keyed lookups can be mapped.
+    """
+    top_k = list(predicted_items[:k])
+    vocab = list(dict.fromkeys(top_k + list(true_items)))
+    column = {item: c for c, item in enumerate(vocab)}
+    recs = np.full((1, k), -1, dtype=np.int64)
+    recs[0, : len(top_k)] = [column[item] for item in top_k]
+    relevance = sp.csr_matrix(
+        (
+            np.ones(len(true_items), dtype=bool),
+            (
+                np.zeros(len(true_items), dtype=np.int64),
+                [column[i] for i in true_items],
+            ),
+        ),
+        shape=(1, len(vocab)),
+    )
+    return recs, relevance, vocab
+
+
+def _user_metric(
+    name: str,
+    true_items: Set[Any],
+    predicted_items: List[Any],
+    k: int,
+    popularity: Optional[Dict[Any, float]] = None,
+) -> float:
+    recs, relevance, vocab = _encode_user(true_items, predicted_items, k)
+    pop = None
+    if popularity is not None:
+        pop = np.array([popularity.get(item, 0.0) for item in vocab], dtype=float)
+    return float(ranking_metrics(recs, relevance, pop)[name][0])
+
+
 def precision_at_k(true_items: Set[Any], predicted_items: List[Any], k: int) -> float:
     if k <= 0:
         return 0.0
-    top_k = predicted_items[:k]
-    hits = len(set(top_k) & true_items)
-    return hits / float(k)
+    return _user_metric("precision", true_items, predicted_items, k)
 
 
 def recall_at_k(true_items: Set[Any], predicted_items: List[Any], k: int) -> float:
     if not true_items or k <= 0:
         return 0.0
-    top_k = predicted_items[:k]
-    return len(set(top_k) & true_items) / float(len(true_items))
+    return _user_metric("recall", true_items, predicted_items, k)
 
 
 def average_precision_at_k(
@@ -29,13 +157,7 @@ def average_precision_at_k(
 ) -> float:
     if not true_items or k <= 0:
         return 0.0
-    hits = 0
-    sum_prec = 0.0
-    for idx in range(1, k + 1):
-        if idx - 1 < len(predicted_items) and predicted_items[idx - 1] in true_items:
-            hits += 1
-            sum_prec += hits / float(idx)
-    return sum_prec / float(len(true_items))
+    return _user_metric("ap", true_items, predicted_items, k)
 
 
 def mapk(
@@ -50,28 +172,16 @@ def mapk(
 
 
 def dcg_at_k(true_items: Set[Any], predicted_items: List[Any], k: int) -> float:
-    dcg = 0.0
-    for idx in range(1, k + 1):
-        if idx - 1 < len(predicted_items) and predicted_items[idx - 1] in true_items:
-            rel = 1
-        else:
-            rel = 0
-        if idx == 1:
-            dcg += rel
-        else:
-            dcg += rel / np.log2(idx + 1)
-    return dcg
+    if k <= 0:
+        return 0.0
+    recs, relevance, _ = _encode_user(true_items, predicted_items, k)
+    return float((hit_matrix(recs, relevance)[0] * discount_vector(k)).sum())
 
 
 def ndcg_at_k(true_items: Set[Any], predicted_items: List[Any], k: int) -> float:
     if not true_items or k <= 0:
         return 0.0
-    dcg = dcg_at_k(true_items, predicted_items, k)
-    ideal_rels = [1] * min(len(true_items), k)
-    idcg = sum(
-        (1 if i == 1 else 1 / np.log2(i + 1)) for i in range(1, len(ideal_rels) + 1)
-    )
-    return dcg / idcg if idcg > 0 else 0.0
+    return _user_metric("ndcg", true_items, predicted_items, k)
 
 
 def diversity(pred_dict: Dict[Any, List[Any]], total_items: int, k: int) -> float:
@@ -106,9 +216,4 @@ def serendipity_at_k(
     """
     if k <= 0:
         return 0.0
-    score = 0.0
-    for idx in range(1, k + 1):
-        if idx - 1 < len(predicted_items) and predicted_items[idx - 1] in true_items:
-            pop = popularity.get(predicted_items[idx - 1], 0.0)
-            score += 1.0 - pop
-    return score / float(k)
+    return _user_metric("serendipity", true_items, predicted_items, k, popularity)
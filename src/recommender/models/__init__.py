@@ -1,5 +1,8 @@
 from .base import BaseRecommender
+from .bundle import ModelBundle, build_hybrid, load_model_bundle, save_model_bundle
+from .cached import CachedRecommender
 from .content import ContentBasedRecommender
+from .factorization import MatrixFactorization
 from .hybrid import HybridRecommender
 from .svd import SVDRecommender
 
@@ -8,4 +11,10 @@ __all__ = [
     "ContentBasedRecommender",
     "SVDRecommender",
     "HybridRecommender",
+    "CachedRecommender",
+    "MatrixFactorization",
+    "ModelBundle",
+    "save_model_bundle",
+    "load_model_bundle",
+    "build_hybrid",
 ]
@@ -3,6 +3,50 @@ Abstract base class for recommenders.
 """
 
 from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ..config import DEFAULT_TOP_K
+
+
+def top_k_indices(scores: np.ndarray, k: Optional[int] = None) -> np.ndarray:
+    """
+    Return the positions of the k highest scores, best first.
+
+    Uses argpartition and sorts only the selected k entries; ties keep their
+    original order. k=None ranks every entry.
+    """
+    if k is not None and k < len(scores):
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        selected = np.sort(np.argpartition(-scores, k - 1)[:k])
+        return selected[np.argsort(-scores[selected], kind="stable")]
+    return np.argsort(-scores, kind="stable")
+
+
+def group_by_user(
+    new_ratings: Iterable[Tuple[Any, Any, float]],
+) -> Dict[Any, List[Tuple[Any, float]]]:
+    """
+    Group (user_id, item_id, rating) triples into user -> [(item_id, rating)].
+    """
+    grouped: Dict[Any, List[Tuple[Any, float]]] = {}
+    for uid, iid, rating in new_ratings:
+        grouped.setdefault(uid, []).append((iid, rating))
+    return grouped
+
+
+def merge_ratings(
+    interactions: List[Tuple[Any, float]], ratings: Iterable[Tuple[Any, float]]
+) -> List[Tuple[Any, float]]:
+    """
+    Add (item_id, rating) pairs to a user's interactions; a new rating of an
+    already rated item replaces the old one.
+    """
+    merged = dict(interactions)
+    merged.update(ratings)
+    return list(merged.items())
 
 
 class BaseRecommender(ABC):
@@ -23,3 +67,20 @@ class BaseRecommender(ABC):
         Generate ranked (item_id, score) list for a given user.
         """
         pass
+
+    def recommend(self, user_id, k: Optional[int] = DEFAULT_TOP_K):
+        """
+        Return the first k entries of predict(user_id); k=None returns them all.
+
+        Models override this with a partial selection that never ranks past k.
+        """
+        preds = self.predict(user_id)
+        return preds if k is None else preds[:k]
+
+    def recommend_many(self, user_ids, k: Optional[int] = DEFAULT_TOP_K):
+        """
+        Return recommend(user_id, k) for each user, in order.
+
+        Models that can score several users at once override this.
+        """
+        return [self.recommend(u, k) for u in user_ids]
@@ -0,0 +1,151 @@
+"""
+Model bundle: the trained SVD model, content neighbor index, data split and
+ColBERT vectors in one versioned directory of memory-mappable arrays.
+
+Arrays of each part are stored under a section prefix ("svd.pu",
+"content.neighbor_indices", ...) with save_bundle, and each part's JSON
+metadata under its section name. HybridRecommender parameters, when given,
+are kept in the "hybrid" metadata section.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional
+
+import numpy as np
+
+from ..data.interactions import as_interactions
+from ..data.splitter import RatingSplit
+from ..embeddings.ragged import RaggedVectors
+from ..utils.io import load_bundle, load_pickle, save_bundle
+from .base import group_by_user
+from .content import NEIGHBOR_INDEX_FILE, ContentBasedRecommender
+from .hybrid import HybridRecommender
+from .svd import SVDRecommender
+
+
+class ModelBundle(NamedTuple):
+    svd: SVDRecommender
+    content: ContentBasedRecommender
+    split: RatingSplit
+    colbert_vecs: Optional[RaggedVectors] = None
+    # HybridRecommender keyword arguments (threshold, n_similar)
+    hybrid_params: Optional[Dict[str, Any]] = None
+
+
+def build_hybrid(bundle: ModelBundle, **overrides) -> HybridRecommender:
+    """
+    HybridRecommender over a bundle's models, with the train ratings of the
+    bundle's split as the users' interactions.
+
+    Uses the bundle's hybrid_params; keyword arguments override them.
+    """
+    params = {**(bundle.hybrid_params or {}), **overrides}
+    hybrid = HybridRecommender(bundle.content, bundle.svd, **params)
+    interactions = group_by_user(zip(*bundle.split.train.to_long()))
+    hybrid.user_interactions = interactions
+    bundle.content.user_interactions = interactions
+    return hybrid
+
+
+def section(arrays: Dict[str, np.ndarray], name: str) -> Dict[str, np.ndarray]:
+    """
+    The arrays saved under the name section prefix, with the prefix removed.
+    """
+    prefix = f"{name}."
+    return {k[len(prefix) :]: v for k, v in arrays.items() if k.startswith(prefix)}
+
+
+def save_model_bundle(directory: Path, bundle: ModelBundle) -> None:
+    """
+    Write every part of a ModelBundle into one bundle directory.
+    """
+    arrays: Dict[str, np.ndarray] = {}
+    metadata: Dict[str, Any] = {}
+    parts = [("svd", bundle.svd), ("content", bundle.content), ("split", bundle.split)]
+    for name, part in parts:
+        part_arrays, metadata[name] = part.to_arrays()
+        arrays.update({f"{name}.{k}": v for k, v in part_arrays.items()})
+    if bundle.colbert_vecs is not None:
+        arrays.update(
+            {f"colbert.{k}": v for k, v in bundle.colbert_vecs.to_arrays().items()}
+        )
+    if bundle.hybrid_params:
+        metadata["hybrid"] = dict(bundle.hybrid_params)
+    save_bundle(directory, arrays, metadata)
+
+
+def load_model_bundle(
+    directory: Path, mmap: bool = True, verify: bool = False
+) -> ModelBundle:
+    """
+    Open a bundle written by save_model_bundle; see load_bundle for mmap and
+    verify.
+    """
+    arrays, metadata = load_bundle(directory, mmap=mmap, verify=verify)
+    colbert = section(arrays, "colbert")
+    return ModelBundle(
+        svd=SVDRecommender.from_arrays(section(arrays, "svd"), metadata["svd"]),
+        content=ContentBasedRecommender.from_arrays(
+            section(arrays, "content"), metadata["content"]
+        ),
+        split=RatingSplit.from_arrays(section(arrays, "split"), metadata["split"]),
+        colbert_vecs=RaggedVectors.from_arrays(colbert) if colbert else None,
+        hybrid_params=metadata.get("hybrid"),
+    )
+
+
+def _upgrade_svd(svd_rec, trainset) -> SVDRecommender:
+    """
+    Return a pickled SVDRecommender with array parameters, re-extracting them
+    from its surprise model when it predates them.
+    """
+    if hasattr(svd_rec, "pu"):
+        return svd_rec
+    model = svd_rec.model
+    upgraded = SVDRecommender(
+        n_factors=model.n_factors, reg_all=model.reg_pu, biased=model.biased
+    )
+    upgraded.model = model
+    upgraded.trainset = trainset
+    ratings = as_interactions(trainset)
+    upgraded.items = ratings.item_ids.tolist()
+    upgraded._extract_factors(ratings, trainset.global_mean, trainset.rating_scale)
+    return upgraded
+
+
+def convert_legacy_artifacts(artifacts_dir: Path) -> ModelBundle:
+    """
+    Load the pickle artifacts of older train.py runs as a ModelBundle.
+
+    Reads trainset.pkl, testset.pkl and svd_model.pkl, the content .npy
+    artifacts (or, without them, recomputes the index from colbert_vecs.pkl)
+    and the ColBERT vectors (colbert_vecs.pkl or RaggedVectors files).
+    """
+    artifacts_dir = Path(artifacts_dir)
+    trainset = load_pickle(artifacts_dir / "trainset.pkl")
+    testset = load_pickle(artifacts_dir / "testset.pkl")
+    svd_rec = _upgrade_svd(load_pickle(artifacts_dir / "svd_model.pkl"), trainset)
+
+    colbert_vecs = None
+    if (artifacts_dir / "colbert_vecs.pkl").exists():
+        colbert_vecs = RaggedVectors.from_list(
+            load_pickle(artifacts_dir / "colbert_vecs.pkl")
+        )
+    elif (artifacts_dir / "colbert_vecs.tokens.npy").exists():
+        colbert_vecs = RaggedVectors.load(artifacts_dir, mmap=False)
+
+    if (artifacts_dir / NEIGHBOR_INDEX_FILE).exists():
+        content_rec = ContentBasedRecommender.from_artifacts(artifacts_dir, mmap=False)
+    elif colbert_vecs is not None:
+        content_rec = ContentBasedRecommender(colbert_vecs)
+    else:
+        raise FileNotFoundError(
+            f"No content artifacts or colbert_vecs.pkl in {artifacts_dir}"
+        )
+
+    return ModelBundle(
+        svd=svd_rec,
+        content=content_rec,
+        split=RatingSplit.from_sets(trainset, testset),
+        colbert_vecs=colbert_vecs,
+    )
@@ -0,0 +1,158 @@
+"""
+Per-user result cache around a fitted recommender.
+
+For a fixed model a user's ranking only changes when that user's ratings
+change, so rankings are kept in an LRU map keyed by (user_id, k,
+model_version). fit bumps the model version; partial_fit / fold_in_user
+drop only the affected users' entries.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+from ..config import DEFAULT_TOP_K, RESULT_CACHE_SIZE
+from .base import BaseRecommender, group_by_user
+
+
+class CacheStats:
+    """
+    Hit/miss/eviction/invalidation counters of a CachedRecommender.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+class CachedRecommender(BaseRecommender):
+    """
+    Serve repeated rankings of a recommender from a bounded LRU cache.
+
+    Parameters:
+        recommender: fitted model implementing recommend_many and partial_fit
+        max_entries: most cached rankings; the least recently used is evicted
+    """
+
+    def __init__(self, recommender, max_entries: int = RESULT_CACHE_SIZE):
+        self.recommender = recommender
+        self.max_entries = max_entries
+        self.model_version = 0
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[Hashable, List[Tuple[Any, float]]]" = OrderedDict()
+        self._user_keys: Dict[Any, Set[Hashable]] = {}
+        # bumped on every invalidation; results computed across a bump are
+        # not stored, since they may predate the update
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def fit(self, trainset):
+        self.recommender.fit(trainset)
+        self.clear(bump_version=True)
+        return self
+
+    def fold_in_user(self, user_id, ratings):
+        """
+        Add or update one user in the wrapped model and drop their entries.
+        """
+        return self.partial_fit((user_id, iid, r) for iid, r in ratings)
+
+    def partial_fit(self, new_ratings):
+        """
+        Fold (user_id, item_id, rating) triples into the wrapped model and
+        invalidate the cached rankings of the users they touch.
+        """
+        new_ratings = list(new_ratings)
+        self.recommender.partial_fit(new_ratings)
+        self.invalidate(group_by_user(new_ratings))
+        return self
+
+    def invalidate(self, user_ids) -> None:
+        """
+        Drop every cached ranking of the given users.
+        """
+        with self._lock:
+            self._epoch += 1
+            for user_id in user_ids:
+                for key in self._user_keys.pop(user_id, ()):
+                    if self._entries.pop(key, None) is not None:
+                        self.stats.invalidations += 1
+
+    def clear(self, bump_version: bool = False) -> None:
+        """
+        Drop all cached rankings; bump_version marks the model as refitted.
+        """
+        with self._lock:
+            self._epoch += 1
+            if bump_version:
+                self.model_version += 1
+            self._entries.clear()
+            self._user_keys.clear()
+
+    def predict(self, user_id, k: Optional[int] = None):
+        return self.recommend(user_id, k)
+
+    def recommend(self, user_id, k: Optional[int] = DEFAULT_TOP_K):
+        return self.recommend_many([user_id], k)[0]
+
+    def recommend_many(self, user_ids, k: Optional[int] = DEFAULT_TOP_K):
+        """
+        Look each user up in the cache and rank the missing ones with a single
+        recommend_many call on the wrapped model.
+        """
+        user_ids = list(user_ids)
+        results: List[Optional[List[Tuple[Any, float]]]] = []
+        missing: Dict[Any, None] = {}
+        with self._lock:
+            version, epoch = self.model_version, self._epoch
+            for user_id in user_ids:
+                key = (user_id, k, version)
+                recs = self._entries.get(key)
+                if recs is None:
+                    self.stats.misses += 1
+                    missing[user_id] = None
+                else:
+                    self.stats.hits += 1
+                    self._entries.move_to_end(key)
+                results.append(recs)
+        if not missing:
+            return results
+
+        computed = dict(zip(missing, self.recommender.recommend_many(list(missing), k)))
+        with self._lock:
+            if self._epoch == epoch:
+                for user_id, recs in computed.items():
+                    self._store((user_id, k, version), user_id, recs)
+        return [
+            computed[user_id] if recs is None else recs
+            for user_id, recs in zip(user_ids, results)
+        ]
+
+    def _store(self, key, user_id, recs) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = recs
+        self._entries.move_to_end(key)
+        self._user_keys.setdefault(user_id, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            old_key, _ = self._entries.popitem(last=False)
+            keys = self._user_keys[old_key[0]]
+            keys.discard(old_key)
+            if not keys:
+                del self._user_keys[old_key[0]]
+            self.stats.evictions += 1
@@ -2,32 +2,245 @@
 Content-based recommender using precomputed ColBERT vectors.
 """
 
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
 import numpy as np
 
-from .base import BaseRecommender
+from ..config import (
+    APPROX_NPROBE,
+    APPROX_SHORTLIST,
+    CASCADE_SHORTLIST,
+    CONTENT_MAX_NEIGHBORS,
+    DEFAULT_TOP_K,
+    MAXSIM_BLOCK_SIZE,
+)
+from ..embeddings.approx import CentroidIndex, approximate_neighbor_index
+from ..embeddings.cascade import cascade_neighbor_index
+from ..embeddings.maxsim import maxsim_score_matrix
+from ..utils.io import load_array, save_array
+from ..utils.profiling import count
+from .base import BaseRecommender, group_by_user, merge_ratings, top_k_indices
+
+# artifact file names written by ContentBasedRecommender.save
+SCORE_MATRIX_FILE = "content_scores.npy"
+NEIGHBOR_INDEX_FILE = "content_neighbors.npy"
+NEIGHBOR_SCORES_FILE = "content_neighbor_scores.npy"
+
+
+def build_neighbor_index(
+    score_matrix: np.ndarray, max_n: int = CONTENT_MAX_NEIGHBORS, block_size: int = 1024
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Select the max_n highest-scoring neighbors of every item.
+
+    Rows are processed in blocks with argpartition, so score_matrix may be a
+    memory-map. Neighbors are ordered by descending score, ties broken by
+    descending index (the order of a stable np.argsort(row)[::-1]).
+
+    Returns:
+        (indices, scores): int32 and float32 arrays of shape (n_items, max_n)
+    """
+    n = score_matrix.shape[0]
+    max_n = min(max_n, n)
+    indices = np.empty((n, max_n), dtype=np.int32)
+    scores = np.empty((n, max_n), dtype=np.float32)
+    for start in range(0, n, block_size):
+        rows = np.asarray(score_matrix[start : start + block_size])
+        if max_n < n:
+            cand = np.argpartition(-rows, max_n - 1, axis=1)[:, :max_n]
+        else:
+            cand = np.broadcast_to(np.arange(n), rows.shape)
+        cand_scores = np.take_along_axis(rows, cand, axis=1)
+        order = np.lexsort((-cand, -cand_scores), axis=1)
+        indices[start : start + len(rows)] = np.take_along_axis(cand, order, axis=1)
+        scores[start : start + len(rows)] = np.take_along_axis(
+            cand_scores, order, axis=1
+        )
+    return indices, scores
 
 
 class ContentBasedRecommender(BaseRecommender):
     """
     Ranks items for a user by semantic similarity to positively rated items.
+
+    colbert_vecs is a list of (n_tokens, dim) arrays or a RaggedVectors; it is
+    only read to compute the score matrix when neither it nor neighbors is
+    given. Built from neighbors alone (see approximate and cascade), it runs
+    in neighbor-only mode: a candidate's score is its best neighbor score
+    among the user's positive items, and no (n_items, n_items) matrix exists.
     """
 
-    def __init__(self, colbert_vecs, threshold: float = 0.5):
+    def __init__(
+        self,
+        colbert_vecs,
+        threshold: float = 0.5,
+        block_size: int = MAXSIM_BLOCK_SIZE,
+        n_threads: Optional[int] = None,
+        max_neighbors: int = CONTENT_MAX_NEIGHBORS,
+        score_matrix: Optional[np.ndarray] = None,
+        neighbors: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+    ):
         self.colbert_vecs = colbert_vecs
         self.threshold = threshold
-        self.score_matrix = self._compute_score_matrix()
+        self.block_size = block_size
+        self.n_threads = n_threads
+        if score_matrix is None and neighbors is None:
+            score_matrix = self._compute_score_matrix()
+        self.score_matrix = score_matrix
+        # (n_items, max_neighbors) int32 ids and float32 scores, best first
+        self.neighbor_indices, self.neighbor_scores = (
+            neighbors
+            if neighbors is not None
+            else build_neighbor_index(self.score_matrix, max_neighbors)
+        )
         self.user_interactions = {}
 
+    @classmethod
+    def approximate(
+        cls,
+        colbert_vecs,
+        threshold: float = 0.5,
+        max_neighbors: int = CONTENT_MAX_NEIGHBORS,
+        nprobe: int = APPROX_NPROBE,
+        n_rescore: int = APPROX_SHORTLIST,
+        n_centroids: Optional[int] = None,
+        block_size: int = MAXSIM_BLOCK_SIZE,
+        n_threads: Optional[int] = None,
+        seed: Optional[int] = None,
+    ) -> "ContentBasedRecommender":
+        """
+        Build a neighbor-only recommender from approximate MaxSim neighbors.
+
+        Tokens are compressed to k-means centroids plus residuals, candidates
+        come from centroid interactions, and n_rescore candidates per item are
+        rescored exactly; see recommender.embeddings.approx. Raising nprobe or
+        n_rescore trades speed for recall against the exact index.
+        """
+        index = CentroidIndex.build(colbert_vecs, n_centroids=n_centroids, seed=seed)
+        neighbors = approximate_neighbor_index(
+            index,
+            max_neighbors,
+            nprobe=nprobe,
+            n_rescore=n_rescore,
+            block_size=block_size,
+            n_threads=n_threads,
+        )
+        return cls(
+            colbert_vecs,
+            threshold=threshold,
+            block_size=block_size,
+            n_threads=n_threads,
+            neighbors=neighbors,
+        )
+
+    @classmethod
+    def cascade(
+        cls,
+        colbert_vecs,
+        dense_vecs: np.ndarray,
+        threshold: float = 0.5,
+        max_neighbors: int = CONTENT_MAX_NEIGHBORS,
+        shortlist: int = CASCADE_SHORTLIST,
+        block_size: int = MAXSIM_BLOCK_SIZE,
+        n_threads: Optional[int] = None,
+    ) -> "ContentBasedRecommender":
+        """
+        Build a neighbor-only recommender from a dense-vector shortlist.
+
+        Each item's shortlist dense nearest neighbors (cosine) are rescored with
+        MaxSim; see recommender.embeddings.cascade.
+        """
+        neighbors = cascade_neighbor_index(
+            colbert_vecs,
+            dense_vecs,
+            max_neighbors,
+            shortlist=shortlist,
+            block_size=block_size,
+            n_threads=n_threads,
+        )
+        return cls(
+            colbert_vecs,
+            threshold=threshold,
+            block_size=block_size,
+            n_threads=n_threads,
+            neighbors=neighbors,
+        )
+
+    @classmethod
+    def from_artifacts(
+        cls, directory: Path, threshold: float = 0.5, mmap: bool = True
+    ) -> "ContentBasedRecommender":
+        """
+        Build a recommender from artifacts written by save(), without colbert_vecs.
+
+        With mmap=True the arrays are memory-mapped read-only, so startup does no
+        MaxSim work and concurrent processes share pages through the OS cache.
+        Without a saved score matrix the recommender is neighbor-only.
+        """
+        directory = Path(directory)
+        score_path = directory / SCORE_MATRIX_FILE
+        return cls(
+            None,
+            threshold=threshold,
+            score_matrix=(
+                load_array(score_path, mmap=mmap) if score_path.exists() else None
+            ),
+            neighbors=(
+                load_array(directory / NEIGHBOR_INDEX_FILE, mmap=mmap),
+                load_array(directory / NEIGHBOR_SCORES_FILE, mmap=mmap),
+            ),
+        )
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """
+        Neighbor table (and score matrix, if any) plus metadata, for save_bundle.
+        """
+        arrays = {
+            "neighbor_indices": self.neighbor_indices,
+            "neighbor_scores": self.neighbor_scores,
+        }
+        if self.score_matrix is not None:
+            arrays["score_matrix"] = self.score_matrix
+        return arrays, {"threshold": self.threshold}
+
+    @classmethod
+    def from_arrays(
+        cls, arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]
+    ) -> "ContentBasedRecommender":
+        """
+        Rebuild a recommender from to_arrays output, without colbert_vecs.
+        """
+        return cls(
+            None,
+            threshold=metadata["threshold"],
+            score_matrix=arrays.get("score_matrix"),
+            neighbors=(arrays["neighbor_indices"], arrays["neighbor_scores"]),
+        )
+
+    def save(self, directory: Path, max_n: int = CONTENT_MAX_NEIGHBORS) -> None:
+        """
+        Write the score matrix (if any) and its top-max_n neighbor table as .npy
+        files. A neighbor-only recommender saves its neighbor table as is.
+        """
+        directory = Path(directory)
+        score_path = directory / SCORE_MATRIX_FILE
+        if self.score_matrix is None:
+            if score_path.exists():
+                score_path.unlink()
+        else:
+            if self.neighbor_indices.shape[1] < min(max_n, self.score_matrix.shape[0]):
+                self.neighbor_indices, self.neighbor_scores = build_neighbor_index(
+                    self.score_matrix, max_n
+                )
+            save_array(self.score_matrix, score_path)
+        save_array(self.neighbor_indices, directory / NEIGHBOR_INDEX_FILE)
+        save_array(self.neighbor_scores, directory / NEIGHBOR_SCORES_FILE)
+
     def _compute_score_matrix(self):
-        n = len(self.colbert_vecs)
-        mat = np.full((n, n), -np.inf, dtype=float)
-        for i in range(n):
-            for j in range(n):
-                if i == j:
-                    continue
-                sim = np.dot(self.colbert_vecs[i], self.colbert_vecs[j].T)
-                mat[i, j] = np.sum(np.max(sim, axis=1))
-        return mat
+        return maxsim_score_matrix(
+            self.colbert_vecs, block_size=self.block_size, n_threads=self.n_threads
+        )
 
     def fit(self, trainset):
         # build raw user -> [(item_id, rating), ...]
@@ -40,25 +253,75 @@ class ContentBasedRecommender(BaseRecommender):
             self.user_interactions[raw_uid] = raw_inter
         return self
 
+    def fold_in_user(self, user_id, ratings):
+        """
+        Add (item_id, rating) pairs to a user's interactions, creating the user
+        if needed; a new rating of an already rated item replaces it.
+        """
+        self.user_interactions[user_id] = merge_ratings(
+            self.user_interactions.get(user_id, []), ratings
+        )
+        return self
+
+    def partial_fit(self, new_ratings):
+        """
+        Fold (user_id, item_id, rating) triples into the user interactions.
+        """
+        for user_id, ratings in group_by_user(new_ratings).items():
+            self.fold_in_user(user_id, ratings)
+        return self
+
+    def _neighbor_scores(self, items: np.ndarray) -> np.ndarray:
+        """
+        Best neighbor-table score of every item against any of items (-inf
+        where an item is in none of their neighbor lists).
+        """
+        best = np.full(self.neighbor_indices.shape[0], -np.inf)
+        np.maximum.at(
+            best,
+            self.neighbor_indices[items].ravel(),
+            self.neighbor_scores[items].ravel(),
+        )
+        return best
+
     def get_topn(self, item_id, n=10):
-        row = self.score_matrix[item_id]
-        indices = np.argsort(row)[::-1][:n]
-        return indices.tolist()
+        """
+        Return the n most similar items to item_id, best first.
+
+        n is capped at the width of the neighbor index (max_neighbors).
+        """
+        return self.neighbor_indices[item_id, :n].tolist()
+
+    def get_topn_many(self, item_ids, n=10) -> np.ndarray:
+        """
+        Batched get_topn: an int32 array of shape (len(item_ids), n).
+        """
+        return self.neighbor_indices[np.asarray(item_ids, dtype=np.int64), :n]
 
     def predict(self, user_id):
+        return self.recommend(user_id, k=None)
+
+    def recommend(self, user_id, k: Optional[int] = DEFAULT_TOP_K):
+        count("content.recommend_calls")
         interactions = self.user_interactions.get(user_id, [])
         interacted = {iid for iid, _ in interactions}
-        positive = {iid for iid, r in interactions if r >= self.threshold}
+        positive = np.array(
+            sorted({iid for iid, r in interactions if r >= self.threshold}),
+            dtype=np.int64,
+        )
+        if positive.size == 0:
+            return []
 
         # gather similar candidates
-        candidates = set()
-        for iid in positive:
-            candidates.update(self.get_topn(iid))
-        candidates -= interacted
+        candidates = np.unique(self.get_topn_many(positive))
+        candidates = candidates[~np.isin(candidates, list(interacted))]
+        count("content.candidates_scored", len(candidates))
 
         # score by max similarity across positive items
-        item_scores = {}
-        for c in candidates:
-            item_scores[c] = max(self.score_matrix[p, c] for p in positive)
-        # sort descending
-        return sorted(item_scores.items(), key=lambda x: x[1], reverse=True)
+        if self.score_matrix is not None:
+            scores = self.score_matrix[np.ix_(positive, candidates)].max(axis=0)
+        else:
+            scores = self._neighbor_scores(positive)[candidates]
+        # top-k descending
+        order = top_k_indices(scores, k)
+        return list(zip(candidates[order].tolist(), scores[order].tolist()))
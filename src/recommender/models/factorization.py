@@ -0,0 +1,380 @@
+"""
+In-package biased matrix factorization trained on a CSR rating matrix.
+
+Parameters mirror surprise's SVD: a rating is estimated as
+global_mean + bu[u] + bi[i] + pu[u] . qi[i] (just pu[u] . qi[i] when unbiased),
+and the fitted pu, qi, bu, bi and global_mean attributes have the same shapes
+and meaning, so SVDRecommender can use either model interchangeably.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from ..config import (
+    ALS_BLOCK_ENTRIES,
+    ALS_BLOCK_RATINGS,
+    ALS_CG_STEPS,
+    ALS_DENSE_RATIO,
+)
+
+FACTORIZATION_METHODS = ("als", "sgd")
+
+
+class MatrixFactorization:
+    """
+    Biased matrix factorization with ALS or mini-batch SGD training.
+
+    Parameters:
+        n_factors: number of latent factors
+        n_epochs: ALS sweeps (users then items) or SGD passes over the ratings
+        method: "als" for alternating least squares, "sgd" for mini-batch SGD
+        reg: L2 regularization of factors and biases
+        lr: SGD learning rate (unused by ALS)
+        biased: learn a global mean and user/item biases
+        batch_size: ratings per SGD step
+        block_size: users (or items) per ALS solve block
+        block_ratings: at most this many ratings per ALS solve block (a row
+            with more gets a block of its own)
+        cg_steps: conjugate gradient steps per ALS row solve, warm-started
+            from the previous epoch's factors; None solves every row exactly
+        n_threads: worker threads for ALS blocks (default: CPU count)
+        init_std: standard deviation of the random factor initialisation
+        seed: random state for initialisation and SGD shuffling
+    """
+
+    def __init__(
+        self,
+        n_factors: int = 100,
+        n_epochs: int = 20,
+        method: str = "als",
+        reg: float = 0.02,
+        lr: float = 0.005,
+        biased: bool = True,
+        batch_size: int = 1024,
+        block_size: int = 512,
+        block_ratings: int = ALS_BLOCK_RATINGS,
+        cg_steps: Optional[int] = ALS_CG_STEPS,
+        n_threads: Optional[int] = None,
+        init_std: float = 0.1,
+        seed: Optional[int] = None,
+    ):
+        if method not in FACTORIZATION_METHODS:
+            raise ValueError(
+                f"Unknown method {method!r}; expected one of {FACTORIZATION_METHODS}"
+            )
+        self.n_factors = n_factors
+        self.n_epochs = n_epochs
+        self.method = method
+        self.reg = reg
+        self.lr = lr
+        self.biased = biased
+        self.batch_size = batch_size
+        self.block_size = block_size
+        self.block_ratings = block_ratings
+        self.cg_steps = cg_steps
+        self.n_threads = n_threads
+        self.init_std = init_std
+        self.seed = seed
+
+    def fit(self, ratings: sp.csr_matrix) -> "MatrixFactorization":
+        """
+        Fit on an (n_users, n_items) CSR matrix whose stored entries are ratings.
+        """
+        ratings = sp.csr_matrix(ratings, dtype=np.float64)
+        n_users, n_items = ratings.shape
+        rng = np.random.default_rng(self.seed)
+
+        self.global_mean = float(ratings.data.mean()) if ratings.nnz else 0.0
+        self.pu = rng.normal(0, self.init_std, (n_users, self.n_factors))
+        self.qi = rng.normal(0, self.init_std, (n_items, self.n_factors))
+        self.bu = np.zeros(n_users)
+        self.bi = np.zeros(n_items)
+
+        if self.method == "als":
+            self._fit_als(ratings)
+        else:
+            self._fit_sgd(ratings, rng)
+        return self
+
+    # -- ALS ------------------------------------------------------------------
+
+    def _fit_als(self, ratings: sp.csr_matrix) -> None:
+        by_item = ratings.T.tocsr()
+        offset = self.global_mean if self.biased else 0.0
+        n_threads = self.n_threads or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=n_threads) as pool:
+            for _ in range(self.n_epochs):
+                self._als_half_step(
+                    pool, ratings, self.qi, self.bi, self.pu, self.bu, offset
+                )
+                self._als_half_step(
+                    pool, by_item, self.pu, self.bu, self.qi, self.bi, offset
+                )
+
+    def _als_half_step(
+        self,
+        pool: ThreadPoolExecutor,
+        ratings: sp.csr_matrix,
+        fixed_factors: np.ndarray,
+        fixed_bias: np.ndarray,
+        factors: np.ndarray,
+        bias: np.ndarray,
+        offset: float,
+    ) -> None:
+        """
+        Solve every row's factors (and bias) against the fixed other side.
+
+        Each row is a ridge regression of its ratings, minus the global mean
+        and the other side's biases, on the other side's factors (plus a
+        constant column for the bias). With cg_steps, each regression takes
+        that many conjugate gradient steps from the row's current solution
+        instead of being solved exactly. Rows are solved in blocks of at most
+        block_size rows and block_ratings ratings, and blocks run on the
+        thread pool. When at least 1 / ALS_DENSE_RATIO of all (row, column)
+        pairs are rated, as in Jester's 100-joke matrix, conjugate gradient
+        blocks are instead dense slices of about ALS_BLOCK_ENTRIES pairs.
+        """
+        design = _design(fixed_factors, self.biased)
+        residual = _residual(ratings, fixed_bias, offset, self.biased)
+
+        def solve_block(bounds: Tuple[int, int]) -> None:
+            start, stop = bounds
+            if self.cg_steps is None:
+                solution = _ridge_solve(
+                    ratings, design, residual, self.reg, start, stop
+                )
+            else:
+                current = factors[start:stop]
+                if self.biased:
+                    current = np.hstack([current, bias[start:stop, None]])
+                solution = _ridge_cg(
+                    design,
+                    residual,
+                    self.reg,
+                    start,
+                    stop,
+                    current,
+                    self.cg_steps,
+                    dense,
+                )
+            factors[start:stop] = solution[:, : self.n_factors]
+            if self.biased:
+                bias[start:stop] = solution[:, -1]
+
+        n_rows, n_cols = ratings.shape
+        dense = (
+            self.cg_steps is not None
+            and ratings.nnz > 0
+            and n_rows * n_cols <= ALS_DENSE_RATIO * ratings.nnz
+        )
+        if dense:
+            step = max(1, ALS_BLOCK_ENTRIES // n_cols)
+            bounds = [(s, min(s + step, n_rows)) for s in range(0, n_rows, step)]
+        else:
+            bounds = _row_blocks(ratings.indptr, self.block_size, self.block_ratings)
+        list(pool.map(solve_block, bounds))
+
+    # -- SGD ------------------------------------------------------------------
+
+    def _fit_sgd(self, ratings: sp.csr_matrix, rng: np.random.Generator) -> None:
+        """
+        Mini-batch version of surprise's SVD updates.
+
+        Each step computes the errors of batch_size ratings at once and applies
+        the per-rating gradients, summed per user and per item.
+        """
+        users = np.repeat(np.arange(ratings.shape[0]), np.diff(ratings.indptr))
+        items = ratings.indices
+        values = ratings.data
+        offset = self.global_mean if self.biased else 0.0
+        lr, reg = self.lr, self.reg
+
+        for _ in range(self.n_epochs):
+            order = rng.permutation(ratings.nnz)
+            for start in range(0, ratings.nnz, self.batch_size):
+                batch = order[start : start + self.batch_size]
+                u, i = users[batch], items[batch]
+                pu, qi = self.pu[u], self.qi[i]
+                err = values[batch] - offset - np.einsum("ij,ij->i", pu, qi)
+                if self.biased:
+                    err -= self.bu[u] + self.bi[i]
+                    self.bu += lr * np.bincount(
+                        u, err - reg * self.bu[u], minlength=len(self.bu)
+                    )
+                    self.bi += lr * np.bincount(
+                        i, err - reg * self.bi[i], minlength=len(self.bi)
+                    )
+                _scatter_add(self.pu, u, lr * (err[:, None] * qi - reg * pu))
+                _scatter_add(self.qi, i, lr * (err[:, None] * pu - reg * qi))
+
+
+def fold_in(
+    ratings: sp.csr_matrix,
+    qi: np.ndarray,
+    bi: np.ndarray,
+    global_mean: float,
+    reg: float,
+    biased: bool = True,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Closed-form user factors and biases against frozen item parameters.
+
+    Each row of ratings (columns follow qi/bi) gets the exact ridge solution
+    that an ALS user step approximates, so the result does not depend on which
+    trainer fitted qi/bi.
+    A row without ratings gets zero factors and bias.
+
+    Returns:
+        (pu, bu) with one row / entry per row of ratings
+    """
+    ratings = sp.csr_matrix(ratings, dtype=np.float64)
+    offset = global_mean if biased else 0.0
+    design = _design(qi, biased)
+    residual = _residual(ratings, bi, offset, biased)
+    solution = _ridge_solve(ratings, design, residual, reg, 0, ratings.shape[0])
+    n_factors = qi.shape[1]
+    bu = solution[:, -1].copy() if biased else np.zeros(ratings.shape[0])
+    return solution[:, :n_factors].copy(), bu
+
+
+def _design(fixed_factors: np.ndarray, biased: bool) -> np.ndarray:
+    """
+    Regressors of a ridge step: the fixed factors, plus a ones column for the bias.
+    """
+    if biased:
+        return np.hstack([fixed_factors, np.ones((len(fixed_factors), 1))])
+    return fixed_factors
+
+
+def _residual(
+    ratings: sp.csr_matrix, fixed_bias: np.ndarray, offset: float, biased: bool
+) -> sp.csr_matrix:
+    """
+    Ratings with the global mean and the fixed side's biases removed.
+    """
+    residual = ratings.data - offset
+    if biased:
+        residual = residual - fixed_bias[ratings.indices]
+    return sp.csr_matrix(
+        (residual, ratings.indices, ratings.indptr), shape=ratings.shape
+    )
+
+
+def _ridge_solve(
+    ratings: sp.csr_matrix,
+    design: np.ndarray,
+    residual: sp.csr_matrix,
+    reg: float,
+    start: int,
+    stop: int,
+) -> np.ndarray:
+    """
+    Solve rows start:stop as ridge regressions of residual on design.
+
+    Gram matrices are accumulated per row, then all rows are solved with one
+    batched np.linalg.solve.
+    """
+    dim = design.shape[1]
+    indptr, indices = ratings.indptr, ratings.indices
+    gram = np.empty((stop - start, dim, dim))
+    for b, row in enumerate(range(start, stop)):
+        x = design[indices[indptr[row] : indptr[row + 1]]]
+        gram[b] = x.T @ x
+    gram += reg * np.eye(dim)
+    rhs = residual[start:stop] @ design
+    return np.linalg.solve(gram, rhs[..., None])[..., 0]
+
+
+def _row_blocks(
+    indptr: np.ndarray, max_rows: int, max_ratings: int
+) -> List[Tuple[int, int]]:
+    """
+    (start, stop) row ranges of at most max_rows rows and, unless a single row
+    has more, max_ratings ratings.
+    """
+    bounds = []
+    start, n_rows = 0, len(indptr) - 1
+    while start < n_rows:
+        stop = int(np.searchsorted(indptr, indptr[start] + max_ratings, "right")) - 1
+        stop = min(max(stop, start + 1), start + max_rows, n_rows)
+        bounds.append((start, stop))
+        start = stop
+    return bounds
+
+
+def _ridge_cg(
+    design: np.ndarray,
+    residual: sp.csr_matrix,
+    reg: float,
+    start: int,
+    stop: int,
+    x0: np.ndarray,
+    n_steps: int,
+    dense: bool = False,
+) -> np.ndarray:
+    """
+    Approximate the ridge solutions of rows start:stop with n_steps conjugate
+    gradient steps from x0, all rows at once.
+
+    A row's system is (X'X + reg I) w = X'r, with X the design rows of its
+    rated columns; products with X'X are taken as X'(X v), so no Gram matrix
+    is formed and a step costs O(ratings * dim) instead of O(dim^3) per row.
+    With dense, X v is computed for every (row, column) pair by one matmul and
+    masked to the rated pairs, in float32, which beats gathering a design row
+    per rating when most pairs are rated.
+    """
+    block = residual[start:stop]
+    rows = np.repeat(np.arange(stop - start), np.diff(block.indptr))
+    if dense:
+        # float32 throughout: the matmuls dominate and run twice as fast
+        design = design.astype(np.float32)
+        rated = np.zeros(block.shape, dtype=np.float32)
+        rated[rows, block.indices] = 1.0
+        values = np.zeros(block.shape, dtype=np.float32)
+        values[rows, block.indices] = block.data
+        rhs = values @ design
+
+        def apply(v: np.ndarray) -> np.ndarray:
+            return ((v @ design.T) * rated) @ design + reg * v
+
+    else:
+        x_rows = design[block.indices]
+        rhs = block @ design
+
+        def apply(v: np.ndarray) -> np.ndarray:
+            xv = np.einsum("ij,ij->i", x_rows, v[rows])
+            gram_v = sp.csr_matrix((xv, block.indices, block.indptr), shape=block.shape)
+            return gram_v @ design + reg * v
+
+    x = np.array(x0, dtype=design.dtype)
+    r = rhs - apply(x)
+    p = r.copy()
+    rr = np.einsum("ij,ij->i", r, r)
+    for _ in range(n_steps):
+        ap = apply(p)
+        pap = np.einsum("ij,ij->i", p, ap)
+        # converged rows (rr == 0) have p == 0: keep them where they are
+        alpha = np.divide(rr, pap, out=np.zeros_like(rr), where=pap > 0)
+        x += alpha[:, None] * p
+        r -= alpha[:, None] * ap
+        rr_next = np.einsum("ij,ij->i", r, r)
+        beta = np.divide(rr_next, rr, out=np.zeros_like(rr), where=rr > 0)
+        p = r + beta[:, None] * p
+        rr = rr_next
+    return x
+
+
+def _scatter_add(target: np.ndarray, rows: np.ndarray, values: np.ndarray) -> None:
+    """
+    target[rows] += values, summing repeated rows (a fast np.add.at for 2-D).
+    """
+    unique, inverse = np.unique(rows, return_inverse=True)
+    summed = sp.csr_matrix(
+        (np.ones(len(rows)), (inverse, np.arange(len(rows)))),
+        shape=(len(unique), len(rows)),
+    )
+    target[unique] += summed @ values
@@ -1,4 +1,10 @@
-from .base import BaseRecommender
+from typing import Optional
+
+import numpy as np
+
+from ..config import DEFAULT_TOP_K, RECOMMEND_BATCH_SIZE
+from ..utils.profiling import count
+from .base import BaseRecommender, group_by_user, merge_ratings, top_k_indices
 from .content import ContentBasedRecommender
 from .svd import SVDRecommender
 
@@ -16,6 +22,7 @@ class HybridRecommender(BaseRecommender):
         self.threshold = threshold
         self.n_similar = n_similar
         self.user_interactions = {}
+        self._content_cols = None
 
     def fit(self, trainset):
         # fit both
@@ -29,36 +36,116 @@ class HybridRecommender(BaseRecommender):
                 for inner_iid, rating in interactions
             ]
             self.user_interactions[raw_uid] = raw_inter
+        self._content_cols = None
         return self
 
-    def predict(self, user_id):
+    def fold_in_user(self, user_id, ratings):
+        """
+        Add or update one user from (item_id, rating) pairs without retraining.
+        """
+        return self.partial_fit((user_id, iid, r) for iid, r in ratings)
+
+    def partial_fit(self, new_ratings):
+        """
+        Fold (user_id, item_id, rating) triples into both models and the user
+        interactions; the SVD model re-solves the affected users' factors.
+        """
+        new_ratings = list(new_ratings)
+        self.svd_rec.partial_fit(new_ratings)
+        self.content_rec.partial_fit(new_ratings)
+        for user_id, ratings in group_by_user(new_ratings).items():
+            self.user_interactions[user_id] = merge_ratings(
+                self.user_interactions.get(user_id, []), ratings
+            )
+        return self
+
+    def _item_columns(self, item_ids) -> np.ndarray:
+        """
+        Map raw item ids to SVD score columns; ids the SVD model lacks map to -1.
+        """
+        index = self.svd_rec.item_index
+        return np.array([index.get(i, -1) for i in item_ids], dtype=np.int64)
+
+    def _content_columns(self) -> np.ndarray:
+        """
+        Lookup array from content item index to SVD score column (-1 if absent).
+        """
+        if self._content_cols is None:
+            n_content = self.content_rec.neighbor_indices.shape[0]
+            self._content_cols = self._item_columns(range(n_content))
+        return self._content_cols
+
+    def predict(self, user_id, k: Optional[int] = None):
+        """
+        Rank items for a user: content-derived candidates first, then the rest.
+
+        Both groups keep only items whose SVD estimate reaches the threshold and
+        are ordered by that estimate; content candidates the SVD model has no
+        factors for are scored with its bias-only estimate. With k set, only the first k are returned.
+        """
+        return self.recommend(user_id, k)
+
+    def recommend(self, user_id, k: Optional[int] = DEFAULT_TOP_K):
+        return self.recommend_many([user_id], k)[0]
+
+    def recommend_many(self, user_ids, k: Optional[int] = DEFAULT_TOP_K):
+        user_ids = list(user_ids)
+        count("hybrid.recommend_calls")
+        count("hybrid.users_ranked", len(user_ids))
+        results = []
+        for start in range(0, len(user_ids), RECOMMEND_BATCH_SIZE):
+            batch = user_ids[start : start + RECOMMEND_BATCH_SIZE]
+            for user_id, scores in zip(batch, self.svd_rec.predict_batch(batch)):
+                results.append(self._rank_row(user_id, scores, k))
+        return results
+
+    def _rank_row(self, user_id, scores: np.ndarray, k: Optional[int]):
+        """
+        Rank one user's row of SVD estimates (see predict for the ordering).
+        """
         interactions = self.user_interactions.get(user_id, [])
-        interacted = {iid for iid, _ in interactions}
-        positive = {iid for iid, r in interactions if r >= self.threshold}
-
-        # content-based candidates
-        content_cands = set()
-        for iid in positive:
-            content_cands.update(self.content_rec.get_topn(iid, n=self.n_similar))
-        content_cands -= interacted
-
-        # rerank by SVD
-        content_scores = {
-            i: self.svd_rec.predict_one(user_id, i) for i in content_cands
-        }
-        # only keep those above threshold
-        content_scores = {
-            i: s for i, s in content_scores.items() if s >= self.threshold
-        }
-        items_by_content = sorted(
-            content_scores.items(), key=lambda x: x[1], reverse=True
-        )
+        available = np.isfinite(scores)
+        interacted = self._item_columns([iid for iid, _ in interactions])
+        available[interacted[interacted >= 0]] = False
+        eligible = available & (scores >= self.threshold)
 
-        # remaining items
-        all_items = set(self.svd_rec.items)
-        rest = all_items - interacted - set(i for i, _ in items_by_content)
-        rest_scores = {i: self.svd_rec.predict_one(user_id, i) for i in rest}
-        rest_scores = {i: s for i, s in rest_scores.items() if s >= self.threshold}
-        rest_items = sorted(rest_scores.items(), key=lambda x: x[1], reverse=True)
+        # content-based candidates; those the SVD model has no column for get
+        # its bias-only estimate, as predict_one gives them
+        positive = [iid for iid, r in interactions if r >= self.threshold]
+        is_content = np.zeros(len(scores), dtype=bool)
+        extra_ids, extra_scores = [], []
+        if positive:
+            cands = self.content_rec.get_topn_many(positive, n=self.n_similar).ravel()
+            cols = self._content_columns()[cands]
+            is_content[cols[cols >= 0]] = True
+            interacted_ids = {iid for iid, _ in interactions}
+            for iid in np.unique(cands[cols < 0]).tolist():
+                if iid in interacted_ids:
+                    continue
+                est = self.svd_rec.predict_one(user_id, iid)
+                if est >= self.threshold:
+                    extra_ids.append(iid)
+                    extra_scores.append(est)
+        content_cols = np.flatnonzero(eligible & is_content)
+        rest_cols = np.flatnonzero(eligible & ~is_content)
+        count("hybrid.content_candidates", len(content_cols) + len(extra_ids))
+        count(
+            "hybrid.candidates_scored",
+            len(content_cols) + len(extra_ids) + len(rest_cols),
+        )
 
-        return items_by_content + rest_items
+        # rerank each group by SVD, content candidates first
+        items = self.svd_rec.items
+        content_ids = [items[c] for c in content_cols] + extra_ids
+        content_scores = np.concatenate([scores[content_cols], extra_scores])
+        ranked = [
+            (content_ids[i], float(content_scores[i]))
+            for i in top_k_indices(content_scores, k)
+        ]
+        if k is None or len(ranked) < k:
+            n_rest = None if k is None else k - len(ranked)
+            ranked += [
+                (items[c], float(scores[c]))
+                for c in rest_cols[top_k_indices(scores[rest_cols], n_rest)]
+            ]
+        return ranked
@@ -2,12 +2,31 @@
 SVD-based collaborative filtering recommender.
 """
 
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
 from surprise import SVD
 
-from .base import BaseRecommender
+from ..config import DEFAULT_TOP_K, RATING_MAX, RATING_MIN, RECOMMEND_BATCH_SIZE
+from ..data.interactions import SparseInteractions, as_interactions
+from ..utils.profiling import count
+from .base import BaseRecommender, group_by_user, top_k_indices
+from .factorization import FACTORIZATION_METHODS, MatrixFactorization, fold_in
 
 
 class SVDRecommender(BaseRecommender):
+    """
+    Matrix factorization recommender.
+
+    backend selects the trainer: "surprise" fits surprise's SVD on a surprise
+    Trainset; "als" and "sgd" fit the in-package MatrixFactorization on a CSR
+    matrix built from a Trainset or SparseInteractions (n_threads is used by
+    ALS). All backends expose the same pu/qi/bu/bi/global_mean parameters.
+    seed fixes the random initialisation (and SGD shuffling) of every
+    backend; None draws a fresh one per fit.
+    """
+
     def __init__(
         self,
         n_factors=5,
@@ -15,39 +34,362 @@ class SVDRecommender(BaseRecommender):
         lr_all=0.02,
         reg_all=0.03,
         biased=True,
+        backend="surprise",
+        n_threads=None,
+        seed=None,
     ):
-        self.model = SVD(
-            n_factors=n_factors,
-            n_epochs=n_epochs,
-            lr_all=lr_all,
-            reg_all=reg_all,
-            biased=biased,
-        )
+        if backend == "surprise":
+            self.model = SVD(
+                n_factors=n_factors,
+                n_epochs=n_epochs,
+                lr_all=lr_all,
+                reg_all=reg_all,
+                biased=biased,
+                random_state=seed,
+            )
+        elif backend in FACTORIZATION_METHODS:
+            self.model = MatrixFactorization(
+                n_factors=n_factors,
+                n_epochs=n_epochs,
+                method=backend,
+                reg=reg_all,
+                lr=lr_all,
+                biased=biased,
+                n_threads=n_threads,
+                seed=seed,
+            )
+        else:
+            raise ValueError(
+                f"Unknown backend {backend!r}; expected 'surprise' or one of "
+                f"{FACTORIZATION_METHODS}"
+            )
+        self.backend = backend
+        self.biased = biased
+        self.reg_all = reg_all
         self.trainset = None
         self.items = []
+        self._user_buffer = None
+        self._rating_overrides = {}
 
     def fit(self, trainset):
-        self.model.fit(trainset)
+        ratings = as_interactions(trainset)
+        if self.backend == "surprise":
+            if isinstance(trainset, SparseInteractions):
+                raise TypeError(
+                    "The surprise backend needs a surprise Trainset; "
+                    "use backend='als' or 'sgd' to fit SparseInteractions."
+                )
+            self.model.fit(trainset)
+            global_mean = trainset.global_mean
+        else:
+            self.model.fit(ratings.matrix)
+            global_mean = self.model.global_mean
         self.trainset = trainset
         # record all raw item ids
-        inner_items = trainset.all_items()
-        self.items = [trainset.to_raw_iid(i) for i in inner_items]
+        self.items = ratings.item_ids.tolist()
+        self._extract_factors(
+            ratings,
+            global_mean,
+            getattr(trainset, "rating_scale", (RATING_MIN, RATING_MAX)),
+        )
+        return self
+
+    def _extract_factors(self, ratings: SparseInteractions, global_mean, rating_scale):
+        """
+        Copy the fitted parameters out of the model into plain arrays.
+
+        Rows of pu/bu and self.ratings follow the rows of ratings (surprise
+        inner user ids for a Trainset), columns of qi/bi and self.ratings
+        follow self.items. Ratings changed by partial_fit are kept per user
+        in _rating_overrides on top of self.ratings.
+        """
+        self.pu = self.model.pu
+        self.qi = self.model.qi
+        self.bu = self.model.bu
+        self.bi = self.model.bi
+        self.global_mean = global_mean
+        self.rating_scale = rating_scale
+        self.user_index = {raw: u for u, raw in enumerate(ratings.user_ids.tolist())}
+        self.item_index = {raw: i for i, raw in enumerate(self.items)}
+        self.ratings = ratings.matrix
+        self._user_buffer = None
+        self._rating_overrides = {}
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """
+        Fitted parameters as plain arrays plus JSON metadata, for save_bundle.
+        """
+        ratings = self._merged_ratings()
+        arrays = {
+            "pu": self.pu,
+            "qi": self.qi,
+            "bu": self.bu,
+            "bi": self.bi,
+            "user_ids": np.asarray(list(self.user_index)),
+            "item_ids": np.asarray(self.items),
+            "ratings_indptr": ratings.indptr,
+            "ratings_indices": ratings.indices,
+            "ratings_data": ratings.data,
+        }
+        metadata = {
+            "backend": self.backend,
+            "biased": self.biased,
+            "reg_all": self.reg_all,
+            "global_mean": float(self.global_mean),
+            "rating_scale": [float(v) for v in self.rating_scale],
+        }
+        return arrays, metadata
+
+    @classmethod
+    def from_arrays(
+        cls, arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]
+    ) -> "SVDRecommender":
+        """
+        Rebuild a fitted recommender from to_arrays output (arrays may be
+        read-only memory-maps; fold-in copies what it modifies).
+        """
+        rec = cls(
+            n_factors=arrays["pu"].shape[1],
+            reg_all=metadata["reg_all"],
+            biased=metadata["biased"],
+            backend=metadata["backend"],
+        )
+        rec.pu, rec.qi = arrays["pu"], arrays["qi"]
+        rec.bu, rec.bi = arrays["bu"], arrays["bi"]
+        rec.global_mean = metadata["global_mean"]
+        rec.rating_scale = tuple(metadata["rating_scale"])
+        rec.items = arrays["item_ids"].tolist()
+        rec.user_index = {raw: u for u, raw in enumerate(arrays["user_ids"].tolist())}
+        rec.item_index = {raw: i for i, raw in enumerate(rec.items)}
+        rec.ratings = sp.csr_matrix(
+            (
+                arrays["ratings_data"],
+                arrays["ratings_indices"],
+                arrays["ratings_indptr"],
+            ),
+            shape=(len(rec.user_index), len(rec.items)),
+        )
+        rec._user_buffer = None
+        rec._rating_overrides = {}
+        return rec
+
+    def predict_batch(self, user_ids) -> np.ndarray:
+        """
+        Score every item for a batch of raw user ids in one matrix product.
+
+        Estimates follow surprise's SVD (global mean + biases + pu . qi, clipped
+        to the rating scale); users unknown to the trainset get the bias-only
+        estimate, as surprise gives them.
+
+        Returns:
+            array of shape (len(user_ids), len(self.items)) whose columns follow
+            self.items; items a known user has already rated are set to -inf.
+        """
+        rows = np.array([self.user_index.get(u, -1) for u in user_ids], dtype=np.int64)
+        known = rows >= 0
+        n_items = len(self.items)
+        count("svd.predict_batch_calls")
+        count("svd.users_scored", len(rows))
+        count("svd.unknown_users", int((~known).sum()))
+
+        scores = np.empty((len(rows), n_items), dtype=float)
+        if self.biased:
+            scores[:] = self.global_mean + self.bi
+            scores[known] = (
+                self.global_mean + self.bu[rows[known], None] + self.bi[None, :]
+            )
+        else:
+            scores[:] = self.global_mean
+            scores[known] = 0.0
+        scores[known] += self.pu[rows[known]] @ self.qi.T
+        np.clip(scores, *self.rating_scale, out=scores)
+
+        # seen columns: users changed by partial_fit from their overrides,
+        # the rest gathered straight from the CSR arrays
+        known_pos, known_rows = np.flatnonzero(known), rows[known]
+        overrides = self._rating_overrides
+        if overrides:
+            changed = np.array(
+                [r in overrides for r in known_rows.tolist()], dtype=bool
+            )
+            for pos, row in zip(
+                known_pos[changed].tolist(), known_rows[changed].tolist()
+            ):
+                scores[pos, overrides[row][0]] = -np.inf
+            known_pos, known_rows = known_pos[~changed], known_rows[~changed]
+        starts = self.ratings.indptr[known_rows]
+        counts = self.ratings.indptr[known_rows + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        cols = self.ratings.indices[offsets + np.arange(counts.sum())]
+        scores[np.repeat(known_pos, counts), cols] = -np.inf
+        return scores
+
+    def fold_in_user(self, user_id, ratings):
+        """
+        Add or update one user from (item_id, rating) pairs without retraining.
+
+        See partial_fit.
+        """
+        return self.partial_fit((user_id, iid, r) for iid, r in ratings)
+
+    def partial_fit(self, new_ratings):
+        """
+        Fold (user_id, item_id, rating) triples into the fitted model.
+
+        Each affected user's factors and bias are re-solved in closed form
+        (ridge regression with penalty reg_all) from all of their ratings,
+        against the frozen item factors; new users are appended. A new rating
+        of an already rated item replaces it. Items unknown to the model have
+        no factors and are ignored.
+
+        Cost depends on the affected users only: pu/bu are copied once (when
+        read-only) and then grow geometrically, and the affected users' rating
+        rows are kept as overrides instead of rebuilding self.ratings.
+        """
+        grouped = group_by_user(
+            (uid, iid, r) for uid, iid, r in new_ratings if iid in self.item_index
+        )
+        if not grouped:
+            return self
+        users = list(grouped)
+        n_known = len(self.user_index)
+        new_users = [u for u in users if u not in self.user_index]
+        new_rows = {u: n_known + j for j, u in enumerate(new_users)}
+        rows = np.array(
+            [self.user_index.get(u, new_rows.get(u)) for u in users], dtype=np.int64
+        )
+
+        # merged rating rows of the affected users, in the order of users
+        new_cols, new_data = [], []
+        for user, row in zip(users, rows.tolist()):
+            cols, data = self._user_ratings(row)
+            merged = dict(zip(cols.tolist(), data.tolist()))
+            merged.update((self.item_index[iid], r) for iid, r in grouped[user])
+            cols = np.fromiter(merged.keys(), dtype=np.int32, count=len(merged))
+            data = np.fromiter(merged.values(), dtype=np.float32, count=len(merged))
+            order = np.argsort(cols)
+            new_cols.append(cols[order])
+            new_data.append(data[order])
+        counts = np.array([len(c) for c in new_cols])
+        indptr = np.concatenate([[0], np.cumsum(counts)])
+        updated = sp.csr_matrix(
+            (np.concatenate(new_data), np.concatenate(new_cols), indptr),
+            shape=(len(users), len(self.items)),
+        )
+
+        pu, bu = fold_in(
+            updated, self.qi, self.bi, self.global_mean, self.reg_all, self.biased
+        )
+
+        # the solve succeeded: only now change the model's state
+        self._reserve_users(n_known + len(new_users))
+        self.pu[rows] = pu
+        self.bu[rows] = bu
+        self.user_index.update(new_rows)
+        for row, cols, data in zip(rows.tolist(), new_cols, new_data):
+            self._rating_overrides[row] = (cols, data)
         return self
 
+    def _reserve_users(self, n_users: int) -> None:
+        """
+        Make pu/bu writable views of n_users rows. The backing arrays are
+        copied (also from read-only memory-maps loaded from a bundle) only
+        when they are not writable or run out of rows, doubling capacity.
+        """
+        buffer = self._user_buffer
+        n_old = len(self.bu)
+        if buffer is None or self.pu.base is not buffer[0] or len(buffer[1]) < n_users:
+            capacity = n_users if n_users == n_old else max(n_users, 2 * n_old)
+            pu = np.zeros((capacity, self.pu.shape[1]), dtype=self.pu.dtype)
+            bu = np.zeros(capacity, dtype=self.bu.dtype)
+            pu[:n_old] = self.pu
+            bu[:n_old] = self.bu
+            buffer = self._user_buffer = (pu, bu)
+        self.pu, self.bu = buffer[0][:n_users], buffer[1][:n_users]
+
+    def _user_ratings(self, row: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (columns, ratings) currently recorded for a user row.
+        """
+        overrides = self._rating_overrides
+        if row in overrides:
+            return overrides[row]
+        if row < self.ratings.shape[0]:
+            span = slice(self.ratings.indptr[row], self.ratings.indptr[row + 1])
+            return self.ratings.indices[span], self.ratings.data[span]
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+    def _merged_ratings(self) -> sp.csr_matrix:
+        """
+        self.ratings with the partial_fit overrides applied, one row per user.
+        """
+        overrides = self._rating_overrides
+        n_users = len(self.user_index)
+        if not overrides and self.ratings.shape[0] == n_users:
+            return self.ratings
+        # untouched rows as they were, then the overridden rows (a stored 0.0
+        # is a rating, so rows are dropped by mask rather than zeroed out)
+        n_base = self.ratings.shape[0]
+        keep = np.ones(n_base, dtype=bool)
+        keep[[row for row in overrides if row < n_base]] = False
+        base_rows = np.repeat(np.arange(n_base), np.diff(self.ratings.indptr))
+        kept = keep[base_rows]
+        changed = sorted(overrides)
+        return sp.csr_matrix(
+            (
+                np.concatenate(
+                    [self.ratings.data[kept]] + [overrides[r][1] for r in changed]
+                ),
+                (
+                    np.concatenate(
+                        [base_rows[kept]]
+                        + [np.full(len(overrides[r][0]), r) for r in changed]
+                    ),
+                    np.concatenate(
+                        [self.ratings.indices[kept]]
+                        + [overrides[r][0] for r in changed]
+                    ),
+                ),
+            ),
+            shape=(n_users, len(self.items)),
+        )
+
     def predict(self, user_id):
-        try:
-            inner_uid = self.trainset.to_inner_uid(user_id)
-        except ValueError:
+        return self.recommend(user_id, k=None)
+
+    def recommend(self, user_id, k: Optional[int] = DEFAULT_TOP_K):
+        return self.recommend_many([user_id], k)[0]
+
+    def recommend_many(self, user_ids, k: Optional[int] = DEFAULT_TOP_K):
+        user_ids = list(user_ids)
+        results = []
+        for start in range(0, len(user_ids), RECOMMEND_BATCH_SIZE):
+            batch = user_ids[start : start + RECOMMEND_BATCH_SIZE]
+            for user_id, scores in zip(batch, self.predict_batch(batch)):
+                results.append(self._rank_row(user_id, scores, k))
+        return results
+
+    def _rank_row(self, user_id, scores: np.ndarray, k: Optional[int]):
+        if user_id not in self.user_index:
             return []
-        seen = {iid for iid, _ in self.trainset.ur[inner_uid]}
-        preds = []
-        for item in self.items:
-            inner_iid = self.trainset.to_inner_iid(item)
-            if inner_iid in seen:
-                continue
-            est = self.model.predict(user_id, item).est
-            preds.append((item, est))
-        return sorted(preds, key=lambda x: x[1], reverse=True)
+        n_unseen = int(np.isfinite(scores).sum())
+        order = top_k_indices(scores, n_unseen if k is None else min(k, n_unseen))
+        return [(self.items[i], float(scores[i])) for i in order]
 
     def predict_one(self, user_id, item_id):
-        return self.model.predict(user_id, item_id).est
+        u = self.user_index.get(user_id)
+        i = self.item_index.get(item_id)
+        if self.biased:
+            est = self.global_mean
+            if u is not None:
+                est += self.bu[u]
+            if i is not None:
+                est += self.bi[i]
+            if u is not None and i is not None:
+                est += np.dot(self.qi[i], self.pu[u])
+        elif u is not None and i is not None:
+            est = np.dot(self.qi[i], self.pu[u])
+        else:
+            est = self.global_mean
+        lower, upper = self.rating_scale
+        return float(min(upper, max(lower, est)))
@@ -0,0 +1,317 @@
+"""
+Parallel hyperparameter search over SVDRecommender and HybridRecommender.
+
+The train ratings of a split are divided again into an inner train set and a
+validation set. That data and the content neighbor index are written once as
+a bundle (see utils.io.save_bundle), and every worker of the process pool
+memory-maps the same read-only copy.
+
+Configurations are evaluated in two rungs:
+    1. every configuration is scored on a slice of the validation users;
+    2. only the best keep_fraction of them are scored on all of them.
+Configurations that share SVD parameters share one SVD fit, so sweeping
+threshold and n_similar costs little beyond the SVD grid. That fit is seeded
+and made in the first rung; the second rung reuses its saved factors, so
+results do not depend on n_jobs or on which worker ran a task.
+"""
+
+import contextlib
+import itertools
+import json
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..config import (
+    DEFAULT_TOP_K,
+    TUNE_KEEP_FRACTION,
+    TUNE_SLICE_FRACTION,
+    TUNE_VALIDATION_SIZE,
+)
+from ..data.splitter import RatingSplit, split_indices
+from ..evaluation.evaluator import Evaluator
+from ..utils.io import load_bundle, save_bundle
+from ..utils.pool import bundle_pool, resolve_n_jobs, worker_state
+from .bundle import section
+from .content import ContentBasedRecommender
+from .hybrid import HybridRecommender
+from .svd import SVDRecommender
+
+SVD_PARAMS = ("n_factors", "n_epochs", "lr_all", "reg_all", "biased", "backend")
+HYBRID_PARAMS = ("threshold", "n_similar")
+
+# Searched when no space is given: the values train.py used to hard-code
+# (n_factors=5, n_epochs=5, lr_all=0.02, reg_all=0.03) and their neighbours
+DEFAULT_SEARCH_SPACE: Dict[str, List[Any]] = {
+    "n_factors": [5, 10, 20, 50],
+    "n_epochs": [5, 10, 20],
+    "lr_all": [0.005, 0.01, 0.02],
+    "reg_all": [0.02, 0.03, 0.05, 0.1],
+    "threshold": [0.4, 0.5, 0.6],
+    "n_similar": [5, 10, 20],
+}
+
+# metrics where lower is better; every other metric is maximized
+LOWER_IS_BETTER = ("mae",)
+
+
+def load_params(path: Path) -> Dict[str, Any]:
+    """
+    Read SVD and hybrid parameters from JSON: best_config.json written by
+    tune.py, or a plain name -> value object.
+    """
+    with open(path) as f:
+        params = json.load(f)
+    params = params.get("params", params)
+    unknown = set(params) - set(SVD_PARAMS + HYBRID_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown parameters in {path}: {', '.join(sorted(unknown))}")
+    return params
+
+
+def split_params(params: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    (SVDRecommender kwargs, HybridRecommender kwargs) of a configuration.
+    """
+    return (
+        {k: v for k, v in params.items() if k in SVD_PARAMS},
+        {k: v for k, v in params.items() if k in HYBRID_PARAMS},
+    )
+
+
+def grid_configs(space: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """
+    Every combination of the values in space (name -> list of values).
+    """
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*space.values())]
+
+
+def random_configs(
+    space: Dict[str, Any], n_configs: int, seed: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    n_configs distinct random configurations.
+
+    A parameter's space is either a list of values (one is chosen uniformly)
+    or a (low, high) tuple: a uniform draw, rounded for integer bounds, and
+    log-uniform for floats when low > 0 and high / low >= 100.
+    """
+    rng = np.random.default_rng(seed)
+
+    def draw(values):
+        if isinstance(values, tuple):
+            low, high = values
+            if isinstance(low, int) and isinstance(high, int):
+                return int(rng.integers(low, high + 1))
+            if low > 0 and high / low >= 100:
+                return float(np.exp(rng.uniform(np.log(low), np.log(high))))
+            return float(rng.uniform(low, high))
+        return values[rng.integers(len(values))]
+
+    configs, seen = [], set()
+    # give up on distinctness when a small discrete space runs out
+    for _ in range(n_configs * 20):
+        config = {name: draw(values) for name, values in space.items()}
+        key = tuple(sorted(config.items()))
+        if key not in seen:
+            seen.add(key)
+            configs.append(config)
+        if len(configs) == n_configs:
+            break
+    return configs
+
+
+def prepare_tuning_data(
+    directory: Path,
+    split: RatingSplit,
+    content: ContentBasedRecommender,
+    validation_size: float = TUNE_VALIDATION_SIZE,
+    slice_fraction: float = TUNE_SLICE_FRACTION,
+    seed: int = 0,
+    k: int = DEFAULT_TOP_K,
+) -> None:
+    """
+    Write the inner train/validation split of split.train, the validation
+    users of the first rung, the content index and the workers' k and seed
+    as one bundle.
+    """
+    inner = split_indices(split.train, "random", test_size=validation_size, seed=seed)
+    users = np.unique(inner.test_rows)
+    rng = np.random.default_rng(seed)
+    n_slice = max(1, int(round(len(users) * slice_fraction)))
+    slice_rows = np.sort(rng.choice(users, n_slice, replace=False))
+
+    split_arrays, split_meta = inner.to_arrays()
+    content_arrays, content_meta = content.to_arrays()
+    arrays = {f"split.{k}": v for k, v in split_arrays.items()}
+    arrays.update({f"content.{k}": v for k, v in content_arrays.items()})
+    arrays["tuning.slice_users"] = inner.user_ids[slice_rows]
+    metadata = {
+        "split": split_meta,
+        "content": content_meta,
+        "tuning": {"k": k, "seed": seed},
+    }
+    save_bundle(directory, arrays, metadata)
+
+
+def _load_worker(
+    arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]
+) -> Dict[str, Any]:
+    split = RatingSplit.from_arrays(section(arrays, "split"), metadata["split"])
+    trainset, testset = split.trainset, split.testset
+    slice_users = set(arrays["tuning.slice_users"].tolist())
+    content = ContentBasedRecommender.from_arrays(
+        section(arrays, "content"), metadata["content"]
+    )
+    content.fit(trainset)
+    return {
+        "trainset": trainset,
+        "testsets": {
+            "slice": [t for t in testset if t[0] in slice_users],
+            "full": testset,
+        },
+        "content": content,
+        **metadata["tuning"],
+    }
+
+
+def _evaluate_group(task) -> List[Dict[str, Any]]:
+    """
+    Score each hybrid configuration sharing one SVD configuration.
+
+    task: (rung, group_id, svd_params, [(config_id, hybrid_params), ...])
+
+    The SVD model is fitted in the slice rung and saved under the work
+    directory, so the full rung scores the very same factors.
+    """
+    rung, group_id, svd_params, members = task
+    state = worker_state()
+    svd_dir = state["directory"] / "svd" / str(group_id)
+    if rung == "slice":
+        svd_rec = SVDRecommender(**svd_params, n_threads=1, seed=state["seed"])
+        svd_rec.fit(state["trainset"])
+        save_bundle(svd_dir, *svd_rec.to_arrays())
+    else:
+        svd_rec = SVDRecommender.from_arrays(*load_bundle(svd_dir, mmap=True))
+    testset = state["testsets"][rung]
+
+    results = []
+    for config_id, hybrid_params in members:
+        hybrid = HybridRecommender(state["content"], svd_rec, **hybrid_params)
+        hybrid.user_interactions = state["content"].user_interactions
+        metrics = Evaluator(hybrid).evaluate(state["trainset"], testset, k=state["k"])
+        results.append({"config_id": config_id, **metrics})
+    return results
+
+
+def _group_configs(configs: List[Dict[str, Any]]) -> List[tuple]:
+    """
+    (svd_params, [(config_id, hybrid_params), ...]) per distinct SVD
+    configuration, in order of first appearance.
+    """
+    groups: Dict[tuple, List] = {}
+    for config_id, config in enumerate(configs):
+        svd_params, hybrid_params = split_params(config)
+        key = tuple(sorted(svd_params.items()))
+        groups.setdefault(key, []).append((config_id, hybrid_params))
+    return [(dict(key), members) for key, members in groups.items()]
+
+
+def tune(
+    split: RatingSplit,
+    content: ContentBasedRecommender,
+    configs: List[Dict[str, Any]],
+    metric: str = "ndcg@k",
+    k: int = DEFAULT_TOP_K,
+    validation_size: float = TUNE_VALIDATION_SIZE,
+    slice_fraction: float = TUNE_SLICE_FRACTION,
+    keep_fraction: float = TUNE_KEEP_FRACTION,
+    n_jobs: int = -1,
+    seed: int = 0,
+    work_dir: Optional[Path] = None,
+    log: Optional[Callable[[str], None]] = None,
+) -> pd.DataFrame:
+    """
+    Score configurations on a validation split of split.train, in parallel.
+
+    Parameters:
+        split: split whose train ratings are tuned on (its test ratings are
+            never read)
+        content: fitted content model shared by every configuration
+        configs: dicts of SVDRecommender (SVD_PARAMS) and HybridRecommender
+            (HYBRID_PARAMS) keyword arguments
+        metric: Evaluator metric to rank by ("mae" is minimized; note it
+            is 0.0 for a configuration that recommends no test rating)
+        k: cutoff of the ranking metrics
+        validation_size: fraction of train ratings held out for validation
+        slice_fraction: fraction of validation users in the first rung
+        keep_fraction: fraction of configurations promoted to the full rung
+        n_jobs: worker processes (-1: all CPUs)
+        seed: random state of the validation split, slice and SVD fits
+        work_dir: where the shared bundle is written (default: a temporary
+            directory, removed afterwards)
+        log: optional callable receiving progress messages
+
+    Returns:
+        one row per configuration with its parameters, "rung" ("slice" or
+        "full") and that rung's metrics, best first: configurations scored on
+        the full validation set rank above pruned ones.
+    """
+    log = log or (lambda message: None)
+    n_jobs = resolve_n_jobs(n_jobs)
+    ascending = metric in LOWER_IS_BETTER
+
+    if work_dir is None:
+        workspace = tempfile.TemporaryDirectory()
+    else:
+        workspace = contextlib.nullcontext(work_dir)
+    with workspace as path:
+        directory = Path(path)
+        log(f"Writing shared tuning data to {directory}")
+        prepare_tuning_data(
+            directory, split, content, validation_size, slice_fraction, seed, k
+        )
+
+        with bundle_pool(directory, n_jobs, _load_worker) as pool:
+            rows = []
+            groups = _group_configs(configs)
+            candidates = set(range(len(configs)))
+            for rung in ("slice", "full"):
+                tasks = []
+                for group_id, (svd_params, members) in enumerate(groups):
+                    members = [m for m in members if m[0] in candidates]
+                    if members:
+                        tasks.append((rung, group_id, svd_params, members))
+                log(
+                    f"Rung {rung}: {len(candidates)} configurations, "
+                    f"{len(tasks)} SVD models on {n_jobs} workers"
+                )
+                scored = []
+                for group in pool.imap_unordered(_evaluate_group, tasks):
+                    scored.extend(group)
+                # config_id order first, so ties do not depend on which
+                # task finished first
+                rung_rows = pd.DataFrame(scored).assign(rung=rung)
+                rung_rows = rung_rows.sort_values("config_id").sort_values(
+                    metric, ascending=ascending, kind="stable", na_position="last"
+                )
+                rows.append(rung_rows)
+                n_keep = max(1, int(np.ceil(len(candidates) * keep_fraction)))
+                candidates = set(rung_rows["config_id"][:n_keep].tolist())
+
+    # a configuration's final row is its last rung; full-rung rows come first
+    results = pd.concat(rows[::-1]).drop_duplicates("config_id", keep="first")
+    params = pd.DataFrame(configs).rename_axis("config_id").reset_index()
+    results = params.merge(results, on="config_id")
+    rung_order = results["rung"].map({"full": 0, "slice": 1})
+    results = results.assign(_rung_order=rung_order).sort_values(
+        ["_rung_order", metric],
+        ascending=[True, ascending],
+        kind="stable",
+        na_position="last",
+    )
+    return results.drop(columns="_rung_order").reset_index(drop=True)
@@ -0,0 +1,10 @@
+from .app import build_hybrid, create_app, load_hybrid
+from .batcher import BatchStats, MicroBatcher
+
+__all__ = [
+    "BatchStats",
+    "MicroBatcher",
+    "build_hybrid",
+    "create_app",
+    "load_hybrid",
+]
@@ -0,0 +1,128 @@
+"""
+aiohttp application serving hybrid recommendations from a model bundle.
+
+Endpoints:
+    GET /recommend?user_id=<id>&k=<k>  ranked [item_id, score] pairs
+    POST /ratings                      fold {"user_id", "ratings": [[item_id,
+                                       rating], ...]} into the model
+    GET /stats                         batching and cache counters
+    GET /health                        liveness check
+"""
+
+from pathlib import Path
+from typing import Any
+
+from aiohttp import web
+
+from ..config import (
+    DEFAULT_TOP_K,
+    RESULT_CACHE_SIZE,
+    SERVE_MAX_BATCH_SIZE,
+    SERVE_MAX_WAIT_MS,
+)
+from ..models.bundle import build_hybrid, load_model_bundle
+from ..models.cached import CachedRecommender
+from ..models.hybrid import HybridRecommender
+from .batcher import MicroBatcher
+
+BATCHER_KEY = web.AppKey("batcher", MicroBatcher)
+
+
+def load_hybrid(directory: Path, **overrides) -> HybridRecommender:
+    """
+    Open a model bundle (memory-mapped) and build its HybridRecommender; see
+    build_hybrid for overrides.
+    """
+    return build_hybrid(load_model_bundle(directory), **overrides)
+
+
+def parse_user_id(text: str) -> Any:
+    """
+    Raw ids in the bundles are integers; anything else is kept as a string.
+    """
+    try:
+        return int(text)
+    except ValueError:
+        return text
+
+
+async def handle_recommend(request: web.Request) -> web.Response:
+    if "user_id" not in request.query:
+        raise web.HTTPBadRequest(text="user_id is required")
+    user_id = parse_user_id(request.query["user_id"])
+    try:
+        k = int(request.query.get("k", DEFAULT_TOP_K))
+    except ValueError:
+        raise web.HTTPBadRequest(text="k must be an integer")
+    if k <= 0:
+        raise web.HTTPBadRequest(text="k must be positive")
+
+    recs = await request.app[BATCHER_KEY].recommend(user_id, k)
+    return web.json_response(
+        {"user_id": user_id, "items": [[item, score] for item, score in recs]}
+    )
+
+
+async def handle_ratings(request: web.Request) -> web.Response:
+    try:
+        body = await request.json()
+        user_id = body["user_id"]
+        ratings = [(item_id, float(rating)) for item_id, rating in body["ratings"]]
+    except (ValueError, KeyError, TypeError):
+        raise web.HTTPBadRequest(
+            text='expected {"user_id": ..., "ratings": [[item_id, rating], ...]}'
+        )
+
+    await request.app[BATCHER_KEY].update(
+        (user_id, item_id, rating) for item_id, rating in ratings
+    )
+    return web.json_response({"user_id": user_id, "updated": len(ratings)})
+
+
+async def handle_stats(request: web.Request) -> web.Response:
+    batcher = request.app[BATCHER_KEY]
+    stats = batcher.stats.snapshot()
+    stats["queue_depth"] = batcher.queue_depth
+    if isinstance(batcher.recommender, CachedRecommender):
+        stats["cache"] = batcher.recommender.stats.snapshot()
+        stats["cache"]["entries"] = len(batcher.recommender)
+    return web.json_response(stats)
+
+
+async def handle_health(request: web.Request) -> web.Response:
+    return web.json_response({"status": "ok"})
+
+
+def create_app(
+    recommender,
+    max_batch_size: int = SERVE_MAX_BATCH_SIZE,
+    max_wait_ms: float = SERVE_MAX_WAIT_MS,
+    cache_size: int = RESULT_CACHE_SIZE,
+) -> web.Application:
+    """
+    Build the web application around a fitted recommender.
+
+    Parameters:
+        recommender: model implementing recommend_many and partial_fit
+        max_batch_size: most requests scored together
+        max_wait_ms: longest a request waits for its batch to fill
+        cache_size: rankings kept in a CachedRecommender (0 disables it)
+    """
+    if cache_size > 0:
+        recommender = CachedRecommender(recommender, cache_size)
+    app = web.Application()
+    app[BATCHER_KEY] = MicroBatcher(recommender, max_batch_size, max_wait_ms)
+
+    async def start_batcher(app: web.Application) -> None:
+        await app[BATCHER_KEY].start()
+
+    async def stop_batcher(app: web.Application) -> None:
+        await app[BATCHER_KEY].stop()
+
+    app.on_startup.append(start_batcher)
+    app.on_cleanup.append(stop_batcher)
+    app.router.add_get("/recommend", handle_recommend)
+    app.router.add_post("/ratings", handle_ratings)
+    app.router.add_get("/stats", handle_stats)
+    app.router.add_get("/health", handle_health)
+    return app
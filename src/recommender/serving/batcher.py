@@ -0,0 +1,173 @@
+"""
+Micro-batching of concurrent recommendation requests.
+
+Requests are queued; a single worker task takes the first waiting request,
+collects more until max_batch_size or max_wait_ms, and scores the whole batch
+with one recommend_many call in a worker thread (NumPy releases the GIL, so
+the event loop keeps accepting requests while a batch is scored).
+"""
+
+import asyncio
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import SERVE_MAX_BATCH_SIZE, SERVE_MAX_WAIT_MS
+
+
+def _bucket(value: int) -> str:
+    """
+    Power-of-two histogram bucket label of a non-negative count.
+    """
+    if value <= 2:
+        return str(value)
+    upper = 1 << (value - 1).bit_length()
+    return f"{upper // 2 + 1}-{upper}"
+
+
+class BatchStats:
+    """
+    Counters and histograms describing the batching behaviour.
+    """
+
+    def __init__(self):
+        self.n_requests = 0
+        self.n_batches = 0
+        self.batch_sizes: Counter = Counter()
+        self.queue_depths: Counter = Counter()
+        self.busy_seconds = 0.0
+
+    def record(self, batch_size: int, queue_depth: int, seconds: float) -> None:
+        self.n_requests += batch_size
+        self.n_batches += 1
+        self.batch_sizes[_bucket(batch_size)] += 1
+        self.queue_depths[_bucket(queue_depth)] += 1
+        self.busy_seconds += seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        def ordered(hist: Counter) -> Dict[str, int]:
+            return dict(sorted(hist.items(), key=lambda kv: int(kv[0].split("-")[0])))
+
+        return {
+            "requests": self.n_requests,
+            "batches": self.n_batches,
+            "mean_batch_size": (
+                self.n_requests / self.n_batches if self.n_batches else 0.0
+            ),
+            "busy_seconds": self.busy_seconds,
+            "batch_size_histogram": ordered(self.batch_sizes),
+            "queue_depth_histogram": ordered(self.queue_depths),
+        }
+
+
+class MicroBatcher:
+    """
+    Serve recommend(user_id, k) calls from concurrent tasks in batches.
+
+    Parameters:
+        recommender: fitted model implementing recommend_many
+        max_batch_size: most requests scored together
+        max_wait_ms: longest a request waits for its batch to fill
+    """
+
+    def __init__(
+        self,
+        recommender,
+        max_batch_size: int = SERVE_MAX_BATCH_SIZE,
+        max_wait_ms: float = SERVE_MAX_WAIT_MS,
+    ):
+        self.recommender = recommender
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.stats = BatchStats()
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # scoring and rating updates never run at the same time
+        self._model_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._model_lock = asyncio.Lock()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def recommend(self, user_id, k: int) -> List[Tuple[Any, float]]:
+        """
+        Queue one request and wait for its batch to be scored.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((user_id, k, future))
+        return await future
+
+    async def update(self, new_ratings) -> None:
+        """
+        Fold (user_id, item_id, rating) triples into the recommender between
+        batches.
+        """
+        loop = asyncio.get_running_loop()
+        async with self._model_lock:
+            await loop.run_in_executor(
+                None, self.recommender.partial_fit, list(new_ratings)
+            )
+
+    async def _collect(self) -> List[Tuple[Any, int, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            queue_depth = self._queue.qsize()
+            start = time.perf_counter()
+            try:
+                async with self._model_lock:
+                    results = await loop.run_in_executor(None, self._score, batch)
+            except Exception as exc:  # fail the batch, keep serving
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for (_, _, future), recs in zip(batch, results):
+                if not future.done():
+                    future.set_result(recs)
+            self.stats.record(len(batch), queue_depth, time.perf_counter() - start)
+
+    def _score(self, batch) -> List[List[Tuple[Any, float]]]:
+        """
+        Score each distinct (user, k) once, with one recommend_many call per
+        distinct k in the batch (clients rarely vary k, and keeping each k
+        separate lets a CachedRecommender key rankings by the requested k).
+        """
+        by_k: Dict[int, Dict[Any, None]] = {}
+        for user_id, k, _ in batch:
+            by_k.setdefault(k, {})[user_id] = None
+        ranked = {}
+        for k, users in by_k.items():
+            for user_id, recs in zip(users, self.recommender.recommend_many(users, k)):
+                ranked[user_id, k] = recs
+        return [ranked[user_id, k] for user_id, k, _ in batch]
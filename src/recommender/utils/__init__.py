@@ -1,5 +1,16 @@
-from .io import load_dataframe, load_pickle, save_dataframe, save_pickle
+from .io import (
+    load_array,
+    load_bundle,
+    load_dataframe,
+    load_pickle,
+    save_array,
+    save_bundle,
+    save_dataframe,
+    save_pickle,
+)
 from .logging import get_logger
+from .pool import bundle_pool, resolve_n_jobs, worker_state
+from .profiling import Profiler, count, stage, timed
 
 __all__ = [
     "get_logger",
@@ -7,4 +18,15 @@ __all__ = [
     "load_pickle",
     "save_dataframe",
     "load_dataframe",
+    "save_array",
+    "load_array",
+    "save_bundle",
+    "load_bundle",
+    "bundle_pool",
+    "worker_state",
+    "resolve_n_jobs",
+    "Profiler",
+    "stage",
+    "timed",
+    "count",
 ]
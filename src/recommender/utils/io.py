@@ -1,8 +1,14 @@
+import json
+import os
 import pickle
 from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+from ..data.cache import content_hash
+
 
 def save_pickle(obj, path: Path) -> None:
     """
@@ -52,3 +58,123 @@ def load_dataframe(path: Path) -> pd.DataFrame:
         DataFrame read from CSV
     """
     return pd.read_csv(path)
+
+
+def save_array(arr: np.ndarray, path: Path) -> None:
+    """
+    Save a NumPy array in raw .npy format so it can later be memory-mapped.
+
+    Parameters:
+        arr: array to save
+        path: filesystem path to write (should end in .npy)
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.save(path, np.asarray(arr), allow_pickle=False)
+
+
+def load_array(path: Path, mmap: bool = True) -> np.ndarray:
+    """
+    Load a .npy array, memory-mapped read-only by default.
+
+    Memory-mapped arrays are paged in lazily and shared between processes
+    through the OS page cache.
+
+    Parameters:
+        path: filesystem path to the .npy file
+        mmap: whether to memory-map instead of reading into memory
+    """
+    return np.load(path, mmap_mode="r" if mmap else None, allow_pickle=False)
+
+
+# Bundle layout: one .npy file per named array plus a JSON manifest recording
+# the schema version, each array's file, dtype, shape and SHA-256, and free-form
+# metadata. Bump the version when the meaning of stored arrays changes.
+BUNDLE_SCHEMA_VERSION = 1
+BUNDLE_MANIFEST_FILE = "manifest.json"
+
+
+def save_bundle(
+    directory: Path,
+    arrays: Dict[str, np.ndarray],
+    metadata: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Write named arrays as raw .npy files plus a versioned, checksummed manifest.
+
+    The manifest is written last (atomically), so a bundle with a manifest is
+    always complete. Arrays are stored without pickling; ids must therefore be
+    numeric or string arrays.
+
+    Parameters:
+        directory: bundle directory (created if needed)
+        arrays: name -> array; names become file names (name.npy)
+        metadata: JSON-serializable values stored in the manifest
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    entries = {}
+    for name, arr in arrays.items():
+        arr = np.asarray(arr)
+        path = directory / f"{name}.npy"
+        np.save(path, arr, allow_pickle=False)
+        entries[name] = {
+            "file": path.name,
+            "dtype": arr.dtype.str,
+            "shape": list(arr.shape),
+            "sha256": content_hash(path),
+        }
+    manifest = {
+        "schema_version": BUNDLE_SCHEMA_VERSION,
+        "arrays": entries,
+        "metadata": metadata or {},
+    }
+    tmp = directory / f".{BUNDLE_MANIFEST_FILE}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, directory / BUNDLE_MANIFEST_FILE)
+
+
+def read_bundle_manifest(directory: Path) -> Dict[str, Any]:
+    """
+    Read a bundle's manifest, checking its schema version.
+    """
+    path = Path(directory) / BUNDLE_MANIFEST_FILE
+    if not path.exists():
+        raise FileNotFoundError(f"No bundle manifest at {path}")
+    with open(path) as f:
+        manifest = json.load(f)
+    version = manifest.get("schema_version")
+    if version != BUNDLE_SCHEMA_VERSION:
+        raise ValueError(
+            f"Unsupported bundle schema version {version}; "
+            f"expected {BUNDLE_SCHEMA_VERSION}"
+        )
+    return manifest
+
+
+def load_bundle(
+    directory: Path, mmap: bool = True, verify: bool = False
+) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """
+    Open a bundle written by save_bundle.
+
+    Arrays are memory-mapped read-only by default, so opening a bundle reads
+    only headers and processes share pages through the OS cache. Dtypes and
+    shapes are always checked against the manifest; verify also re-hashes
+    every file (which reads it fully).
+
+    Returns:
+        (arrays, metadata)
+    """
+    directory = Path(directory)
+    manifest = read_bundle_manifest(directory)
+    arrays = {}
+    for name, entry in manifest["arrays"].items():
+        path = directory / entry["file"]
+        if verify and content_hash(path) != entry["sha256"]:
+            raise ValueError(f"Checksum mismatch for bundle array {name!r}")
+        arr = load_array(path, mmap=mmap)
+        if arr.dtype.str != entry["dtype"] or list(arr.shape) != entry["shape"]:
+            raise ValueError(f"Bundle array {name!r} does not match its manifest")
+        arrays[name] = arr
+    return arrays, manifest["metadata"]
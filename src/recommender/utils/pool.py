@@ -0,0 +1,59 @@
+"""
+Process pools whose workers share one read-only bundle.
+
+The parent writes the shared data once with save_bundle. Every worker
+memory-maps that bundle in its initializer and keeps what a loader builds
+from it as its worker state, which tasks read with worker_state().
+"""
+
+import multiprocessing
+import os
+from multiprocessing.pool import Pool
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+import numpy as np
+
+from .io import load_bundle
+
+# loader(arrays, metadata) -> worker state
+WorkerLoader = Callable[[Dict[str, np.ndarray], Dict[str, Any]], Dict[str, Any]]
+
+# Per-worker state, built once by _init_worker from the memory-mapped bundle
+_STATE: Dict[str, Any] = {}
+
+
+def resolve_n_jobs(n_jobs: int) -> int:
+    """
+    n_jobs, or the number of CPUs when it is not positive.
+    """
+    return n_jobs if n_jobs > 0 else (os.cpu_count() or 1)
+
+
+def worker_state() -> Dict[str, Any]:
+    """
+    State of the calling worker: its loader's output plus "directory", the
+    bundle directory.
+    """
+    return _STATE
+
+
+def _init_worker(directory: Path, loader: WorkerLoader) -> None:
+    arrays, metadata = load_bundle(directory, mmap=True)
+    _STATE.clear()
+    _STATE.update(loader(arrays, metadata), directory=directory)
+
+
+def bundle_pool(directory: Path, n_jobs: int, loader: WorkerLoader) -> Pool:
+    """
+    A pool of n_jobs workers that each memory-map the bundle in directory and
+    keep loader(arrays, metadata) as their worker_state().
+
+    loader must be a module-level function, so spawned workers can import it.
+    """
+    # fork when available: workers then also skip re-importing the package
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+    return context.Pool(
+        n_jobs, initializer=_init_worker, initargs=(Path(directory), loader)
+    )
@@ -0,0 +1,246 @@
+"""
+Stage timing, peak-memory tracking and counters for the pipelines.
+
+A Profiler collects a tree of named stages. While it is active (inside
+`with profiler:`), the module-level stage(), timed() and count() helpers
+record into it; with no active profiler they cost one global lookup, so
+library code can be instrumented unconditionally.
+
+    profiler = Profiler(track_memory=True)
+    with profiler:
+        with stage("fit"):
+            model.fit(trainset)
+    profiler.save(output_dir / "profile.json")
+"""
+
+import cProfile
+import functools
+import json
+import re
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+_ACTIVE: Optional["Profiler"] = None
+
+# ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def max_rss_mb() -> Optional[float]:
+    """
+    Peak resident set size so far of this process and its waited-for children
+    (e.g. forked evaluation workers), in MiB; None where unsupported.
+    """
+    if resource is None:
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    return peak * _MAXRSS_UNIT / 2**20
+
+
+class _Stage:
+    """
+    One node of the stage tree; repeated entries of the same stage under the
+    same parent accumulate into one node.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.py_peak_bytes: Optional[int] = None
+        self.max_rss_mb: Optional[float] = None
+        self.children: Dict[str, "_Stage"] = {}
+
+    def child(self, name: str) -> "_Stage":
+        if name not in self.children:
+            self.children[name] = _Stage(name)
+        return self.children[name]
+
+    def to_dict(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            "name": self.name,
+            "calls": self.calls,
+            "seconds": self.seconds,
+            "cpu_seconds": self.cpu_seconds,
+        }
+        if self.py_peak_bytes is not None:
+            result["py_peak_mb"] = self.py_peak_bytes / 2**20
+        if self.max_rss_mb is not None:
+            result["max_rss_mb"] = self.max_rss_mb
+        if self.children:
+            result["children"] = [c.to_dict() for c in self.children.values()]
+        return result
+
+
+class Profiler:
+    """
+    Nested stage timers with optional memory tracking and cProfile dumps.
+
+    Parameters:
+        track_memory: trace Python allocations with tracemalloc and report
+            each stage's peak traced memory above its starting level (slows
+            allocation-heavy code down noticeably)
+        cprofile_dir: if set, run cProfile during every top-level stage and
+            write <cprofile_dir>/<stage>.prof (nested stages are included in
+            their top-level stage's dump)
+    """
+
+    def __init__(self, track_memory: bool = False, cprofile_dir: Optional[Path] = None):
+        self.track_memory = track_memory
+        self.cprofile_dir = Path(cprofile_dir) if cprofile_dir is not None else None
+        self.root = _Stage("total")
+        self.counters: Counter = Counter()
+        self._stack: List[_Stage] = [self.root]
+        # running tracemalloc peak of each open stage, parallel to _stack
+        self._peaks: List[int] = [0]
+        self._cprofiles: Dict[str, cProfile.Profile] = {}
+        self._started_tracemalloc = False
+        self._previous: Optional["Profiler"] = None
+        self._start = 0.0
+        self._cpu_start = 0.0
+
+    def __enter__(self) -> "Profiler":
+        global _ACTIVE
+        self._previous, _ACTIVE = _ACTIVE, self
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._start, self._cpu_start = time.perf_counter(), time.process_time()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        global _ACTIVE
+        self.root.calls += 1
+        self.root.seconds += time.perf_counter() - self._start
+        self.root.cpu_seconds += time.process_time() - self._cpu_start
+        self.root.max_rss_mb = max_rss_mb()
+        if self.track_memory:
+            self.root.py_peak_bytes = max(
+                self._peaks[0], tracemalloc.get_traced_memory()[1]
+            )
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        _ACTIVE = self._previous
+        self._dump_cprofiles()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Time the enclosed block as a child of the innermost open stage.
+        """
+        node = self._stack[-1].child(name)
+        profile, base = None, 0
+        if self.cprofile_dir is not None and len(self._stack) == 1:
+            profile = self._cprofiles.setdefault(name, cProfile.Profile())
+        if self.track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            self._peaks[-1] = max(self._peaks[-1], peak)
+            tracemalloc.reset_peak()
+            base = current
+        self._stack.append(node)
+        self._peaks.append(0)
+        start, cpu_start = time.perf_counter(), time.process_time()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            node.calls += 1
+            node.seconds += time.perf_counter() - start
+            node.cpu_seconds += time.process_time() - cpu_start
+            node.max_rss_mb = max_rss_mb()
+            self._stack.pop()
+            peak = self._peaks.pop()
+            if self.track_memory:
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.reset_peak()
+                self._peaks[-1] = max(self._peaks[-1], peak)
+                node.py_peak_bytes = max(node.py_peak_bytes or 0, peak - base)
+
+    def count(self, name: str, n: float = 1) -> None:
+        self.counters[name] += n
+
+    def add_counters(self, counters: Dict[str, float]) -> None:
+        """
+        Merge counters collected elsewhere, e.g. in a forked worker.
+        """
+        self.counters.update(counters)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "stages": self.root.to_dict(),
+            "counters": dict(sorted(self.counters.items())),
+            "track_memory": self.track_memory,
+        }
+
+    def save(self, path: Path) -> None:
+        """
+        Write the stage tree and counters as JSON (profile.json).
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def _dump_cprofiles(self) -> None:
+        if not self._cprofiles:
+            return
+        self.cprofile_dir.mkdir(parents=True, exist_ok=True)
+        for name, profile in self._cprofiles.items():
+            filename = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+            profile.dump_stats(self.cprofile_dir / f"{filename}.prof")
+
+
+def active_profiler() -> Optional[Profiler]:
+    return _ACTIVE
+
+
+def stage(name: str):
+    """
+    Context manager timing a stage of the active profiler (no-op without one).
+    """
+    return _ACTIVE.stage(name) if _ACTIVE is not None else nullcontext()
+
+
+def timed(name: Optional[str] = None):
+    """
+    Decorator running each call of a function as a stage (default name: the
+    function's qualified name).
+    """
+
+    def decorator(fn):
+        stage_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(stage_name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def count(name: str, n: float = 1) -> None:
+    """
+    Add n to a counter of the active profiler (no-op without one).
+    """
+    if _ACTIVE is not None:
+        _ACTIVE.counters[name] += n